@@ -1,17 +1,35 @@
 from __future__ import annotations
 
+import hashlib
+import heapq
+import os
+from concurrent.futures import Future
 from datetime import date, datetime, timedelta
 
 from html.parser import HTMLParser
 from pathlib import Path
 from re import search
-from typing import Dict, List, Literal, Optional, Tuple
+from threading import Lock
+from time import time
+from typing import Dict, Iterable, Iterator, List, Literal, Optional, Tuple
 from zipfile import ZipFile
 
 from mthrottle import Throttle
 from requests import Session
 from requests.exceptions import ReadTimeout
 
+from .compression import Compression, open_report, open_writer, suffix
+from .constants import INDEX
+from .hedging import Hedging
+from .jsonstream import iter_rows
+from .manifest import DownloadManifest, request_key
+from .scheduler import PriorityScheduler, concurrent_map
+from .session_state import SessionState
+from .streamer import stream_quotes
+from .tracing import Tracer, params_attribute
+from .transport import RequestsTransport, Transport
+from .trading_calendar import TradingCalendar
+
 throttle_config = {
     "lookup": {
         "rps": 15,
@@ -21,7 +39,37 @@ throttle_config = {
     },
 }
 
-th = Throttle(throttle_config, 15)
+# Requests from all threads wait in a priority queue in front of the throttle.
+# This also serialises calls to Throttle, which is not thread safe.
+th = PriorityScheduler(Throttle(throttle_config, 15))
+
+
+def set_limiter(limiter):
+    """
+    .. versionadded:: 3.2.0
+
+    Replace the rate limiter used by all BSE instances in this process.
+    Requests are still ordered by :func:`bse.priority` before reaching the limiter.
+
+    :param limiter: Any object with a ``check(key)`` method, that blocks until
+        a request is allowed. ``key`` is ``default`` or ``lookup``.
+    :type limiter: bse.limiter.Limiter
+
+    By default, each process is throttled separately. To share one rate limit between
+    all processes on a host, call this in every process with the same :class:`bse.limiter.FileLimiter`
+    path.
+
+    .. code-block:: python
+
+        from bse import BSE, set_limiter
+        from bse.BSE import throttle_config
+        from bse.limiter import FileLimiter
+
+        set_limiter(FileLimiter(throttle_config, "/tmp/bse-limiter"))
+    """
+    global th
+
+    th = PriorityScheduler(limiter)
 
 
 class BSE:
@@ -29,7 +77,36 @@ class BSE:
 
     :param download_folder: A folder/dir to save downloaded files and cookie files
     :type download_folder: pathlib.Path or str
+    :param transport: (Optional) HTTP transport to send requests. Defaults to :class:`bse.transport.RequestsTransport`.
+        See :class:`bse.transport.HTTPXTransport` for HTTP/2 and :class:`bse.transport.FakeTransport` for tests.
+    :type transport: bse.transport.Transport or None
     :raise ValueError: if ``download_folder`` is not a folder/dir
+
+    An instance can be shared between threads. Identical requests (same url and params)
+    made concurrently are coalesced into a single request and the response is shared.
+
+    ``metrics`` is a dictionary of counters:
+
+    - ``requests``: Number of requests sent to BSE
+    - ``coalesced``: Number of calls that were served by another in-flight request
+
+    ``calendar`` is a :class:`bse.trading_calendar.TradingCalendar` saved in ``download_folder``.
+    Holidays are learned when the bhavcopy or index data for a past date is unavailable.
+    Other missing reports are remembered per report. Requests for weekends, known holidays
+    and reports known to be unavailable are not sent to BSE.
+
+    ``tracer`` is a :class:`bse.tracing.Tracer`. Set an exporter on it to receive
+    spans of throttle wait, time to first byte, transfer, download and decode for each request.
+
+    ``hedging`` is None by default. Set it to a :class:`bse.hedging.Hedging` to send a
+    duplicate of API requests that are slower than recent latency and use the first response.
+
+    Session cookies and headers are saved to ``session.json`` in ``download_folder``
+    on :meth:`.exit` or when used as a context manager, and restored by the next instance.
+    Expired cookies are not restored. Only the default transport saves session state.
+
+    ``session`` is the :class:`requests.Session` of the default transport or None
+    if another transport is used.
     """
 
     version = "3.1.0"
@@ -64,11 +141,15 @@ class BSE:
         "ZY",
     )
 
-    def __init__(self, download_folder: str | Path):
-        self.session = Session()
+    def __init__(
+        self, download_folder: str | Path, transport: Optional[Transport] = None
+    ):
+        self.transport = transport or RequestsTransport()
+        self.session: Optional[Session] = getattr(self.transport, "session", None)
+
         ua = "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:138.0) Gecko/20100101 Firefox/138.0"
 
-        self.session.headers.update(
+        self.transport.headers.update(
             {
                 "User-Agent": ua,
                 "Accept": "application/json, text/plain, */*",
@@ -80,67 +161,353 @@ class BSE:
         )
 
         self.dir = BSE.__getPath(download_folder, isFolder=True)
+
+        self.session_state = SessionState(self.dir / "session.json")
+
+        if self.session:
+            self.session_state.load(self.session)
+
         self.symbol_parser = SymbolParser()
+        self.calendar = TradingCalendar(self.dir / "trading_calendar.json")
+
+        self.metrics: Dict[str, int] = {"requests": 0, "coalesced": 0}
+        self.tracer = Tracer()
+        self.hedging: Optional[Hedging] = None
+
+        # (url, params) -> Future of in-flight request
+        self.__inflight: Dict[tuple, Future] = {}
+        self.__lock = Lock()
+
+        # folder -> manifest of completed downloads
+        self.__manifests: Dict[Path, DownloadManifest] = {}
 
     def __enter__(self):
         return self
 
     def __exit__(self, *_):
-        self.session.close()
+        self.exit()
 
         return False
 
     def exit(self):
-        """Close the Request session"""
+        """Save the session cookies and close the transport and hedging threads"""
+
+        if self.session:
+            self.session_state.save(self.session)
+
+        if self.hedging:
+            self.hedging.close()
 
-        self.session.close()
+        self.transport.close()
 
     @staticmethod
-    def __unzip(file: Path, folder: Path):
+    def __unzipCsv(file: Path, folder: Path, compress: Compression = None) -> Path:
+        """Extract the pipe separated file from the zip as a CSV file,
+        streaming it through the compressor if specified"""
+
         with ZipFile(file) as zip:
-            filepath = zip.extract(member=zip.namelist()[0], path=folder)
+            member = zip.namelist()[0]
+
+            csv_file = folder / Path(member).with_suffix(".csv").name
+            csv_file = csv_file.with_name(csv_file.name + suffix(compress))
+            part = csv_file.with_name(f"{csv_file.name}.part")
 
+            with zip.open(member) as src, open_writer(part, compress) as dst:
+                for chunk in iter(lambda: src.read(1000000), b""):
+                    dst.write(chunk.replace(b"|", b","))
+
+        os.replace(part, csv_file)
         file.unlink()
 
-        return Path(filepath)
+        return csv_file
+
+    def __manifest(self, folder: Path) -> DownloadManifest:
+        with self.__lock:
+            if folder not in self.__manifests:
+                self.__manifests[folder] = DownloadManifest(folder)
+
+            return self.__manifests[folder]
+
+    def __cached(
+        self,
+        url: str,
+        folder: Path,
+        params: Optional[dict] = None,
+        compress: Compression = None,
+    ) -> Optional[Path]:
+        """Return the file previously downloaded for the request if it is complete"""
+
+        return self.__manifest(folder).get(request_key(url, params, compress))
 
     def __download(
-        self, url: str, folder: Path, params: Optional[dict] = None, fname=None
+        self,
+        url: str,
+        folder: Path,
+        params: Optional[dict] = None,
+        fname=None,
+        compress: Compression = None,
     ):
         """Download a large file in chunks from the given url.
-        Returns pathlib.Path object of the downloaded file"""
+        Returns pathlib.Path object of the downloaded file
+
+        Data is written to a .part file and renamed once complete. If a .part file
+        exists from an interrupted download, it is resumed with a HTTP Range request.
+        Completed downloads are recorded in the folder's manifest.
+
+        If ``compress`` is specified, data is compressed as it is written and the
+        compression suffix is added to the filename. Compressed downloads are not resumed."""
 
         if fname:
             fname = folder / fname
         else:
             fname = folder / url.split("/")[-1]
 
-        th.check()
+        fname = fname.with_name(fname.name + suffix(compress))
 
-        try:
-            with self.session.get(url, stream=True, timeout=10, params=params) as r:
-                if r.status_code == 404:
-                    raise RuntimeError("Report is unavailable or not yet updated.")
+        part = fname.with_name(f"{fname.name}.part")
+        offset = part.stat().st_size if part.exists() and not compress else 0
+
+        headers = (
+            {"Range": f"bytes={offset}-", "Accept-Encoding": "identity"}
+            if offset
+            else None
+        )
 
-                with fname.open(mode="wb") as f:
-                    for chunk in r.iter_content(chunk_size=1000000):
-                        f.write(chunk)
-        except ReadTimeout:
-            raise TimeoutError("Request timed out")
+        with self.tracer.span(
+            "request", endpoint=url, params=params_attribute(params), offset=offset
+        ):
+            self.__throttle()
+
+            digest = hashlib.sha256()
+            received = 0
+
+            start = time()
+
+            try:
+                with self.transport.get(
+                    url, stream=True, timeout=10, params=params, headers=headers
+                ) as r:
+                    # With stream=True, the response is returned once headers are received
+                    self.tracer.record("ttfb", start, time(), status=r.status_code)
+
+                    if r.status_code == 404:
+                        raise RuntimeError("Report is unavailable or not yet updated.")
+
+                    if r.status_code == 416:
+                        # Range not satisfiable. Discard the part file and start over
+                        part.unlink()
+                        return self.__download(url, folder, params, fname.name)
+
+                    if not r.ok:
+                        raise ConnectionError(f"{r.status_code}: {r.reason}")
+
+                    if r.status_code != 206:
+                        # Server ignored the Range header and sent the whole file
+                        offset = 0
+
+                    if offset:
+                        with part.open(mode="rb") as f:
+                            for chunk in iter(lambda: f.read(1000000), b""):
+                                digest.update(chunk)
+
+                    # Content-Length is the encoded size if the response is compressed
+                    expected = (
+                        None
+                        if "Content-Encoding" in r.headers
+                        else r.headers.get("Content-Length")
+                    )
+
+                    if compress:
+                        f = open_writer(part, compress)
+                    else:
+                        f = part.open(mode="ab" if offset else "wb")
+
+                    with f, self.tracer.span("download", file=fname.name) as span:
+                        for chunk in r.iter_content(chunk_size=1000000):
+                            f.write(chunk)
+                            digest.update(chunk)
+                            received += len(chunk)
+
+                        if span:
+                            span.attributes["bytes"] = received
+            except ReadTimeout:
+                raise TimeoutError("Request timed out")
+
+            if expected is not None and received != int(expected):
+                raise ConnectionError("Download incomplete. Retry to resume the download.")
+
+            os.replace(part, fname)
+
+            # digest is of the uncompressed data. Let the manifest hash the file on disk
+            self.__manifest(folder).record(
+                request_key(url, params, compress),
+                fname,
+                None if compress else digest.hexdigest(),
+            )
+
+            return fname
+
+    def __downloadReport(
+        self,
+        report: str,
+        dt: date,
+        url: str,
+        folder: Path,
+        compress: Compression = None,
+    ) -> Path:
+        """Download a daily report, skipping known holidays and reports known to be
+        unavailable. A missing report is remembered per report. The calendar learns
+        a holiday only when two reports are missing for the date."""
+
+        calendar = self.calendar
 
-        return fname
+        if not calendar.is_trading_day(dt):
+            raise RuntimeError("Report is unavailable. Not a trading day.")
+
+        if calendar.is_unavailable(report, dt):
+            raise RuntimeError("Report is unavailable. Not published for this date.")
 
-    def __req(self, url, params=None, timeout=10):
         try:
-            response = self.session.get(url, params=params, timeout=timeout)
-        except ReadTimeout:
-            raise TimeoutError("Request timed out")
+            file = self.__download(url, folder, compress=compress)
+        except RuntimeError:
+            calendar.add_unavailable(report, dt)
+            raise
+
+        self.calendar.add_trading_day(dt)
+
+        return file
 
-        if not response.ok:
-            raise ConnectionError(f"{response.status_code}: {response.reason}")
+    def __throttle(self, key: str = "default"):
+        with self.tracer.span("throttle", key=key):
+            th.check(key)
+
+        with self.__lock:
+            self.metrics["requests"] += 1
+
+    def __get(self, url, params=None, key="default"):
+        """Make a throttled GET request and decode the JSON response.
+        A request span covers both the request and decoding."""
+
+        with self.tracer.span("request", endpoint=url, params=params_attribute(params)):
+            return self.__json(self.__req(url, params, key=key))
+
+    def __req(self, url, params=None, timeout=10, key="default"):
+        """Make a throttled GET request. Concurrent calls with the same url and params
+        wait for the first call to complete and share its response.
+
+        Called within a request span, which records if the response was coalesced."""
+
+        req_key = (
+            url,
+            tuple(sorted((k, str(v)) for k, v in params.items())) if params else (),
+        )
+
+        with self.__lock:
+            future = self.__inflight.get(req_key)
+            is_leader = future is None
+
+            if is_leader:
+                future = self.__inflight[req_key] = Future()
+            else:
+                self.metrics["coalesced"] += 1
+
+        span = self.tracer.current()
+
+        if span:
+            span.attributes["coalesced"] = not is_leader
+
+        if not is_leader:
+            return future.result()
+
+        try:
+            self.__throttle(key)
+
+            start = time()
+
+            try:
+                if self.hedging:
+                    response = self.hedging.run(
+                        url,
+                        lambda: self.transport.get(url, params=params, timeout=timeout),
+                        lambda: self.__throttle(key),
+                    )
+                else:
+                    response = self.transport.get(url, params=params, timeout=timeout)
+            except ReadTimeout:
+                raise TimeoutError("Request timed out")
+
+            self.__traceResponse(response, start)
+
+            if not response.ok:
+                raise ConnectionError(f"{response.status_code}: {response.reason}")
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(response)
+        finally:
+            with self.__lock:
+                del self.__inflight[req_key]
 
         return response
 
+    def __traceResponse(self, response, start: float):
+        """Record time to first byte and body transfer spans of a completed response"""
+
+        end = time()
+        status = response.status_code
+
+        # requests measures the time until the response headers are parsed
+        elapsed = getattr(response, "elapsed", None)
+
+        if elapsed is None:
+            self.tracer.record("ttfb", start, end, status=status)
+            return
+
+        first_byte = min(start + elapsed.total_seconds(), end)
+
+        self.tracer.record("ttfb", start, first_byte, status=status)
+        self.tracer.record("transfer", first_byte, end, status=status)
+
+    def __json(self, response):
+        """Decode the JSON response"""
+
+        with self.tracer.span("decode", endpoint=getattr(response, "url", None)):
+            return response.json()
+
+    def __rows(self, url, params=None, key: Optional[str] = "Table", timeout=10):
+        """Send a throttled GET request and return an iterator of rows parsed
+        from the response as it is received. Requests are not coalesced."""
+
+        with self.tracer.span(
+            "request", endpoint=url, params=params_attribute(params), stream=True
+        ):
+            self.__throttle()
+
+            start = time()
+
+            try:
+                response = self.transport.get(
+                    url, params=params, timeout=timeout, stream=True
+                )
+            except ReadTimeout:
+                raise TimeoutError("Request timed out")
+
+            self.tracer.record("ttfb", start, time(), status=response.status_code)
+
+            if not response.ok:
+                response.close()
+                raise ConnectionError(f"{response.status_code}: {response.reason}")
+
+        def rows() -> Iterator[dict]:
+            with response:
+                try:
+                    yield from iter_rows(response.iter_content(1 << 16), key)
+                except ReadTimeout:
+                    raise TimeoutError("Request timed out")
+
+        return rows()
+
     def __lookup(self, scrip):
         """return scripname if scrip is a bse scrip code and vice versa"""
 
@@ -148,11 +515,11 @@ class BSE:
 
         params = {"Type": "SS", "text": scrip}
 
-        th.check("lookup")
+        with self.tracer.span("request", endpoint=url, params=params_attribute(params)):
+            response = self.__req(url, params, key="lookup")
 
-        response = self.__req(url, params)
-
-        return response.text.replace("&nbsp;", " ")
+            with self.tracer.span("decode", endpoint=url):
+                return response.text.replace("&nbsp;", " ")
 
     @staticmethod
     def __getPath(path: str | Path, isFolder: bool = False):
@@ -167,7 +534,12 @@ class BSE:
 
         return path
 
-    def bhavcopyReport(self, date: datetime, folder: str | Path | None = None):
+    def bhavcopyReport(
+        self,
+        date: datetime,
+        folder: str | Path | None = None,
+        compress: Compression = None,
+    ):
         """
         Download the daily bhavcopy report for specified ``date``
 
@@ -175,18 +547,29 @@ class BSE:
         :type date: datetime.datetime
         :param folder: Optional dir/folder to save the file to
         :type folder: str or pathlib.Path or None
-        :raise ValueError: if ``folder`` is not a dir/folder.
-        :raise RuntimeError: if report is unavailable or not yet updated.
+        :param compress: (Optional) One of ``gzip`` or ``zstd``. Compress the report while downloading.
+            Use :func:`bse.compression.open_report` to read it.
+        :type compress: str or None
+        :raise ValueError: if ``folder`` is not a dir/folder or ``compress`` is not valid.
+        :raise RuntimeError: if report is unavailable, not yet updated or ``date`` is not a trading day.
         :raise FileNotFoundError: if file download failed or file is corrupt.
         :raise TimeoutError: if request timed out with no response
         :return: file path of downloaded report
         :rtype: pathlib.Path
+
+        If the report was downloaded before and is complete, the existing file is returned.
+        Interrupted downloads are resumed.
         """
 
         folder = BSE.__getPath(folder, isFolder=True) if folder else self.dir
         url = f"{self.base_url}/download/BhavCopy/Equity/BhavCopy_BSE_CM_0_0_0_{date:%Y%m%d}_F_0000.CSV"
 
-        file = self.__download(url, folder)
+        cached = self.__cached(url, folder, compress=compress)
+
+        if cached:
+            return cached
+
+        file = self.__downloadReport("bhavcopy", date, url, folder, compress)
 
         if not file.exists():
             file.unlink()
@@ -194,7 +577,12 @@ class BSE:
 
         return file
 
-    def deliveryReport(self, date: datetime, folder: str | Path | None = None):
+    def deliveryReport(
+        self,
+        date: datetime,
+        folder: str | Path | None = None,
+        compress: Compression = None,
+    ):
         """
         Download the daily delivery report for specified ``date``
 
@@ -202,31 +590,42 @@ class BSE:
         :type date: datetime.datetime
         :param folder: Optional dir/folder to save the file to
         :type folder: str or pathlib.Path or None
-        :raise ValueError: if ``folder`` is not a dir/folder.
-        :raise RuntimeError: if report is unavailable or not yet updated.
+        :param compress: (Optional) One of ``gzip`` or ``zstd``. Compress the CSV while converting it.
+            Use :func:`bse.compression.open_report` to read it.
+        :type compress: str or None
+        :raise ValueError: if ``folder`` is not a dir/folder or ``compress`` is not valid.
+        :raise RuntimeError: if report is unavailable, not yet updated or ``date`` is not a trading day.
         :raise FileNotFoundError: if file download failed or file is corrupt.
         :raise TimeoutError: if request timed out with no response
         :return: file path of downloaded report
         :rtype: pathlib.Path
 
         Zip file is extracted, converted to CSV, and saved filepath is returned
+
+        If the report was downloaded before and is complete, the existing file is returned.
+        Interrupted downloads are resumed.
         """
 
         folder = BSE.__getPath(folder, isFolder=True) if folder else self.dir
 
         url = f"{self.base_url}/BSEDATA/gross/{date:%Y}/SCBSEALL{date:%d%m}.zip"
 
-        file = self.__download(url, folder)
+        cached = self.__cached(url, folder, compress=compress)
+
+        if cached:
+            return cached
+
+        file = self.__downloadReport("delivery", date, url, folder)
 
         if not file.exists():
             file.unlink()
             raise FileNotFoundError(f"Failed to download file: {file.name}")
 
-        file = BSE.__unzip(file, file.parent)
+        file = BSE.__unzipCsv(file, folder, compress)
 
-        file.write_bytes(file.read_bytes().replace(b"|", b","))
+        self.__manifest(folder).record(request_key(url, compress=compress), file)
 
-        return file.replace(file.with_suffix(".csv"))
+        return file
 
     def announcements(
         self,
@@ -237,7 +636,8 @@ class BSE:
         scripcode: str | None = None,
         category: str = "-1",
         subcategory: str = "-1",
-    ) -> Dict[str, List[dict]]:
+        stream: bool = False,
+    ) -> Dict[str, List[dict]] | Iterator[dict]:
         """
         All corporate announcements
 
@@ -251,6 +651,9 @@ class BSE:
         :type category: str
         :param subcategory: (Optional). Filter announcements by subcategory ex. ``Dividend``.
         :type subcategory: str
+        :param stream: Default False. If True, return an iterator of announcements in ``Table``,
+            parsed as the response is received. ``Table1`` is not returned.
+        :type stream: bool
         :raise ValueError: if ``from_date`` is greater than ``to_date`` or ``subcategory`` argument is passed without ``category``
         :raise TimeoutError: if request timed out with no response
         :raise ConnectionError: in case of HTTP error or server returns error response.
@@ -319,8 +722,10 @@ class BSE:
             "strType": _type,
         }
 
-        th.check()
-        return self.__req(url, params).json()
+        if stream:
+            return self.__rows(url, params)
+
+        return self.__get(url, params)
 
     def actions(
         self,
@@ -331,7 +736,8 @@ class BSE:
         scripcode: str | None = None,
         sector: str = "",
         purpose_code: str | None = None,
-    ) -> List[dict]:
+        stream: bool = False,
+    ) -> List[dict] | Iterator[dict]:
         """
         All forthcoming corporate actions
 
@@ -349,6 +755,8 @@ class BSE:
         :type sector: str
         :param purpose_code: Limit result to actions with given purpose
         :type purpose_code: str
+        :param stream: Default False. If True, return an iterator of actions parsed as the response is received.
+        :type stream: bool
         :raise ValueError: if ``from_date`` is greater than ``to_date``
         :raise TimeoutError: if request timed out with no response
         :raise ConnectionError: in case of HTTP error or server returns error response.
@@ -404,7 +812,12 @@ class BSE:
         if scripcode:
             params["scripcode"] = scripcode
 
-        return self.__req(f"{self.api_url}/DefaultData/w", params).json()
+        url = f"{self.api_url}/DefaultData/w"
+
+        if stream:
+            return self.__rows(url, params)
+
+        return self.__get(url, params)
 
     def resultCalendar(
         self,
@@ -454,7 +867,155 @@ class BSE:
 
         url = f"{self.api_url}/Corpforthresults/w"
 
-        return self.__req(url, params=params).json()
+        return self.__get(url, params=params)
+
+    @staticmethod
+    def __chunks(
+        from_date: date, to_date: date, chunk_size: int
+    ) -> List[Tuple[datetime, datetime]]:
+        """Split date range into chunks of datetime objects"""
+
+        if isinstance(from_date, datetime):
+            from_date = from_date.date()
+
+        if isinstance(to_date, datetime):
+            to_date = to_date.date()
+
+        if from_date > to_date:
+            raise ValueError("'from_date' cannot be greater than 'to_date'")
+
+        return [
+            (
+                datetime.combine(start, datetime.min.time()),
+                datetime.combine(end, datetime.min.time()),
+            )
+            for start, end in BSE.split_date_range(from_date, to_date, chunk_size)
+        ]
+
+    @staticmethod
+    def __parseDate(text: str) -> date:
+        """Parse dates like '25 Oct 2023'. Missing dates sort last"""
+
+        try:
+            return datetime.strptime(text.strip(), "%d %b %Y").date()
+        except (AttributeError, ValueError):
+            return date.max
+
+    def actionsRange(
+        self,
+        from_date: date,
+        to_date: date,
+        segment: Literal["equity", "debt", "mf_etf"] = "equity",
+        by_date: Literal["ex", "record", "bc_start"] = "ex",
+        scripcode: str | None = None,
+        sector: str = "",
+        purpose_code: str | None = None,
+        chunk_size: int = 30,
+    ) -> List[dict]:
+        """
+        .. versionadded:: 3.2.0
+
+        Corporate actions for a long date range.
+
+        The range is split into chunks of ``chunk_size`` days, which are fetched concurrently
+        within the throttle limits. See :meth:`.actions` for the other parameters.
+
+        :param from_date: From date.
+        :type from_date: datetime.date
+        :param to_date: To date.
+        :type to_date: datetime.date
+        :param chunk_size: Default 30. Number of days per request.
+        :type chunk_size: int
+        :raise ValueError: if ``from_date`` is greater than ``to_date``
+        :raise TimeoutError: if request timed out with no response
+        :raise ConnectionError: in case of HTTP error or server returns error response.
+        :return: List of actions de-duplicated by scrip code, purpose, ex date and record date.
+            Sorted by ``by_date`` and scrip code. Same format as :meth:`.actions`
+        :rtype: list[dict]
+        """
+
+        chunks = BSE.__chunks(from_date, to_date, chunk_size)
+
+        tables = concurrent_map(
+            lambda chunk: self.actions(
+                segment=segment,
+                from_date=chunk[0],
+                to_date=chunk[1],
+                by_date=by_date,
+                scripcode=scripcode,
+                sector=sector,
+                purpose_code=purpose_code,
+            ),
+            chunks,
+        )
+
+        unique = {}
+
+        for table in tables:
+            for row in table:
+                key = (row["scrip_code"], row["Purpose"], row["exdate"], row["RD_Date"])
+                unique.setdefault(key, row)
+
+        field = "RD_Date" if by_date == "record" else "BCRD_FROM"
+
+        def sort_key(row):
+            if by_date == "ex":
+                return row["exdate"] or "99999999", row["scrip_code"]
+
+            return BSE.__parseDate(row[field]), row["scrip_code"]
+
+        return sorted(unique.values(), key=sort_key)
+
+    def resultCalendarRange(
+        self,
+        from_date: date,
+        to_date: date,
+        scripcode: str | None = None,
+        chunk_size: int = 30,
+    ) -> List[dict]:
+        """
+        .. versionadded:: 3.2.0
+
+        Corporate result calendar for a long date range.
+
+        The range is split into chunks of ``chunk_size`` days, which are fetched concurrently
+        within the throttle limits.
+
+        :param from_date: From date.
+        :type from_date: datetime.date
+        :param to_date: To date.
+        :type to_date: datetime.date
+        :param scripcode: (Optional). Limit result to stock symbol
+        :type scripcode: str
+        :param chunk_size: Default 30. Number of days per request.
+        :type chunk_size: int
+        :raise ValueError: if ``from_date`` is greater than ``to_date``
+        :raise TimeoutError: if request timed out with no response
+        :raise ConnectionError: in case of HTTP error or server returns error response.
+        :return: List of Corporate results de-duplicated by scrip code and meeting date.
+            Sorted by meeting date and scrip code. Same format as :meth:`.resultCalendar`
+        :rtype: list[dict]
+        """
+
+        chunks = BSE.__chunks(from_date, to_date, chunk_size)
+
+        tables = concurrent_map(
+            lambda chunk: self.resultCalendar(
+                from_date=chunk[0], to_date=chunk[1], scripcode=scripcode
+            ),
+            chunks,
+        )
+
+        unique = {}
+
+        for table in tables:
+            for row in table:
+                unique.setdefault((row["scrip_Code"], row["meeting_date"]), row)
+
+        return sorted(
+            unique.values(),
+            key=lambda row: (BSE.__parseDate(row["meeting_date"]), row["scrip_Code"]),
+        )
 
     def advanceDecline(self) -> List[dict]:
         """
@@ -468,11 +1029,7 @@ class BSE:
 
         url = f"{self.api_url}/advanceDecline/w"
 
-        th.check()
-
-        response = self.__req(url, {"val": "Index"})
-
-        return response.json()
+        return self.__get(url, {"val": "Index"})
 
     def gainers(
         self,
@@ -539,7 +1096,7 @@ class BSE:
 
         url = f"{self.api_url}/MktRGainerLoserData/w"
 
-        return self.__req(url, params=params).json()["Table"]
+        return self.__get(url, params=params)["Table"]
 
     def losers(
         self,
@@ -608,7 +1165,113 @@ class BSE:
 
         url = f"{self.api_url}/MktRGainerLoserData/w"
 
-        return self.__req(url, params=params).json()["Table"]
+        return self.__get(url, params=params)["Table"]
+
+    def __movers(
+        self,
+        fn,
+        by: Literal["group", "index"],
+        names: Optional[Iterable[str]],
+        pct_change: str,
+    ) -> List[dict]:
+        """Call gainers or losers concurrently for each group or index.
+        Return rows de-duplicated by scrip code."""
+
+        if by not in ("group", "index"):
+            raise ValueError("'by' must be one of 'group' or 'index'")
+
+        if names is None:
+            names = self.valid_groups if by == "group" else BSE.__indices()
+
+        tables = concurrent_map(
+            lambda name: fn(by=by, name=name, pct_change=pct_change), names
+        )
+
+        unique = {}
+
+        for table in tables:
+            for row in table:
+                unique.setdefault(row["scrip_cd"], row)
+
+        return list(unique.values())
+
+    @staticmethod
+    def __indices() -> List[str]:
+        """All index names from bse.constants.INDEX"""
+
+        return [v for k, v in vars(INDEX).items() if not k.startswith("_")]
+
+    def topGainers(
+        self,
+        n: int = 25,
+        by: Literal["group", "index"] = "group",
+        names: Optional[Iterable[str]] = None,
+        pct_change: Literal["all", "10", "5", "2", "0"] = "all",
+    ) -> List[dict]:
+        """
+        .. versionadded:: 3.2.0
+
+        Market wide top gainers across several stock groups or indices.
+
+        :param n: Default 25. Number of stocks to return.
+        :type n: int
+        :param by: Default ``group``. One of ``group`` or ``index``.
+        :type by: str
+        :param names: (Optional). Stock group names or Market index names.
+            Defaults to all groups in ``BSE.valid_groups`` or all indices in ``bse.constants.INDEX``.
+        :type names: Iterable[str] or None
+        :param pct_change: Default ``all``. Filter stocks by percent change. See :meth:`.gainers`
+        :type pct_change: str
+        :raise ValueError: if ``by`` is not ``group`` or ``index`` or a ``name`` is not a valid BSE stock group.
+        :raise TimeoutError: if request timed out with no response
+        :raise ConnectionError: in case of HTTP error or server returns error response.
+        :return: Top ``n`` gainers sorted by percent change in descending order.
+            Same format as :meth:`.gainers`
+        :rtype: list[dict]
+
+        Groups or indices are fetched concurrently within the throttle limits.
+        Stocks appearing in more than one group or index are returned once.
+        """
+
+        rows = self.__movers(self.gainers, by, names, pct_change)
+
+        return heapq.nlargest(n, rows, key=lambda row: row["change_percent"])
+
+    def topLosers(
+        self,
+        n: int = 25,
+        by: Literal["group", "index"] = "group",
+        names: Optional[Iterable[str]] = None,
+        pct_change: Literal["all", "10", "5", "2", "0"] = "all",
+    ) -> List[dict]:
+        """
+        .. versionadded:: 3.2.0
+
+        Market wide top losers across several stock groups or indices.
+
+        :param n: Default 25. Number of stocks to return.
+        :type n: int
+        :param by: Default ``group``. One of ``group`` or ``index``.
+        :type by: str
+        :param names: (Optional). Stock group names or Market index names.
+            Defaults to all groups in ``BSE.valid_groups`` or all indices in ``bse.constants.INDEX``.
+        :type names: Iterable[str] or None
+        :param pct_change: Default ``all``. Filter stocks by percent change. See :meth:`.losers`
+        :type pct_change: str
+        :raise ValueError: if ``by`` is not ``group`` or ``index`` or a ``name`` is not a valid BSE stock group.
+        :raise TimeoutError: if request timed out with no response
+        :raise ConnectionError: in case of HTTP error or server returns error response.
+        :return: Top ``n`` losers sorted by percent change in ascending order.
+            Same format as :meth:`.losers`
+        :rtype: list[dict]
+
+        Groups or indices are fetched concurrently within the throttle limits.
+        Stocks appearing in more than one group or index are returned once.
+        """
+
+        rows = self.__movers(self.losers, by, names, pct_change)
+
+        return heapq.nsmallest(n, rows, key=lambda row: row["change_percent"])
 
     def near52WeekHighLow(
         self,
@@ -668,11 +1331,7 @@ class BSE:
             else:
                 params["indexcode"] = name
 
-        th.check()
-
-        response = self.__req(url, params)
-
-        data = response.json()
+        data = self.__get(url, params)
 
         if "Table" in data:
             data["highs"] = data.pop("Table")
@@ -682,6 +1341,50 @@ class BSE:
 
         return data
 
+    def near52WeekHighLowSweep(
+        self, names: Optional[Iterable[str]] = None
+    ) -> Dict[str, List[dict]]:
+        """
+        .. versionadded:: 3.2.0
+
+        Get stocks near 52 week highs and lows across several market indices.
+
+        :param names: (Optional). Market index names. Defaults to all indices in ``bse.constants.INDEX``.
+        :type names: Iterable[str] or None
+        :raise TimeoutError: if request timed out with no response
+        :raise ConnectionError: in case of HTTP error or server returns error response.
+        :return: Stocks near 52 week high and lows. Same format as :meth:`.near52WeekHighLow`
+        :rtype: dict[str, list[dict]]
+
+        Indices are fetched concurrently within the throttle limits.
+
+        The result is a dictionary with keys ``highs`` and ``lows``. Each stock appears once
+        in each list, with an additional key ``indices``, a list of index names it was listed under.
+        """
+
+        if names is None:
+            names = BSE.__indices()
+
+        names = list(names)
+
+        results = concurrent_map(
+            lambda name: self.near52WeekHighLow(by="index", name=name), names
+        )
+
+        merged: Dict[str, Dict[int, dict]] = {"highs": {}, "lows": {}}
+
+        for name, data in zip(names, results):
+            for key, rows in merged.items():
+                for row in data.get(key, []):
+                    code = row["SCRIP_CD"]
+
+                    if code not in rows:
+                        rows[code] = dict(row, indices=[])
+
+                    rows[code]["indices"].append(name)
+
+        return {key: list(rows.values()) for key, rows in merged.items()}
+
     def quote(self, scripcode) -> Dict[str, float]:
         """
         Get OHLC quotes for given scripcode
@@ -700,9 +1403,7 @@ class BSE:
             "scripcode": scripcode,
         }
 
-        th.check()
-
-        response = self.__req(url, params).json()["Header"]
+        response = self.__get(url, params)["Header"]
 
         fields = ("PrevClose", "Open", "High", "Low", "LTP")
 
@@ -713,6 +1414,43 @@ class BSE:
 
         return data
 
+    def stream_quotes(
+        self,
+        scripcodes: Iterable[str],
+        interval: float | Dict[str, float] = 1,
+        priority: Optional[Dict[str, int]] = None,
+    ) -> Iterator[dict]:
+        """
+        .. versionadded:: 3.2.0
+
+        Continuously poll OHLC quotes for ``scripcodes`` and yield only the values that changed.
+
+        :param scripcodes: List of BSE scrip codes
+        :type scripcodes: Iterable[str]
+        :param interval: Default 1. Minimum seconds between polls of a scrip.
+            Pass a dictionary of scripcode to seconds, to set interval per scrip.
+        :type interval: float or dict[str, float]
+        :param priority: (Optional) Dictionary of scripcode to an integer priority.
+            Lower values are polled first when the throttle limit is reached, as with :func:`bse.priority`. Default 0.
+            Scrips with higher values are polled less often but not starved. See :class:`bse.streamer.QuoteScheduler`.
+        :type priority: dict[str, int] or None
+        :return: A generator yielding a dictionary with keys ``scripcode``,
+            ``time``, ``changed`` (fields that changed since last poll) and ``quote``.
+        :rtype: Iterator[dict]
+
+        Scrips are polled round robin within the throttle limits. Requests that
+        time out or fail are retried with a backoff.
+
+        The first poll of every scrip yields all fields. Break out of the loop to stop streaming.
+
+        .. code-block:: python
+
+            for event in bse.stream_quotes(["500180", "532540"], interval=5):
+                print(event["scripcode"], event["changed"])
+        """
+
+        return stream_quotes(self, scripcodes, interval=interval, priority=priority)
+
     def quoteWeeklyHL(self, scripcode) -> dict:
         """
         Get 52 week and monthly high & low data for given stock.
@@ -727,9 +1465,7 @@ class BSE:
 
         params = {"Type": "EQ", "flag": "C", "scripcode": scripcode}
 
-        th.check()
-
-        data = self.__req(f"{self.api_url}/HighLow/w", params=params).json()
+        data = self.__get(f"{self.api_url}/HighLow/w", params=params)
 
         wHigh, wLow = data["WeekHighLow"].split(" / ")
         mHigh, mLow = data["MonthHighLow"].split(" / ")
@@ -752,7 +1488,8 @@ class BSE:
         group: str = "A",
         segment: str = "Equity",
         status: str = "Active",
-    ) -> List[dict]:
+        stream: bool = False,
+    ) -> List[dict] | Iterator[dict]:
         """
         List all securities and their meta info like symbol code, ISIN code, industry, market cap, segment, group etc.
 
@@ -764,6 +1501,8 @@ class BSE:
         :type group: str
         :param segment: Default 'Equity'. One of ``equity``, ``mf``, ``Preference Shares``, ``Debentures and Bonds``, ``Equity - Institutional Series``, ``Commercial Papers``
         :param status: Default 'Active'. One of ``active``, ``suspended``, or ``delisted``
+        :param stream: Default False. If True, return an iterator of securities parsed as the response is received.
+        :type stream: bool
         :raise ValueError: if ``group`` is not a valid BSE stock group
         :raise TimeoutError: if request timed out with no response
         :raise ConnectionError: in case of HTTP error or server returns error response.
@@ -799,11 +1538,10 @@ class BSE:
 
             params["Group"] = group
 
-        th.check()
-
-        response = self.__req(url, params)
+        if stream:
+            return self.__rows(url, params)
 
-        return response.json()
+        return self.__get(url, params)
 
     def lookup(self, text: str) -> Optional[dict]:
         """
@@ -889,12 +1627,15 @@ class BSE:
         :type dt: datetime.date
         :returns: A dictionary where each key is an index name,
          and each value is a list of dictionaries containing index data.
+         Empty dictionary if ``dt`` is not a trading day.
         :rtype: Dict[str, List[Dict]]
         """
-        th.check()
+        if not self.calendar.is_trading_day(dt):
+            return {}
+
         dt_str = dt.strftime("%d/%m/%Y")
 
-        return self.__req(
+        data = self.__get(
             f"{self.api_url}/IndexArchDailyAll/w",
             params=dict(
                 fmdt=dt_str,
@@ -902,7 +1643,14 @@ class BSE:
                 index="All",
                 period="D",
             ),
-        ).json()
+        )
+
+        if any(data.values()):
+            self.calendar.add_trading_day(dt)
+        else:
+            self.calendar.add_holiday(dt)
+
+        return data
 
     def fetchHistoricalIndexData(
         self,
@@ -911,6 +1659,7 @@ class BSE:
         to_date: date,
         period: Literal["D", "M", "Y"] = "D",
         folder: str | Path | None = None,
+        compress: Compression = None,
     ) -> Optional[Path]:
         """
         Download historical data for the specified index for the given date range.
@@ -934,35 +1683,48 @@ class BSE:
         :type period: Literal["D", "M", "Y"]
         :param folder: Optional dir/folder to save the file to
         :type folder: str or pathlib.Path or None
+        :param compress: (Optional) One of ``gzip`` or ``zstd``. Compress the file while downloading.
+            Use :func:`bse.compression.open_report` to read it.
+        :type compress: str or None
 
         :return: None if file is empty else filepath of the downloaded file.
         :rtype: Optional[pathlib.Path]
         :raises ValueError: if `from_date` is greater than `to_date`
+
+        If ``to_date`` is in the past and the file was downloaded before, it is not downloaded again.
         """
         if to_date < from_date:
             raise ValueError("`to_date` must be greater than `from_date`")
 
-        th.check()
-
         folder = BSE.__getPath(folder, isFolder=True) if folder else self.dir
         fname = f"{index}_{from_date:%d%m%Y}_{to_date:%d%m%Y}.csv"
+        url = f"{self.api_url}/ProduceCSVForDate/w"
+
+        params = dict(
+            strIndex=index,
+            dtFromDate=from_date.strftime("%d/%m/%Y"),
+            dtToDate=to_date.strftime("%d/%m/%Y"),
+            period=period,
+        )
+
+        # Data for a range ending today or later may still change
+        if to_date < date.today():
+            cached = self.__cached(url, folder, params, compress)
+
+            if cached:
+                return cached
 
         fpath = self.__download(
-            f"{self.api_url}/ProduceCSVForDate/w",
-            params=dict(
-                strIndex=index,
-                dtFromDate=from_date.strftime("%d/%m/%Y"),
-                dtToDate=to_date.strftime("%d/%m/%Y"),
-                period=period,
-            ),
-            fname=fname,
-            folder=folder,
+            url, params=params, fname=fname, folder=folder, compress=compress
         )
 
-        if fpath.stat().st_size:
-            return fpath
-        else:
+        with open_report(fpath, mode="rb") as f:
+            is_empty = not f.read(1)
+
+        if is_empty:
             fpath.unlink()
+        else:
+            return fpath
 
     def fetchIndexNames(self) -> Dict[str, List[Dict]]:
         """
@@ -973,11 +1735,7 @@ class BSE:
 
         url = f"{self.api_url}/FillddlIndex/w?fmdt=&todt="
 
-        th.check()
-
-        response = self.__req(url)
-
-        return response.json()
+        return self.__get(url)
 
     def fetchIndexReportMetadata(self) -> Dict[str, List[Dict]]:
         """
@@ -991,9 +1749,9 @@ class BSE:
 
         Reference: https://www.bseindia.com/indices/IndexArchiveData.html
         """
-        th.check()
+        url = f"{self.api_url}/Indexarchive_filedownload/w"
 
-        return self.__req(f"{self.api_url}/Indexarchive_filedownload/w").json()
+        return self.__get(url)
 
     @staticmethod
     def split_date_range(
@@ -1,2 +1,3 @@
-from .BSE import BSE, SymbolParser
+from .BSE import BSE, SymbolParser, set_limiter
+from .scheduler import priority
 from .constants import *
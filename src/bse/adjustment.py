@@ -0,0 +1,377 @@
+"""Corporate action adjustments for raw price and volume history"""
+
+from __future__ import annotations
+
+import json
+import re
+from bisect import bisect_right
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set, Tuple
+
+from .filestate import write_json
+
+if TYPE_CHECKING:
+    from .BSE import BSE
+
+# 'Bonus issue 3:2'
+bonus_regex = re.compile(r"bonus[^\d]*(\d+(?:\.\d+)?)\s*:\s*(\d+(?:\.\d+)?)")
+
+# 'Stock  Split From Rs.10/- to Rs.2/-' or 'Consolidation of Shares From Rs.1/- to Rs.10/-'
+split_regex = re.compile(r"from\s+rs\.?\s*(\d+(?:\.\d+)?).*?to\s+rs\.?\s*(\d+(?:\.\d+)?)")
+
+# 'Interim Dividend - Rs. - 18.0000'
+dividend_regex = re.compile(r"dividend\s*-\s*rs\.?\s*-?\s*(\d+(?:\.\d+)?)")
+
+
+def parse_purpose(purpose: str) -> Optional[Tuple[str, float]]:
+    """
+    Parse the ``Purpose`` field of a corporate action
+
+    :param purpose: Purpose string as returned by :meth:`bse.BSE.actions`
+    :type purpose: str
+    :return: None if the action does not affect prices, else a tuple of
+     action type (``bonus``, ``split`` or ``dividend``) and its value.
+    :rtype: Optional[tuple[str, float]]
+
+    - ``bonus``: Price factor. ``Bonus issue 1:1`` returns ``0.5``
+    - ``split``: Price factor. ``Stock Split From Rs.10/- to Rs.2/-`` returns ``0.2``
+    - ``dividend``: Dividend amount per share in Rupees.
+    """
+
+    text = purpose.lower()
+
+    match = bonus_regex.search(text)
+
+    if match:
+        bonus, held = float(match.group(1)), float(match.group(2))
+
+        if bonus == 0 or held == 0:
+            return None
+
+        return "bonus", held / (bonus + held)
+
+    if "split" in text or "consolidation" in text:
+        match = split_regex.search(text)
+
+        if match:
+            old_fv, new_fv = float(match.group(1)), float(match.group(2))
+
+            if old_fv == 0 or new_fv == 0 or old_fv == new_fv:
+                return None
+
+            return "split", new_fv / old_fv
+
+    amount = sum(float(m) for m in dividend_regex.findall(text))
+
+    if amount:
+        return "dividend", amount
+
+    return None
+
+
+class ActionAdjuster:
+    """
+    Fetch and cache corporate actions per scrip and compute cumulative
+    adjustment factors to back-adjust raw price and volume history.
+
+    :param bse: An instance of BSE used to fetch corporate actions
+    :type bse: bse.BSE
+    :param folder: (Optional) Dir/folder to cache actions.
+        Defaults to ``actions`` folder within ``BSE.dir``
+    :type folder: str or pathlib.Path or None
+
+    History passed to :meth:`.adjust` is a dictionary of scripcode to a
+    dictionary of columns. Each column is a list of equal length.
+
+    .. code-block:: python
+
+        {
+            "500180": {
+                "date": [date(2023, 10, 20), ...],
+                "open": [...], "high": [...], "low": [...], "close": [...],
+                "volume": [...],
+            }
+        }
+
+    Dividends are adjusted using the close price prior to ex-date, so a
+    ``close`` column is required to adjust for dividends.
+    """
+
+    price_fields = ("open", "high", "low", "close")
+    volume_fields = ("volume",)
+
+    def __init__(self, bse: "BSE", folder: str | Path | None = None):
+        self.bse = bse
+        self.folder = Path(folder) if folder else bse.dir / "actions"
+
+        if self.folder.is_file():
+            raise ValueError(f"{self.folder}: must be a folder")
+
+        self.folder.mkdir(parents=True, exist_ok=True)
+
+        self.state_file = self.folder / "state.json"
+
+        # scripcode -> list of actions sorted by exdate
+        self.actions: Dict[str, List[dict]] = {}
+
+        self.last_updated: Optional[date] = None
+
+        if self.state_file.exists():
+            state = json.loads(self.state_file.read_text())
+
+            if state.get("last_updated"):
+                self.last_updated = date.fromisoformat(state["last_updated"])
+
+    def get(self, scripcode: str) -> List[dict]:
+        """
+        Return cached actions for ``scripcode`` sorted by ex-date.
+        Loads from disk if available.
+
+        :param scripcode: BSE scrip code
+        :type scripcode: str
+        :return: List of actions. Empty list if none are cached.
+        :rtype: list[dict]
+        """
+        scripcode = str(scripcode)
+
+        if scripcode not in self.actions:
+            file = self.folder / f"{scripcode}.json"
+
+            self.actions[scripcode] = (
+                json.loads(file.read_text()) if file.exists() else []
+            )
+
+        return self.actions[scripcode]
+
+    def fetch(
+        self,
+        scripcode: str,
+        from_date: datetime | None = None,
+        to_date: datetime | None = None,
+    ) -> List[dict]:
+        """
+        Fetch actions for a scrip from BSE, merge them with the cache and
+        save to disk.
+
+        :param scripcode: BSE scrip code
+        :type scripcode: str
+        :param from_date: (Optional). Defaults to 1st Jan 2000
+        :type from_date: datetime.datetime or None
+        :param to_date: (Optional). Defaults to ``datetime.datetime.now()``
+        :type to_date: datetime.datetime or None
+        :raise TimeoutError: if request timed out with no response
+        :raise ConnectionError: in case of HTTP error or server returns error response.
+        :return: All cached actions for the scrip sorted by ex-date.
+        :rtype: list[dict]
+        """
+        if from_date is None:
+            from_date = datetime(2000, 1, 1)
+
+        if to_date is None:
+            to_date = datetime.now()
+
+        records = self.bse.actions(
+            from_date=from_date, to_date=to_date, scripcode=str(scripcode)
+        )
+
+        self._merge(records)
+
+        return self.get(scripcode)
+
+    def update(self, to_date: datetime | None = None) -> Set[str]:
+        """
+        Fetch market wide actions since the last update and merge them
+        into the per scrip cache.
+
+        On first run, only forthcoming actions are fetched. Use :meth:`.fetch` to load
+        the history of a scrip.
+
+        :param to_date: (Optional). Defaults to ``datetime.datetime.now()``
+        :type to_date: datetime.datetime or None
+        :raise TimeoutError: if request timed out with no response
+        :raise ConnectionError: in case of HTTP error or server returns error response.
+        :return: Scripcodes with new actions. Only these scrips need to be readjusted.
+        :rtype: set[str]
+        """
+        if to_date is None:
+            to_date = datetime.now()
+
+        if self.last_updated:
+            # Overlap by a day to pick up late updates for the last date
+            from_date = datetime.combine(
+                self.last_updated - timedelta(1), datetime.min.time()
+            )
+            records = self.bse.actions(from_date=from_date, to_date=to_date)
+        else:
+            records = self.bse.actions()
+
+        changed = self._merge(records)
+
+        self.last_updated = to_date.date()
+
+        write_json(self.state_file, {"last_updated": self.last_updated.isoformat()})
+
+        return changed
+
+    def _merge(self, records: Iterable[dict]) -> Set[str]:
+        """Merge records into the cache. Return scripcodes with new actions"""
+
+        grouped: Dict[str, List[dict]] = {}
+
+        for record in records:
+            if not record.get("exdate") or parse_purpose(record["Purpose"]) is None:
+                continue
+
+            grouped.setdefault(str(record["scrip_code"]), []).append(record)
+
+        changed = set()
+
+        for scripcode, new in grouped.items():
+            cached = self.get(scripcode)
+            keys = {(a["exdate"], a["Purpose"]) for a in cached}
+
+            added = [a for a in new if (a["exdate"], a["Purpose"]) not in keys]
+
+            if not added:
+                continue
+
+            # Duplicates within the same response
+            unique = {(a["exdate"], a["Purpose"]): a for a in added}
+
+            cached.extend(unique.values())
+            cached.sort(key=lambda a: a["exdate"])
+
+            write_json(self.folder / f"{scripcode}.json", cached)
+
+            changed.add(scripcode)
+
+        return changed
+
+    def factors(self, scripcode: str) -> List[Tuple[date, str, float]]:
+        """
+        Adjustment events for a scrip sorted by ex-date
+
+        :param scripcode: BSE scrip code
+        :type scripcode: str
+        :return: List of tuples of ex-date, action type and value. See :func:`parse_purpose`
+        :rtype: list[tuple[datetime.date, str, float]]
+        """
+        events = []
+
+        for action in self.get(scripcode):
+            parsed = parse_purpose(action["Purpose"])
+
+            if parsed:
+                ex_date = datetime.strptime(action["exdate"], "%Y%m%d").date()
+                events.append((ex_date, *parsed))
+
+        return events
+
+    def cumulative_factors(
+        self, scripcode: str, dates: List[date], close: Optional[List[float]] = None
+    ) -> Tuple[List[float], List[float]]:
+        """
+        Cumulative price and volume adjustment factors for each date in ``dates``
+
+        :param scripcode: BSE scrip code
+        :type scripcode: str
+        :param dates: Sorted list of trading dates
+        :type dates: list[datetime.date]
+        :param close: (Optional) Unadjusted close prices for ``dates``.
+            Dividends are ignored if not provided.
+        :type close: list[float] or None
+        :return: Tuple of price factors and volume factors
+        :rtype: tuple[list[float], list[float]]
+        """
+        n = len(dates)
+        price = [1.0] * n
+        volume = [1.0] * n
+
+        # Walk actions from latest to oldest, multiplying factors into every
+        # date before the ex-date.
+        p_factor = v_factor = 1.0
+        end = n
+
+        for ex_date, kind, value in reversed(self.factors(scripcode)):
+            idx = bisect_right(dates, ex_date - timedelta(1))
+
+            # Fill dates between this ex-date and the previous (later) one
+            for i in range(idx, end):
+                price[i] = p_factor
+                volume[i] = v_factor
+
+            end = idx
+
+            if idx == 0:
+                # Ex-date is before the start of history
+                continue
+
+            if kind == "dividend":
+                if close is None:
+                    continue
+
+                prev_close = close[idx - 1]
+
+                if prev_close <= value:
+                    continue
+
+                p_factor *= (prev_close - value) / prev_close
+            else:
+                p_factor *= value
+                v_factor /= value
+
+        for i in range(0, end):
+            price[i] = p_factor
+            volume[i] = v_factor
+
+        return price, volume
+
+    def adjust(
+        self,
+        history: Dict[str, Dict[str, list]],
+        scripcodes: Optional[Iterable[str]] = None,
+    ) -> Dict[str, Dict[str, list]]:
+        """
+        Back-adjust price and volume history for corporate actions.
+
+        :param history: Dictionary of scripcode to columns. See :class:`ActionAdjuster`
+        :type history: dict[str, dict[str, list]]
+        :param scripcodes: (Optional) Only adjust these scrips. Rest are returned as is.
+            Pass the return value of :meth:`.update` to readjust incrementally.
+        :type scripcodes: Iterable[str] or None
+        :return: A new dictionary with adjusted columns. ``history`` is not modified.
+        :rtype: dict[str, dict[str, list]]
+        """
+        selected = set(map(str, scripcodes)) if scripcodes is not None else None
+
+        result = {}
+
+        for scripcode, columns in history.items():
+            if (selected is not None and str(scripcode) not in selected) or not self.get(
+                scripcode
+            ):
+                result[scripcode] = columns
+                continue
+
+            price, volume = self.cumulative_factors(
+                scripcode, columns["date"], columns.get("close")
+            )
+
+            adjusted = dict(columns)
+
+            for field in self.price_fields:
+                if field in columns:
+                    adjusted[field] = [
+                        round(v * f, 2) for v, f in zip(columns[field], price)
+                    ]
+
+            for field in self.volume_fields:
+                if field in columns:
+                    adjusted[field] = [
+                        round(v * f) for v, f in zip(columns[field], volume)
+                    ]
+
+            result[scripcode] = adjusted
+
+        return result
@@ -0,0 +1,359 @@
+"""Record market breadth from ``advanceDecline`` and maintain breadth indicators"""
+
+from __future__ import annotations
+
+import json
+import struct
+from datetime import date, datetime, timedelta
+from datetime import time as dt_time
+from pathlib import Path
+from time import sleep, time
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+from .filestate import write_json
+
+if TYPE_CHECKING:
+    from .BSE import BSE
+
+
+class BreadthStore:
+    """
+    Append only store of advance, decline and unchanged counts per index.
+
+    Each record is 16 bytes: timestamp, index id, advances, declines, unchanged.
+    Records are in the order they were recorded, which is time order.
+    Index names are stored in a JSON file alongside.
+
+    :param path: File path of the store
+    :type path: str or pathlib.Path
+    """
+
+    record = struct.Struct("<dHHHH")
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.meta_file = self.path.with_suffix(".json")
+
+        self.meta: dict = {"indices": [], "state": {}}
+
+        if self.meta_file.exists():
+            self.meta = json.loads(self.meta_file.read_text())
+
+        self.ids = {name: i for i, name in enumerate(self.meta["indices"])}
+
+    def index_id(self, name: str) -> int:
+        if name not in self.ids:
+            self.ids[name] = len(self.meta["indices"])
+            self.meta["indices"].append(name)
+
+        return self.ids[name]
+
+    def save_meta(self):
+        write_json(self.meta_file, self.meta)
+
+    def append(self, ts: float, rows: List[Tuple[str, int, int, int]]):
+        """
+        Append a snapshot of counts to the store
+
+        :param ts: Unix timestamp of the snapshot
+        :type ts: float
+        :param rows: List of tuples of index name, advances, declines and unchanged
+        :type rows: list[tuple[str, int, int, int]]
+        """
+        n = len(self.meta["indices"])
+
+        data = b"".join(
+            self.record.pack(ts, self.index_id(name), up, dn, uc)
+            for name, up, dn, uc in rows
+        )
+
+        # Save new index names before records referring to them
+        if len(self.meta["indices"]) > n:
+            self.save_meta()
+
+        with self.path.open("ab") as f:
+            f.write(data)
+
+    def read(
+        self, index: Optional[str] = None, since: Optional[float] = None
+    ) -> Iterator[Tuple[float, str, int, int, int]]:
+        """
+        Iterate over stored records
+
+        :param index: (Optional) Return only records of this index
+        :type index: str or None
+        :param since: (Optional) Return only records on or after this Unix timestamp
+        :type since: float or None
+        :return: Tuples of timestamp, index name, advances, declines and unchanged
+        :rtype: Iterator[tuple[float, str, int, int, int]]
+        """
+        if not self.path.exists():
+            return
+
+        idx = self.ids.get(index) if index else None
+
+        if index and idx is None:
+            return
+
+        names = self.meta["indices"]
+
+        with self.path.open("rb") as f:
+            while True:
+                chunk = f.read(self.record.size * 4096)
+
+                if not chunk:
+                    break
+
+                for ts, i, up, dn, uc in self.record.iter_unpack(chunk):
+                    if (idx is None or i == idx) and (since is None or ts >= since):
+                        yield ts, names[i], up, dn, uc
+
+
+class BreadthIndicators:
+    """
+    Breadth indicators of an index updated incrementally with each snapshot.
+
+    - ``ad_line``: Cumulative sum of advances minus declines
+    - ``ad_ratio``: Advances divided by declines
+    - ``rana``: Ratio adjusted net advances. (advances - declines) / (advances + declines) * 1000
+    - ``ema_fast``, ``ema_slow``: 19 and 39 period EMA of ``rana``
+    - ``oscillator``: McClellan oscillator. ``ema_fast`` - ``ema_slow``
+    - ``summation``: McClellan summation index. Cumulative sum of ``oscillator``
+
+    The indicators are daily. ``advanceDecline`` returns running totals for the
+    session, so snapshots passed with the same ``day`` are provisional: each
+    replaces the values of that day. A day is committed when a snapshot for a
+    later day is received.
+
+    :param state: (Optional) State from :meth:`.to_dict` to resume from
+    :type state: dict or None
+    """
+
+    fast_period = 19
+    slow_period = 39
+
+    fields = (
+        "count",
+        "ad_line",
+        "ad_ratio",
+        "rana",
+        "ema_fast",
+        "ema_slow",
+        "oscillator",
+        "summation",
+    )
+
+    def __init__(self, state: Optional[dict] = None):
+        self.count = 0
+        self.ad_line = 0
+        self.ad_ratio = 0.0
+        self.rana = 0.0
+        self.ema_fast = 0.0
+        self.ema_slow = 0.0
+        self.oscillator = 0.0
+        self.summation = 0.0
+
+        # Day of the current values and the committed values of the day before
+        self.day: Optional[str] = None
+        self.committed = self.to_dict()
+
+        if state:
+            for field in self.fields:
+                setattr(self, field, state[field])
+
+            self.day = state.get("day")
+            self.committed = state.get("committed", self.to_dict())
+
+    @staticmethod
+    def _ema(prev: float, value: float, period: int) -> float:
+        alpha = 2 / (period + 1)
+        return prev + alpha * (value - prev)
+
+    def update(self, up: int, dn: int, uc: int = 0, day: Optional[str] = None) -> dict:
+        """
+        Update indicators with a new snapshot
+
+        :param up: Number of advances
+        :type up: int
+        :param dn: Number of declines
+        :type dn: int
+        :param uc: Number of unchanged
+        :type uc: int
+        :param day: (Optional) Trading date of the snapshot ex. ``2023-10-20``.
+            A snapshot with the same ``day`` as the last replaces its values.
+            If not specified, every snapshot is a new day.
+        :type day: str or None
+        :return: Current values of the indicators
+        :rtype: dict
+        """
+        if day is None or day != self.day:
+            self.committed = {field: getattr(self, field) for field in self.fields}
+
+        prev = self.committed
+
+        self.ad_line = prev["ad_line"] + up - dn
+        self.ad_ratio = 0 if up == 0 else (up if dn == 0 else round(up / dn, 2))
+        self.rana = (up - dn) / (up + dn) * 1000 if up + dn else 0.0
+
+        if prev["count"] == 0:
+            self.ema_fast = self.ema_slow = self.rana
+        else:
+            self.ema_fast = self._ema(prev["ema_fast"], self.rana, self.fast_period)
+            self.ema_slow = self._ema(prev["ema_slow"], self.rana, self.slow_period)
+
+        self.oscillator = self.ema_fast - self.ema_slow
+        self.summation = prev["summation"] + self.oscillator
+        self.count = prev["count"] + 1
+        self.day = day
+
+        return {field: getattr(self, field) for field in self.fields}
+
+    def to_dict(self) -> dict:
+        state = {field: getattr(self, field) for field in self.fields}
+
+        if self.day is not None:
+            state["day"] = self.day
+            state["committed"] = self.committed
+
+        return state
+
+
+class BreadthRecorder:
+    """
+    Poll :meth:`bse.BSE.advanceDecline` and record advance, decline and
+    unchanged counts for every index, while updating breadth indicators.
+
+    :param bse: An instance of BSE
+    :type bse: bse.BSE
+    :param path: (Optional) File path of the store. Defaults to ``breadth.bin`` in ``BSE.dir``
+    :type path: str or pathlib.Path or None
+
+    Indicator state is saved with the store after each snapshot, so a restarted
+    recorder continues without replaying history. Every snapshot is stored, but
+    indicators advance once per trading session. Later snapshots of the same
+    session replace its provisional values.
+
+    Snapshots are keyed by the trading date from ``BSE.calendar``. Before
+    ``session_start``, counts belong to the previous session. Polls on days
+    that are not trading days are skipped without a request.
+
+    .. code-block:: python
+
+        with BSE("./") as bse:
+            recorder = BreadthRecorder(bse)
+
+            for snapshot in recorder.run(interval=300):
+                print(snapshot["S&P BSE SENSEX"]["ad_ratio"])
+    """
+
+    #: Start of the trading session in local time
+    session_start = dt_time(9, 15)
+
+    def __init__(self, bse: "BSE", path: str | Path | None = None):
+        self.bse = bse
+        self.store = BreadthStore(path or bse.dir / "breadth.bin")
+
+        self.indicators: Dict[str, BreadthIndicators] = {
+            name: BreadthIndicators(state)
+            for name, state in self.store.meta["state"].items()
+        }
+
+    def session_date(self, ts: float) -> Optional[date]:
+        """
+        Trading date whose counts ``advanceDecline`` returns at ``ts``
+
+        :param ts: Unix timestamp
+        :type ts: float
+        :return: None if ``ts`` is not on a trading day
+        :rtype: datetime.date or None
+        """
+        calendar = self.bse.calendar
+        now = datetime.fromtimestamp(ts)
+        day = now.date()
+
+        if not calendar.is_trading_day(day):
+            return None
+
+        if now.time() >= self.session_start:
+            return day
+
+        # Before the open, counts are of the previous session
+        for _ in range(30):
+            day -= timedelta(1)
+
+            if calendar.is_trading_day(day):
+                return day
+
+        return None
+
+    def poll(self) -> Dict[str, dict]:
+        """
+        Fetch a snapshot, append it to the store and update indicators.
+
+        :raise TimeoutError: if request timed out with no response
+        :raise ConnectionError: in case of HTTP error or server returns error response.
+        :return: Dictionary of index name to indicator values.
+            Empty if today is not a trading day.
+        :rtype: dict[str, dict]
+        """
+        session = self.session_date(time())
+
+        if session is None:
+            return {}
+
+        data = self.bse.advanceDecline()
+        ts = time()
+        day = session.isoformat()
+
+        rows = [
+            (
+                item["Sens_ind"],
+                int(item["UP"] or 0),
+                int(item["DN"] or 0),
+                int(item["UC"] or 0),
+            )
+            for item in data
+        ]
+
+        self.store.append(ts, rows)
+
+        result = {}
+
+        for name, up, dn, uc in rows:
+            if name not in self.indicators:
+                self.indicators[name] = BreadthIndicators()
+
+            result[name] = self.indicators[name].update(up, dn, uc, day)
+
+        self.store.meta["state"] = {
+            name: ind.to_dict() for name, ind in self.indicators.items()
+        }
+        self.store.save_meta()
+
+        return result
+
+    def run(self, interval: float = 60, count: Optional[int] = None) -> Iterator[Dict[str, dict]]:
+        """
+        Poll every ``interval`` seconds and yield the indicators after each snapshot.
+
+        :param interval: Default 60. Seconds between snapshots
+        :type interval: float
+        :param count: (Optional) Stop after ``count`` snapshots. Runs forever if not specified.
+        :type count: int or None
+        :return: Generator of the return value of :meth:`.poll`
+        :rtype: Iterator[dict[str, dict]]
+        """
+        n = 0
+
+        while count is None or n < count:
+            start = time()
+
+            try:
+                yield self.poll()
+            except (TimeoutError, ConnectionError):
+                pass
+
+            n += 1
+
+            if count is None or n < count:
+                sleep(max(0, interval - (time() - start)))
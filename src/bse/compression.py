@@ -0,0 +1,117 @@
+"""Compressed writers and readers for downloaded reports"""
+
+from __future__ import annotations
+
+import gzip
+import io
+from pathlib import Path
+from typing import IO, Literal, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+Compression = Optional[Literal["gzip", "zstd"]]
+
+suffixes = {"gzip": ".gz", "zstd": ".zst"}
+
+
+def suffix(compress: Compression) -> str:
+    """
+    File suffix for the compression format
+
+    :param compress: One of ``gzip``, ``zstd`` or None
+    :type compress: str or None
+    :raise ValueError: if ``compress`` is not a valid compression format
+    :raise ModuleNotFoundError: if ``compress`` is ``zstd`` and ``zstandard`` is not installed
+    :return: ``.gz``, ``.zst`` or an empty string if ``compress`` is None
+    :rtype: str
+    """
+    if compress is None:
+        return ""
+
+    if compress not in suffixes:
+        raise ValueError(f"{compress}: Not a valid compression. One of gzip or zstd")
+
+    if compress == "zstd" and zstandard is None:
+        raise ModuleNotFoundError(
+            "zstd compression requires zstandard. Run `pip install bse[zstd]`"
+        )
+
+    return suffixes[compress]
+
+
+def open_writer(
+    path: Path, compress: Compression = None, append: bool = False
+) -> IO[bytes]:
+    """
+    Open ``path`` for writing bytes, compressing them if ``compress`` is specified.
+
+    :param path: File path to write
+    :type path: pathlib.Path
+    :param compress: One of ``gzip``, ``zstd`` or None
+    :type compress: str or None
+    :param append: Default False. Append to the file. Compressed data is appended
+        as a new gzip member or zstd frame, which are read as one stream.
+    :type append: bool
+    :return: A writable binary file object
+    :rtype: IO[bytes]
+    """
+    suffix(compress)
+
+    mode = "ab" if append else "wb"
+
+    if compress == "gzip":
+        return gzip.open(path, mode=mode, compresslevel=6)
+
+    if compress == "zstd":
+        return zstandard.ZstdCompressor().stream_writer(path.open(mode=mode))
+
+    return path.open(mode=mode)
+
+
+def open_report(
+    path: str | Path, mode: Literal["rt", "rb"] = "rt", encoding: str = "utf-8"
+) -> IO:
+    """
+    .. versionadded:: 3.2.0
+
+    Open a downloaded report for reading. Reports compressed with gzip (``.gz``)
+    or zstd (``.zst``) are decompressed as they are read.
+
+    :param path: File path of the report
+    :type path: str or pathlib.Path
+    :param mode: Default ``rt``. ``rt`` for text or ``rb`` for bytes.
+    :type mode: str
+    :param encoding: Default ``utf-8``. Text encoding. Used only in text mode.
+    :type encoding: str
+    :raise ModuleNotFoundError: if file is zstd compressed and ``zstandard`` is not installed
+    :return: A file object
+    :rtype: IO
+
+    .. code-block:: python
+
+        import csv
+        from bse.compression import open_report
+
+        with open_report(bse.bhavcopyReport(dt, compress="gzip")) as f:
+            for row in csv.DictReader(f):
+                print(row)
+    """
+    path = Path(path)
+
+    if path.suffix == ".gz":
+        stream = gzip.open(path, mode="rb")
+    elif path.suffix == ".zst":
+        suffix("zstd")
+        stream = zstandard.ZstdDecompressor().stream_reader(
+            path.open(mode="rb"), read_across_frames=True
+        )
+    else:
+        stream = path.open(mode="rb")
+
+    if mode == "rb":
+        return stream
+
+    return io.TextIOWrapper(stream, encoding=encoding, newline="")
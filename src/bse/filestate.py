@@ -0,0 +1,128 @@
+"""JSON state files shared by threads and processes using the same folder"""
+
+from __future__ import annotations
+
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from tempfile import mkstemp
+from typing import Any, Callable, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """
+    Hold an exclusive lock on ``<path>.lock`` for the duration of the block.
+    Excludes other processes and other threads that take the lock.
+
+    :param path: File to guard
+    :type path: pathlib.Path
+    """
+    lock_path = path.with_name(path.name + ".lock")
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o666)
+
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)
+
+
+def read_json(path: Path, default: Any = None) -> Any:
+    """
+    Read a JSON file. Returns ``default`` if the file is missing or corrupt.
+
+    :param path: JSON file
+    :type path: pathlib.Path
+    :param default: Value returned if the file cannot be read
+    """
+    try:
+        return json.loads(path.read_text())
+    except (FileNotFoundError, ValueError):
+        return default
+
+
+def write_json(path: Path, data: Any, mode: int = 0o644):
+    """
+    Atomically replace ``path`` with ``data`` as JSON.
+
+    Data is written to a uniquely named temp file in the same folder, so
+    concurrent writers never share a temp file.
+
+    :param path: JSON file
+    :type path: pathlib.Path
+    :param data: JSON serializable data
+    :param mode: Default 0o644. File permissions
+    :type mode: int
+    """
+    write_bytes(path, json.dumps(data).encode(), mode)
+
+
+def write_bytes(path: Path, data: bytes, mode: int = 0o644):
+    """
+    Atomically replace ``path`` with ``data``. See :func:`write_json`.
+
+    :param path: File to write
+    :type path: pathlib.Path
+    :param data: File contents
+    :type data: bytes
+    :param mode: Default 0o644. File permissions
+    :type mode: int
+    """
+    fd, tmp = mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+
+    try:
+        os.chmod(tmp, mode)
+
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+
+        raise
+
+
+def update_json(
+    path: Path, merge: Callable[[Any], Any], default: Any = None, mode: int = 0o644
+) -> Any:
+    """
+    Read ``path``, pass its data to ``merge`` and write the result, under a file lock.
+    Changes saved by other processes since the file was last read are kept.
+
+    :param path: JSON file
+    :type path: pathlib.Path
+    :param merge: Function of the data on disk returning the data to save
+    :type merge: Callable
+    :param default: Data passed to ``merge`` if the file is missing or corrupt
+    :param mode: Default 0o644. File permissions
+    :type mode: int
+    :return: The data saved
+    """
+    with file_lock(path):
+        data = merge(read_json(path, default))
+        write_json(path, data, mode)
+
+    return data
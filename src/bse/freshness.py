@@ -0,0 +1,302 @@
+"""Download historical index data only when BSE has published new data"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from time import time
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+from .compression import Compression
+from .filestate import read_json, write_json
+from .scheduler import concurrent_map, priority
+
+if TYPE_CHECKING:
+    from .BSE import BSE
+
+date_formats = (
+    "%d/%m/%Y",
+    "%d-%m-%Y",
+    "%d %b %Y",
+    "%d %B %Y",
+    "%d-%b-%Y",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y %I:%M:%S %p",
+    "%d %b %Y %H:%M:%S",
+    "%Y%m%d",
+    # fromisoformat before Python 3.11 rejects fractions of 1, 2, 4 or 5 digits
+    "%Y-%m-%dT%H:%M:%S.%f",
+    "%Y-%m-%d %H:%M:%S.%f",
+)
+
+
+def parse_date(value: Any) -> Optional[date]:
+    """
+    Parse a date in any of the formats used by BSE APIs
+
+    :param value: Value to parse like ``20/10/2023``, ``20 Oct 2023``, ``2023-10-20T18:30:00.95`` or ``20231020``
+    :type value: Any
+    :return: None if ``value`` is not a date
+    :rtype: datetime.date or None
+    """
+    if isinstance(value, datetime):
+        return value.date()
+
+    if isinstance(value, date):
+        return value
+
+    if not isinstance(value, str) or not value.strip():
+        return None
+
+    text = value.strip()
+
+    try:
+        return datetime.fromisoformat(text.replace("Z", "")).date()
+    except ValueError:
+        pass
+
+    for fmt in date_formats:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+
+    return None
+
+
+def _field(data: Any, method: str, field: str) -> List[Any]:
+    """Values of ``field`` in the ``Table`` rows of a response"""
+
+    rows = data.get("Table") if isinstance(data, dict) else None
+
+    if not isinstance(rows, list):
+        raise ValueError(f"{method}: Unexpected response. No 'Table' key")
+
+    values = []
+    name = field.lower()
+
+    for row in rows:
+        key = next((key for key in row if key.lower() == name), None)
+
+        if key is None:
+            raise ValueError(
+                f"{method}: Unexpected response. No '{field}' field in {sorted(row)}"
+            )
+
+        values.append(row[key])
+
+    return values
+
+
+class IndexFreshness:
+    """
+    Track the last date of historical index data downloaded per index and
+    download only indices with new data published by BSE.
+
+    The last updated date of the ``AllIndices`` report from
+    :meth:`bse.BSE.fetchIndexReportMetadata`, a single request, is the published
+    date of every index. Index names from :meth:`bse.BSE.fetchIndexNames` are
+    cached for ``names_ttl`` seconds.
+
+    Response fields are read by name: ``name_field`` of :meth:`bse.BSE.fetchIndexNames`
+    and ``updated_field`` of :meth:`bse.BSE.fetchIndexReportMetadata`. A response
+    without them raises ValueError rather than being guessed at.
+
+    :param bse: An instance of BSE
+    :type bse: bse.BSE
+    :param path: (Optional) JSON file to save state. Defaults to ``index_freshness.json`` in ``BSE.dir``
+    :type path: str or pathlib.Path or None
+    :param names_ttl: Default 7 days. Seconds to cache the list of index names.
+    :type names_ttl: float
+
+    .. code-block:: python
+
+        with BSE("./") as bse:
+            tracker = IndexFreshness(bse)
+
+            # Runs on a timer. Downloads only if new data is published
+            files = tracker.refresh(["S&P BSE SENSEX"], from_date=date(2023, 1, 1))
+    """
+
+    name_field = "Index_Name"
+    report_field = "FileName"
+    report_name = "AllIndices"
+    updated_field = "LastUpdated"
+
+    def __init__(
+        self,
+        bse: "BSE",
+        path: str | Path | None = None,
+        names_ttl: float = 7 * 86400,
+    ):
+        self.bse = bse
+        self.path = Path(path) if path else bse.dir / "index_freshness.json"
+        self.names_ttl = names_ttl
+
+        self.state: dict = {"names": [], "names_fetched": 0, "indices": {}}
+
+        self.state.update(read_json(self.path, {}))
+
+    def __save(self):
+        write_json(self.path, self.state)
+
+    def index_names(self, refresh: bool = False) -> List[str]:
+        """
+        List of index names. Fetched if the cache has expired.
+
+        :param refresh: Default False. Fetch even if the cache has not expired.
+        :type refresh: bool
+        :raise ValueError: if the response has no ``name_field``
+        :raise TimeoutError: if request timed out with no response
+        :raise ConnectionError: in case of HTTP error or server returns error response.
+        :rtype: list[str]
+        """
+        expired = time() - self.state["names_fetched"] > self.names_ttl
+
+        if refresh or expired or not self.state["names"]:
+            names = _field(self.bse.fetchIndexNames(), "fetchIndexNames", self.name_field)
+
+            self.state["names"] = [
+                name.strip() for name in names if isinstance(name, str) and name.strip()
+            ]
+            self.state["names_fetched"] = time()
+            self.__save()
+
+        return self.state["names"]
+
+    def last_downloaded(self, index: str) -> Optional[date]:
+        """
+        Last date of data downloaded for ``index``
+
+        :param index: Index name
+        :type index: str
+        :rtype: datetime.date or None
+        """
+        value = self.state["indices"].get(index)
+
+        return date.fromisoformat(value) if value else None
+
+    def published(self) -> Optional[date]:
+        """
+        Last updated date of the ``AllIndices`` report from :meth:`bse.BSE.fetchIndexReportMetadata`.
+
+        :raise ValueError: if the response has no ``report_field`` or ``updated_field``
+        :raise TimeoutError: if request timed out with no response
+        :raise ConnectionError: in case of HTTP error or server returns error response.
+        :return: None if the report is not listed or its date cannot be parsed
+        :rtype: datetime.date or None
+        """
+        method = "fetchIndexReportMetadata"
+        data = self.bse.fetchIndexReportMetadata()
+
+        reports = _field(data, method, self.report_field)
+        updated = _field(data, method, self.updated_field)
+
+        dates = [
+            parse_date(value)
+            for report, value in zip(reports, updated)
+            if isinstance(report, str) and report.strip() == self.report_name
+        ]
+
+        return max((dt for dt in dates if dt), default=None)
+
+    def stale(self, indices: Iterable[str]) -> Dict[str, date]:
+        """
+        Indices with data published after their last download.
+
+        :param indices: Index names to check
+        :type indices: Iterable[str]
+        :raise TimeoutError: if request timed out with no response
+        :raise ConnectionError: in case of HTTP error or server returns error response.
+        :return: Dictionary of index name to the last published date. Empty if the report date is unknown.
+        :rtype: dict[str, datetime.date]
+        """
+        dt = self.published()
+        result = {}
+
+        if dt is None:
+            return result
+
+        for index in indices:
+            last = self.last_downloaded(index)
+
+            if last is None or last < dt:
+                result[index] = dt
+
+        return result
+
+    def refresh(
+        self,
+        indices: Optional[Iterable[str]] = None,
+        from_date: Optional[date] = None,
+        folder: str | Path | None = None,
+        compress: Compression = None,
+        max_workers: int = 4,
+    ) -> Dict[str, Optional[Path]]:
+        """
+        Download historical data of stale indices since their last download.
+
+        An index downloaded before is fetched from the day after its last download.
+        Requests are made in ``bulk`` priority.
+
+        The last downloaded date advances only for indices whose download returned
+        data. Empty and failed downloads are retried on the next refresh.
+
+        :param indices: (Optional) Index names. Defaults to all names from :meth:`.index_names`
+        :type indices: Iterable[str] or None
+        :param from_date: (Optional) Start date of indices not downloaded before. Defaults to 365 days before the published date.
+        :type from_date: datetime.date or None
+        :param folder: (Optional) Dir/folder to save files. See :meth:`bse.BSE.fetchHistoricalIndexData`
+        :type folder: str or pathlib.Path or None
+        :param compress: (Optional) One of ``gzip`` or ``zstd``
+        :type compress: str or None
+        :param max_workers: Default 4. Maximum number of concurrent downloads.
+        :type max_workers: int
+        :raise TimeoutError: if request timed out with no response
+        :raise ConnectionError: in case of HTTP error or server returns error response.
+            Raised after saving the indices that were downloaded.
+        :return: Dictionary of index name to the downloaded file or None if empty. Only stale indices are included.
+        :rtype: dict[str, pathlib.Path or None]
+        """
+        if indices is None:
+            indices = self.index_names()
+
+        stale = self.stale(indices)
+
+        def download(index: str) -> Tuple[Optional[Path], Optional[Exception]]:
+            to_date = stale[index]
+            last = self.last_downloaded(index)
+
+            if last:
+                start = last + timedelta(1)
+            else:
+                start = from_date or to_date - timedelta(365)
+
+            try:
+                file = self.bse.fetchHistoricalIndexData(
+                    index,
+                    from_date=min(start, to_date),
+                    to_date=to_date,
+                    folder=folder,
+                    compress=compress,
+                )
+            except Exception as e:
+                return None, e
+
+            return file, None
+
+        with priority("bulk"):
+            results = concurrent_map(download, list(stale), max_workers)
+
+        for (index, dt), (file, _) in zip(stale.items(), results):
+            if file is not None:
+                self.state["indices"][index] = dt.isoformat()
+
+        self.__save()
+
+        errors = [error for _, error in results if error]
+
+        if errors:
+            raise errors[0]
+
+        return {index: file for index, (file, _) in zip(stale, results)}
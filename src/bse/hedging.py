@@ -0,0 +1,206 @@
+"""Hedged requests to cut tail latency of idempotent GET requests"""
+
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from threading import Lock
+from time import time
+from typing import Callable, Deque, Dict, List, Optional
+
+
+class Hedging:
+    """
+    .. versionadded:: 3.2.0
+
+    Send a duplicate request when the first has not answered within a percentile
+    of recent latency, and use whichever response arrives first.
+
+    Latency is tracked per endpoint over the last ``window`` requests. Until
+    ``min_samples`` latencies are recorded, ``initial_delay`` is used.
+
+    The duplicate is charged to the rate limiter like any other request. The
+    number of duplicates is capped at ``budget`` times the number of requests,
+    so request volume rises by at most ``budget``.
+
+    :param percentile: Default 95. Percentile of recent latency to wait before hedging
+    :type percentile: float
+    :param window: Default 200. Number of recent latencies tracked per endpoint
+    :type window: int
+    :param min_samples: Default 20. Latencies required before the percentile is used
+    :type min_samples: int
+    :param initial_delay: Default 1. Seconds to wait before hedging with too few samples
+    :type initial_delay: float
+    :param min_delay: Default 0.05. Lower bound of the wait in seconds
+    :type min_delay: float
+    :param budget: Default 0.05. Maximum ratio of duplicate requests to requests
+    :type budget: float
+    :param max_workers: Default 16. Threads sending hedged requests
+    :type max_workers: int
+    :raise ValueError: if ``percentile`` is not between 0 and 100
+
+    Counters ``requests``, ``hedged`` (duplicates sent) and ``won`` (duplicates
+    that answered first) are available as attributes.
+
+    .. code-block:: python
+
+        from bse import BSE
+        from bse.hedging import Hedging
+
+        with BSE("./") as bse:
+            bse.hedging = Hedging()
+
+            bse.quote("500180")
+
+    Only enable hedging for idempotent requests. All API calls made by BSE are
+    GET requests. File downloads are not hedged.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95,
+        window: int = 200,
+        min_samples: int = 20,
+        initial_delay: float = 1,
+        min_delay: float = 0.05,
+        budget: float = 0.05,
+        max_workers: int = 16,
+    ):
+        if not 0 < percentile <= 100:
+            raise ValueError("'percentile' must be greater than 0 and upto 100")
+
+        self.percentile = percentile
+        self.window = window
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.budget = budget
+
+        self.requests = 0
+        self.hedged = 0
+        self.won = 0
+
+        self.latency: Dict[str, Deque[float]] = {}
+        self.lock = Lock()
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix="bse-hedge")
+
+    def observe(self, endpoint: str, seconds: float):
+        """
+        Record the latency of a completed request
+
+        :param endpoint: Request url without query params
+        :type endpoint: str
+        :param seconds: Latency in seconds
+        :type seconds: float
+        """
+        with self.lock:
+            if endpoint not in self.latency:
+                self.latency[endpoint] = deque(maxlen=self.window)
+
+            self.latency[endpoint].append(seconds)
+
+    def delay(self, endpoint: str) -> float:
+        """
+        Seconds to wait for a response from ``endpoint`` before sending a duplicate
+
+        :param endpoint: Request url without query params
+        :type endpoint: str
+        :rtype: float
+        """
+        with self.lock:
+            samples = sorted(self.latency.get(endpoint, ()))
+
+        if len(samples) < self.min_samples:
+            return self.initial_delay
+
+        i = min(len(samples) - 1, int(len(samples) * self.percentile / 100))
+
+        return max(samples[i], self.min_delay)
+
+    def __allow(self) -> bool:
+        with self.lock:
+            if self.hedged >= self.budget * self.requests:
+                return False
+
+            self.hedged += 1
+            return True
+
+    def __send(self, endpoint: str, fn: Callable[[], object]) -> Future:
+        start = time()
+        future = self.executor.submit(fn)
+
+        def done(f: Future):
+            # Slow responses that lost the race are recorded too
+            if f.exception() is None and getattr(f.result(), "ok", False):
+                self.observe(endpoint, time() - start)
+
+        future.add_done_callback(done)
+
+        return future
+
+    def run(
+        self,
+        endpoint: str,
+        fn: Callable[[], object],
+        charge: Callable[[], None],
+    ):
+        """
+        Call ``fn`` and, if it does not return within :meth:`.delay`, call it again
+        and return the first successful result.
+
+        :param endpoint: Request url without query params. Latency is tracked per endpoint
+        :type endpoint: str
+        :param fn: Function sending the request and returning a response
+        :type fn: Callable
+        :param charge: Function called before sending a duplicate. Waits for the rate limiter.
+        :type charge: Callable
+        :return: Response of the first successful request, or of the first request
+            if neither succeeded
+        """
+        with self.lock:
+            self.requests += 1
+
+        futures: List[Future] = [self.__send(endpoint, fn)]
+
+        done, _ = wait(futures, timeout=self.delay(endpoint))
+
+        if not done and self.__allow():
+            charge()
+            futures.append(self.__send(endpoint, fn))
+
+        pending = set(futures)
+        winner: Optional[Future] = None
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+            for f in futures:
+                if f in done and f.exception() is None and f.result().ok:
+                    winner = f
+                    break
+
+            if winner:
+                break
+
+        if winner is None:
+            # Neither request succeeded. Report the outcome of the first
+            winner = futures[0]
+        elif winner is not futures[0]:
+            with self.lock:
+                self.won += 1
+
+        for f in futures:
+            if f is not winner:
+                f.add_done_callback(Hedging.__discard)
+
+        return winner.result()
+
+    @staticmethod
+    def __discard(f: Future):
+        if f.exception() is None:
+            f.result().close()
+
+    def close(self):
+        """Stop the hedging threads. Requests in flight are completed."""
+
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,343 @@
+"""Weekly, monthly and 52 week highs and lows computed locally from bhavcopy reports"""
+
+from __future__ import annotations
+
+import csv
+import json
+from array import array
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from threading import Lock
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from .compression import open_report
+from .filestate import write_bytes, write_json
+from .scheduler import concurrent_map, priority
+from .trading_calendar import as_date
+
+if TYPE_CHECKING:
+    from .BSE import BSE
+
+INF = float("inf")
+
+
+class HighLow:
+    """
+    Compute weekly, monthly and 52 week highs and lows of all scrips from
+    bhavcopy reports, with no network requests.
+
+    Each ingested bhavcopy is stored as arrays of high, low and close prices,
+    one value per scrip, in ``<YYYY-MM-DD>.bin``. Scripcodes are mapped to array
+    positions in ``scrips.json``. Highs and lows are computed across all scrips at
+    once, a day at a time.
+
+    :param bse: (Optional) An instance of BSE. Required only to download bhavcopies with :meth:`.update`
+    :type bse: bse.BSE or None
+    :param folder: (Optional) Dir/folder of the store. Defaults to ``highlow`` folder within ``BSE.dir``
+    :type folder: str or pathlib.Path or None
+    :raise ValueError: if neither ``bse`` nor ``folder`` is specified
+
+    Windows are in calendar days ending on the ``as_of`` date: 7 days for weekly,
+    30 days for monthly and 365 days for 52 week values.
+
+    Prices are not adjusted for corporate actions, unlike the 52 week values of
+    :meth:`bse.BSE.quoteWeeklyHL`.
+
+    .. code-block:: python
+
+        with BSE("./") as bse:
+            hl = HighLow(bse)
+
+            hl.update(date.today() - timedelta(365))
+
+            hl.quote("500180")
+
+            # All scrips within 5% of their 52 week high
+            near_high = [
+                code
+                for code, q in hl.all().items()
+                if q["close"] >= q["fifty2WeekHigh"] * 0.95
+            ]
+    """
+
+    week = 7
+    month = 30
+    year = 365
+
+    def __init__(self, bse: Optional["BSE"] = None, folder: str | Path | None = None):
+        if folder is None:
+            if bse is None:
+                raise ValueError("Specify a 'bse' instance or 'folder'")
+
+            folder = bse.dir / "highlow"
+
+        self.bse = bse
+        self.folder = Path(folder)
+
+        if self.folder.is_file():
+            raise ValueError(f"{self.folder}: must be a folder")
+
+        self.folder.mkdir(parents=True, exist_ok=True)
+
+        self.lock = Lock()
+        self.scrips_file = self.folder / "scrips.json"
+
+        self.scrips: List[str] = []
+
+        if self.scrips_file.exists():
+            self.scrips = json.loads(self.scrips_file.read_text())
+
+        self.index = {code: i for i, code in enumerate(self.scrips)}
+
+        # date -> (highs, lows, closes)
+        self.days: Dict[date, Tuple[array, array, array]] = {}
+
+        # as_of date -> result of all(). Cleared on ingest
+        self.cache: Dict[date, Dict[str, dict]] = {}
+
+    def dates(self) -> List[date]:
+        """Sorted list of dates ingested"""
+
+        return sorted(
+            date.fromisoformat(file.stem) for file in self.folder.glob("*-*-*.bin")
+        )
+
+    def __save_scrips(self):
+        write_json(self.scrips_file, self.scrips)
+
+    def ingest(self, file: str | Path) -> Optional[date]:
+        """
+        Add a bhavcopy report to the store. Replaces data stored for the same date.
+
+        :param file: File path of the bhavcopy from :meth:`bse.BSE.bhavcopyReport`. May be compressed.
+        :type file: str or pathlib.Path
+        :return: Trade date of the report or None if the report is empty
+        :rtype: datetime.date or None
+        """
+        rows: Dict[str, Tuple[float, float, float]] = {}
+        trade_date = None
+
+        with open_report(file) as f:
+            for row in csv.DictReader(f):
+                try:
+                    high, low = float(row["HghPric"]), float(row["LwPric"])
+                    close = float(row["ClsPric"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+
+                trade_date = trade_date or row["TradDt"]
+                rows[row["FinInstrmId"].strip()] = (high, low, close)
+
+        if trade_date is None:
+            return None
+
+        dt = datetime.strptime(trade_date.strip(), "%Y-%m-%d").date()
+
+        with self.lock:
+            n = len(self.scrips)
+
+            for code in rows:
+                if code not in self.index:
+                    self.index[code] = len(self.scrips)
+                    self.scrips.append(code)
+
+            if len(self.scrips) > n:
+                self.__save_scrips()
+
+            size = len(self.scrips)
+            highs = array("d", [-INF]) * size
+            lows = array("d", [INF]) * size
+            closes = array("d", [0.0]) * size
+
+            for code, (high, low, close) in rows.items():
+                i = self.index[code]
+                highs[i], lows[i], closes[i] = high, low, close
+
+            write_bytes(
+                self.folder / f"{dt.isoformat()}.bin",
+                highs.tobytes() + lows.tobytes() + closes.tobytes(),
+            )
+
+            self.days[dt] = (highs, lows, closes)
+            self.cache.clear()
+
+        return dt
+
+    def __load(self, dt: date) -> Tuple[array, array, array]:
+        if dt not in self.days:
+            file = self.folder / f"{dt.isoformat()}.bin"
+            values = array("d")
+
+            with file.open("rb") as f:
+                values.frombytes(f.read())
+
+            n = len(values) // 3
+
+            self.days[dt] = (values[:n], values[n : 2 * n], values[2 * n :])
+
+        highs, lows, closes = self.days[dt]
+        size = len(self.scrips)
+
+        # Scrips added after this date have no data
+        if len(highs) < size:
+            pad = size - len(highs)
+
+            highs = highs + array("d", [-INF]) * pad
+            lows = lows + array("d", [INF]) * pad
+            closes = closes + array("d", [0.0]) * pad
+
+            self.days[dt] = (highs, lows, closes)
+
+        return highs, lows, closes
+
+    def update(
+        self,
+        from_date: date,
+        to_date: Optional[date] = None,
+        max_workers: int = 4,
+    ) -> List[date]:
+        """
+        Download and ingest bhavcopies of trading days not yet in the store.
+        Downloads are made in ``bulk`` priority.
+
+        :param from_date: From date
+        :type from_date: datetime.date
+        :param to_date: (Optional) To date. Defaults to today
+        :type to_date: datetime.date or None
+        :param max_workers: Default 4. Maximum number of concurrent downloads.
+        :type max_workers: int
+        :raise ValueError: if ``bse`` was not specified or ``from_date`` is greater than ``to_date``
+        :raise TimeoutError: if request timed out with no response
+        :raise ConnectionError: in case of HTTP error or server returns error response.
+        :return: Sorted list of dates ingested. Holidays and unavailable reports are skipped.
+        :rtype: list[datetime.date]
+        """
+        if self.bse is None:
+            raise ValueError("A 'bse' instance is required to download reports")
+
+        bse = self.bse
+        stored = set(self.dates())
+
+        dates = [
+            dt
+            for dt in bse.calendar.trading_days(from_date, to_date or date.today())
+            if dt not in stored
+        ]
+
+        def download(dt: date) -> Optional[Path]:
+            try:
+                return bse.bhavcopyReport(dt, compress="gzip")
+            except RuntimeError:
+                return None
+
+        with priority("bulk"):
+            files = concurrent_map(download, dates, max_workers)
+
+        added = []
+
+        for file in files:
+            if file:
+                dt = self.ingest(file)
+
+                if dt:
+                    added.append(dt)
+
+        return sorted(added)
+
+    def all(self, as_of: Optional[date] = None) -> Dict[str, dict]:
+        """
+        Weekly, monthly and 52 week highs and lows of all scrips.
+
+        :param as_of: (Optional) Last date of the windows. Defaults to the latest date ingested.
+        :type as_of: datetime.date or None
+        :return: Dictionary of scripcode to values in the format of :meth:`bse.BSE.quoteWeeklyHL`,
+            with the addition of ``close`` on the last trading day. Scrips without data in the last 52 weeks are excluded.
+        :rtype: dict[str, dict]
+        """
+        dates = self.dates()
+
+        if as_of is not None:
+            as_of = as_date(as_of)
+            dates = [dt for dt in dates if dt <= as_of]
+
+        if not dates:
+            return {}
+
+        as_of = as_of or dates[-1]
+
+        if as_of in self.cache:
+            return self.cache[as_of]
+
+        week_start = as_of - timedelta(self.week - 1)
+        month_start = as_of - timedelta(self.month - 1)
+        year_start = as_of - timedelta(self.year - 1)
+
+        size = len(self.scrips)
+
+        year_high = array("d", [-INF]) * size
+        year_low = array("d", [INF]) * size
+        month_high, month_low = year_high[:], year_low[:]
+        week_high, week_low = year_high[:], year_low[:]
+        close = array("d", [0.0]) * size
+
+        # Index into window dates of the date of 52 week high and low
+        high_date = [-1] * size
+        low_date = [-1] * size
+
+        window = [dt for dt in dates if dt >= year_start]
+
+        for n, dt in enumerate(window):
+            highs, lows, closes = self.__load(dt)
+
+            high_date = [
+                n if h > m else d for h, m, d in zip(highs, year_high, high_date)
+            ]
+            low_date = [n if lo < m else d for lo, m, d in zip(lows, year_low, low_date)]
+
+            year_high = array("d", map(max, year_high, highs))
+            year_low = array("d", map(min, year_low, lows))
+
+            if dt >= month_start:
+                month_high = array("d", map(max, month_high, highs))
+                month_low = array("d", map(min, month_low, lows))
+
+            if dt >= week_start:
+                week_high = array("d", map(max, week_high, highs))
+                week_low = array("d", map(min, week_low, lows))
+
+            close = array("d", (c or p for c, p in zip(closes, close)))
+
+        result = {}
+
+        for i, code in enumerate(self.scrips):
+            if high_date[i] == -1:
+                continue
+
+            result[code] = {
+                "fifty2WeekHigh": year_high[i],
+                "dateHigh": f"{window[high_date[i]]:%d/%m/%Y}",
+                "fifty2WeekLow": year_low[i],
+                "dateLow": f"{window[low_date[i]]:%d/%m/%Y}",
+                "monthlyHigh": month_high[i] if month_high[i] != -INF else None,
+                "monthlyLow": month_low[i] if month_low[i] != INF else None,
+                "weeklyHigh": week_high[i] if week_high[i] != -INF else None,
+                "weeklyLow": week_low[i] if week_low[i] != INF else None,
+                "close": close[i],
+            }
+
+        self.cache[as_of] = result
+
+        return result
+
+    def quote(self, scripcode: str, as_of: Optional[date] = None) -> Optional[dict]:
+        """
+        Weekly, monthly and 52 week highs and lows of a scrip.
+
+        :param scripcode: BSE scrip code
+        :type scripcode: str
+        :param as_of: (Optional) Last date of the windows. Defaults to the latest date ingested.
+        :type as_of: datetime.date or None
+        :return: Values in the format of :meth:`bse.BSE.quoteWeeklyHL` or None if no data is stored.
+        :rtype: dict or None
+        """
+        return self.all(as_of).get(str(scripcode))
@@ -0,0 +1,311 @@
+"""Columnar store of daily index data backfilled from ``fetchAllIndicesDataByDate``"""
+
+from __future__ import annotations
+
+import json
+import re
+from bisect import bisect_left
+from datetime import date, timedelta
+from pathlib import Path
+from threading import Lock
+from typing import TYPE_CHECKING, Dict, List, Optional, Set
+
+from .filestate import write_json
+from .scheduler import concurrent_map, priority
+from .trading_calendar import as_date
+
+if TYPE_CHECKING:
+    from .BSE import BSE
+
+
+class IndexStore:
+    """
+    Daily index data keyed by index name and date.
+
+    Each index is stored as a JSON file of columns. Every column is a list of
+    equal length, sorted by the ``date`` column, which holds ISO format dates.
+
+    .. code-block:: python
+
+        {
+            "date": ["2023-10-19", "2023-10-20"],
+            "I_open": [...], "I_high": [...], "I_low": [...], "I_close": [...],
+        }
+
+    The dates already fetched are saved in ``meta.json``.
+
+    :param folder: Dir/folder of the store
+    :type folder: str or pathlib.Path
+    """
+
+    def __init__(self, folder: str | Path):
+        self.folder = Path(folder)
+
+        if self.folder.is_file():
+            raise ValueError(f"{self.folder}: must be a folder")
+
+        self.folder.mkdir(parents=True, exist_ok=True)
+
+        self.meta_file = self.folder / "meta.json"
+        self.lock = Lock()
+
+        # index name -> file name
+        self.files: Dict[str, str] = {}
+        self.dates: Set[date] = set()
+
+        if self.meta_file.exists():
+            meta = json.loads(self.meta_file.read_text())
+
+            self.files = meta["files"]
+            self.dates = set(map(date.fromisoformat, meta["dates"]))
+
+        self.columns: Dict[str, Dict[str, list]] = {}
+        self.dirty: Set[str] = set()
+
+    def indices(self) -> List[str]:
+        """Sorted list of index names in the store"""
+
+        return sorted(self.files)
+
+    def __file(self, index: str) -> Path:
+        if index not in self.files:
+            name = re.sub(r"\W+", "_", index).strip("_").lower() or "index"
+
+            taken = set(self.files.values())
+            file, n = f"{name}.json", 1
+
+            while file in taken:
+                n += 1
+                file = f"{name}_{n}.json"
+
+            self.files[index] = file
+
+        return self.folder / self.files[index]
+
+    def get(self, index: str) -> Dict[str, list]:
+        """
+        Return the columns of ``index``. Loads from disk if available.
+
+        :param index: Index name
+        :type index: str
+        :return: Dictionary of column name to list of values. Empty dictionary if the index is not stored.
+        :rtype: dict[str, list]
+        """
+        if index not in self.columns:
+            if index not in self.files:
+                return {}
+
+            file = self.__file(index)
+
+            self.columns[index] = (
+                json.loads(file.read_text()) if file.exists() else {"date": []}
+            )
+
+        return self.columns[index]
+
+    def row(self, index: str, dt: date) -> Optional[dict]:
+        """
+        Return the data of ``index`` on date ``dt``
+
+        :param index: Index name
+        :type index: str
+        :param dt: Date
+        :type dt: datetime.date
+        :return: Dictionary of column name to value or None if not stored.
+        :rtype: dict or None
+        """
+        cols = self.get(index)
+
+        if not cols:
+            return None
+
+        key = as_date(dt).isoformat()
+        i = bisect_left(cols["date"], key)
+
+        if i == len(cols["date"]) or cols["date"][i] != key:
+            return None
+
+        return {name: values[i] for name, values in cols.items()}
+
+    def add(self, dt: date, data: Dict[str, List[dict]], complete: bool = True):
+        """
+        Add the return value of :meth:`bse.BSE.fetchAllIndicesDataByDate` for
+        date ``dt``. Rows already stored for ``dt`` are replaced.
+        Call :meth:`.save` to write changes to disk.
+
+        :param dt: Date of the data
+        :type dt: datetime.date
+        :param data: Dictionary of index name to list of rows
+        :type data: dict[str, list[dict]]
+        :param complete: Default True. Record ``dt`` as fetched. Set False for incomplete data like the current session.
+        :type complete: bool
+        """
+        key = as_date(dt).isoformat()
+
+        with self.lock:
+            for index, rows in data.items():
+                if isinstance(rows, dict):
+                    rows = [rows]
+
+                if not rows:
+                    continue
+
+                self.__insert(index, key, rows[0])
+
+            if complete:
+                self.dates.add(as_date(dt))
+
+    def __insert(self, index: str, key: str, row: dict):
+        if index not in self.files:
+            self.__file(index)
+            self.columns[index] = {"date": []}
+
+        cols = self.get(index)
+        dates = cols["date"]
+        n = len(dates)
+
+        # Fill columns not seen before with None
+        for name in row:
+            if name != "date" and name not in cols:
+                cols[name] = [None] * n
+
+        i = bisect_left(dates, key)
+
+        if i < n and dates[i] == key:
+            for name, values in cols.items():
+                if name != "date":
+                    values[i] = row.get(name)
+        else:
+            for name, values in cols.items():
+                values.insert(i, key if name == "date" else row.get(name))
+
+        self.dirty.add(index)
+
+    def save(self):
+        """Write changed indices and the list of fetched dates to disk"""
+
+        with self.lock:
+            for index in self.dirty:
+                write_json(self.__file(index), self.columns[index])
+
+            self.dirty.clear()
+
+            meta = {
+                "files": self.files,
+                "dates": sorted(d.isoformat() for d in self.dates),
+            }
+
+            write_json(self.meta_file, meta)
+
+
+class IndexBackfill:
+    """
+    Backfill daily data of all indices into an :class:`IndexStore` by
+    fetching trading days concurrently with :meth:`bse.BSE.fetchAllIndicesDataByDate`.
+
+    Only trading days missing from the store are fetched, so a run after an
+    interruption or on the next day tops up the store incrementally.
+
+    :param bse: An instance of BSE
+    :type bse: bse.BSE
+    :param folder: (Optional) Dir/folder of the store.
+        Defaults to ``indices`` folder within ``BSE.dir``
+    :type folder: str or pathlib.Path or None
+
+    .. code-block:: python
+
+        with BSE("./") as bse:
+            backfill = IndexBackfill(bse)
+
+            backfill.run(date(2020, 1, 1))
+
+            sensex = backfill.store.get("S&P BSE SENSEX")
+    """
+
+    def __init__(self, bse: "BSE", folder: str | Path | None = None):
+        self.bse = bse
+        self.store = IndexStore(folder or bse.dir / "indices")
+
+    def missing(self, from_date: date, to_date: date) -> List[date]:
+        """
+        Trading days between ``from_date`` and ``to_date`` inclusive, not yet in the store.
+
+        :param from_date: From date
+        :type from_date: datetime.date
+        :param to_date: To date
+        :type to_date: datetime.date
+        :raise ValueError: if ``from_date`` is greater than ``to_date``
+        :return: Sorted list of dates
+        :rtype: list[datetime.date]
+        """
+        return [
+            dt
+            for dt in self.bse.calendar.trading_days(from_date, to_date)
+            if dt not in self.store.dates
+        ]
+
+    def run(
+        self,
+        from_date: date,
+        to_date: Optional[date] = None,
+        max_workers: int = 8,
+        batch_size: int = 50,
+    ) -> List[date]:
+        """
+        Fetch missing trading days and add them to the store.
+
+        Requests are made in ``bulk`` priority. The store is saved after each
+        batch, so an interrupted run loses at most one batch.
+
+        Data for today is stored, but fetched again on the next run as the session may not be complete.
+
+        :param from_date: From date
+        :type from_date: datetime.date
+        :param to_date: (Optional) To date. Defaults to today
+        :type to_date: datetime.date or None
+        :param max_workers: Default 8. Maximum number of concurrent requests.
+        :type max_workers: int
+        :param batch_size: Default 50. Number of dates fetched before saving the store.
+        :type batch_size: int
+        :raise ValueError: if ``from_date`` is greater than ``to_date``
+        :raise TimeoutError: if request timed out with no response
+        :raise ConnectionError: in case of HTTP error or server returns error response.
+        :return: Sorted list of dates added to the store. Holidays found are excluded.
+        :rtype: list[datetime.date]
+        """
+        today = date.today()
+
+        dates = self.missing(from_date, to_date or today)
+        added = []
+
+        for i in range(0, len(dates), batch_size):
+            batch = dates[i : i + batch_size]
+
+            with priority("bulk"):
+                results = concurrent_map(
+                    self.bse.fetchAllIndicesDataByDate, batch, max_workers
+                )
+
+            for dt, data in zip(batch, results):
+                if not any(data.values()):
+                    continue
+
+                self.store.add(dt, data, complete=dt < today)
+                added.append(dt)
+
+            self.store.save()
+
+        return added
+
+    def update(self, days: int = 7) -> List[date]:
+        """
+        Top up the store with missing trading days of the last ``days`` days.
+
+        :param days: Default 7. Number of days to look back.
+        :type days: int
+        :raise TimeoutError: if request timed out with no response
+        :raise ConnectionError: in case of HTTP error or server returns error response.
+        :return: Sorted list of dates added to the store.
+        :rtype: list[datetime.date]
+        """
+        return self.run(date.today() - timedelta(days))
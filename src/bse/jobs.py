@@ -0,0 +1,521 @@
+"""Durable SQLite job queue for long running backfills"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sqlite3
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from threading import Lock
+from time import sleep, time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+)
+
+from .scheduler import priority
+from .sink import AnnouncementSink
+
+if TYPE_CHECKING:
+    from .BSE import BSE
+
+
+class Task(NamedTuple):
+    """A leased task"""
+
+    id: int
+    job: str
+    kind: str
+    args: dict
+    attempts: int
+    worker: str
+
+
+class JobQueue:
+    """
+    Task queue persisted in a SQLite database. Safe to share between threads
+    and processes on a host.
+
+    Tasks are leased to a worker for ``lease`` seconds. A task not completed
+    within its lease, for example when the worker crashed, is leased again.
+    Failed tasks are retried with exponential backoff up to ``max_attempts`` times.
+    Every lease counts as an attempt, so a task that keeps crashing its worker
+    is marked failed too.
+
+    Only the worker holding the lease can complete or fail a task. A worker whose
+    lease expired and was taken by another worker is told the lease was lost.
+
+    :param path: SQLite database file
+    :type path: str or pathlib.Path
+    :param lease: Default 300. Seconds a worker holds a task
+    :type lease: float
+    :param max_attempts: Default 5. Attempts before a task is marked failed
+    :type max_attempts: int
+    :param backoff: Default 30. Seconds before the first retry. Doubles with every attempt.
+    :type backoff: float
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        lease: float = 300,
+        max_attempts: int = 5,
+        backoff: float = 30,
+    ):
+        self.path = Path(path)
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.lock = Lock()
+
+        self.db = sqlite3.connect(
+            self.path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+
+        self.db.execute("PRAGMA journal_mode=WAL")
+
+        self.db.execute(
+            """CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY,
+                job TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                args TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                available_at REAL NOT NULL DEFAULT 0,
+                lease_until REAL,
+                worker TEXT,
+                error TEXT,
+                result TEXT,
+                UNIQUE (job, kind, args)
+            )"""
+        )
+
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, available_at)"
+        )
+
+    def close(self):
+        """Close the database"""
+
+        self.db.close()
+
+    def add(self, job: str, kind: str, args: Iterable[dict]) -> int:
+        """
+        Add tasks to a job. Tasks already in the job are not added again,
+        so planning a job twice is safe.
+
+        :param job: Job name
+        :type job: str
+        :param kind: Task kind. Used by the worker to pick a handler
+        :type kind: str
+        :param args: Arguments of each task. Must be JSON serializable
+        :type args: Iterable[dict]
+        :return: Number of tasks added
+        :rtype: int
+        """
+        rows = [(job, kind, json.dumps(a, sort_keys=True, default=str)) for a in args]
+
+        with self.lock:
+            before = self.db.total_changes
+
+            self.db.execute("BEGIN IMMEDIATE")
+
+            try:
+                self.db.executemany(
+                    "INSERT OR IGNORE INTO tasks (job, kind, args) VALUES (?, ?, ?)",
+                    rows,
+                )
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+
+            self.db.execute("COMMIT")
+
+            return self.db.total_changes - before
+
+    def acquire(self, worker: str, job: Optional[str] = None) -> Optional[Task]:
+        """
+        Lease the next available task
+
+        :param worker: Name of the worker
+        :type worker: str
+        :param job: (Optional) Lease only tasks of this job
+        :type job: str or None
+        :return: A task or None if no task is available now
+        :rtype: Task or None
+        """
+        now = time()
+
+        query = """SELECT id, job, kind, args, attempts FROM tasks
+            WHERE ((status = 'pending' AND available_at <= ?)
+                OR (status = 'leased' AND lease_until < ?))"""
+
+        params: List[Any] = [now, now]
+
+        if job is not None:
+            query += " AND job = ?"
+            params.append(job)
+
+        query += " ORDER BY available_at, id LIMIT 1"
+
+        # Expired leases that used the last attempt
+        expire = """UPDATE tasks SET status = 'failed', available_at = 0,
+            error = 'Lease expired on the last attempt'
+            WHERE status = 'leased' AND lease_until < ? AND attempts >= ?"""
+
+        expire_params: List[Any] = [now, self.max_attempts]
+
+        if job is not None:
+            expire += " AND job = ?"
+            expire_params.append(job)
+
+        with self.lock:
+            # Take the write lock before reading so a task is leased only once
+            self.db.execute("BEGIN IMMEDIATE")
+
+            try:
+                self.db.execute(expire, expire_params)
+
+                row = self.db.execute(query, params).fetchone()
+
+                if row is None:
+                    self.db.execute("COMMIT")
+                    return None
+
+                task_id, job_name, kind, args, attempts = row
+
+                self.db.execute(
+                    """UPDATE tasks SET status = 'leased', lease_until = ?,
+                    worker = ?, attempts = attempts + 1 WHERE id = ?""",
+                    (now + self.lease, worker, task_id),
+                )
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+
+            self.db.execute("COMMIT")
+
+        return Task(task_id, job_name, kind, json.loads(args), attempts + 1, worker)
+
+    def __update(self, task: Task, assignments: str, params: tuple) -> bool:
+        """Update a task only if it is still held by the lease of ``task``.
+        Every lease increments attempts, so a lease taken again by a thread
+        with the same worker name does not match."""
+
+        with self.lock:
+            cursor = self.db.execute(
+                f"""UPDATE tasks SET {assignments}
+                WHERE id = ? AND worker = ? AND attempts = ?
+                AND status = 'leased'""",
+                (*params, task.id, task.worker, task.attempts),
+            )
+
+        return cursor.rowcount > 0
+
+    def complete(self, task: Task, result: Any = None) -> bool:
+        """
+        Mark a task as done
+
+        :param task: Leased task
+        :type task: Task
+        :param result: (Optional) Result to record. Must be JSON serializable
+        :return: False if the lease was lost to another worker and the result was not recorded
+        :rtype: bool
+        """
+        return self.__update(
+            task,
+            "status = 'done', result = ?, error = NULL",
+            (json.dumps(result, default=str),),
+        )
+
+    def fail(self, task: Task, error: str) -> bool:
+        """
+        Record a failed attempt. The task is retried after a backoff, or marked
+        ``failed`` once it has been attempted ``max_attempts`` times.
+
+        :param task: Leased task
+        :type task: Task
+        :param error: Error message
+        :type error: str
+        :return: False if the lease was lost to another worker and the failure was not recorded
+        :rtype: bool
+        """
+        if task.attempts >= self.max_attempts:
+            status, available_at = "failed", 0.0
+        else:
+            status = "pending"
+            available_at = time() + self.backoff * 2 ** (task.attempts - 1)
+
+        return self.__update(
+            task,
+            "status = ?, available_at = ?, error = ?",
+            (status, available_at, error),
+        )
+
+    def retry_failed(self, job: Optional[str] = None) -> int:
+        """
+        Reset failed tasks to pending with zero attempts
+
+        :param job: (Optional) Only tasks of this job
+        :type job: str or None
+        :return: Number of tasks reset
+        :rtype: int
+        """
+        query = """UPDATE tasks SET status = 'pending', attempts = 0, available_at = 0
+            WHERE status = 'failed'"""
+        params = ()
+
+        if job is not None:
+            query += " AND job = ?"
+            params = (job,)
+
+        with self.lock:
+            return self.db.execute(query, params).rowcount
+
+    def stats(self, job: Optional[str] = None) -> Dict[str, int]:
+        """
+        Number of tasks by status
+
+        :param job: (Optional) Only tasks of this job
+        :type job: str or None
+        :return: Dictionary with ``pending``, ``leased``, ``done`` and ``failed`` keys
+        :rtype: dict[str, int]
+        """
+        query = "SELECT status, COUNT(*) FROM tasks"
+        params = ()
+
+        if job is not None:
+            query += " WHERE job = ?"
+            params = (job,)
+
+        with self.lock:
+            rows = self.db.execute(query + " GROUP BY status", params).fetchall()
+
+        result = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        result.update(rows)
+
+        return result
+
+
+class Backfill:
+    """
+    Break backfills of bhavcopy, delivery reports, announcements and index history
+    into tasks on a :class:`JobQueue` and process them.
+
+    Run :meth:`.work` in any number of processes against the same queue to scale
+    throughput. A restarted worker continues with the remaining tasks. Use
+    :func:`bse.set_limiter` with a :class:`bse.limiter.FileLimiter` so all
+    processes share the rate limit.
+
+    :param bse: An instance of BSE
+    :type bse: bse.BSE
+    :param queue: (Optional) Job queue. Defaults to ``jobs.db`` in ``BSE.dir``
+    :type queue: JobQueue or None
+
+    .. code-block:: python
+
+        with BSE("./") as bse:
+            backfill = Backfill(bse)
+
+            backfill.plan_reports("2023", "bhavcopy", date(2023, 1, 1), date(2023, 12, 31))
+
+            # Run in as many processes as needed
+            backfill.work("2023")
+
+    Handlers for other task kinds can be added to ``handlers``. A handler takes
+    the BSE instance and task arguments and returns a JSON serializable result.
+    """
+
+    def __init__(self, bse: "BSE", queue: Optional[JobQueue] = None):
+        self.bse = bse
+        self.queue = queue or JobQueue(bse.dir / "jobs.db")
+
+        self.handlers: Dict[str, Callable[["BSE", dict], Any]] = {
+            "bhavcopy": Backfill.__bhavcopy,
+            "delivery": Backfill.__delivery,
+            "announcements": Backfill.__announcements,
+            "index": Backfill.__index,
+        }
+
+    @staticmethod
+    def __report(fn: Callable, dt: date):
+        try:
+            return fn(dt, compress="gzip")
+        except RuntimeError:
+            # Holiday or not yet published
+            if dt < date.today():
+                return None
+
+            raise
+
+    @staticmethod
+    def __bhavcopy(bse: "BSE", args: dict):
+        return Backfill.__report(bse.bhavcopyReport, date.fromisoformat(args["date"]))
+
+    @staticmethod
+    def __delivery(bse: "BSE", args: dict):
+        return Backfill.__report(bse.deliveryReport, date.fromisoformat(args["date"]))
+
+    @staticmethod
+    def __announcements(bse: "BSE", args: dict):
+        dt = date.fromisoformat(args["date"])
+        folder = bse.dir / "announcements"
+        folder.mkdir(exist_ok=True)
+
+        # The sink checkpoints pages, so a retried task resumes from the last page
+        sink = AnnouncementSink(bse, folder / f"{dt}.jsonl", compress="gzip")
+
+        start = datetime.combine(dt, datetime.min.time())
+        sink.run(from_date=start, to_date=start)
+
+        return str(sink.path)
+
+    @staticmethod
+    def __index(bse: "BSE", args: dict):
+        return bse.fetchHistoricalIndexData(
+            args["index"],
+            from_date=date.fromisoformat(args["from_date"]),
+            to_date=date.fromisoformat(args["to_date"]),
+            compress="gzip",
+        )
+
+    def plan_reports(
+        self,
+        job: str,
+        kind: str,
+        from_date: date,
+        to_date: date,
+    ) -> int:
+        """
+        Add one task per trading day for a daily report. Announcements are
+        filed on weekends and holidays too, so they get one task per calendar day.
+
+        :param job: Job name
+        :type job: str
+        :param kind: One of ``bhavcopy``, ``delivery`` or ``announcements``
+        :type kind: str
+        :param from_date: From date
+        :type from_date: datetime.date
+        :param to_date: To date
+        :type to_date: datetime.date
+        :raise ValueError: if ``kind`` is not valid or ``from_date`` is greater than ``to_date``
+        :return: Number of tasks added
+        :rtype: int
+        """
+        if kind not in ("bhavcopy", "delivery", "announcements"):
+            raise ValueError(
+                f"{kind}: Not a valid report. One of bhavcopy, delivery or announcements"
+            )
+
+        if kind == "announcements":
+            if from_date > to_date:
+                raise ValueError("'from_date' cannot be greater than 'to_date'")
+
+            days = [
+                from_date + timedelta(i) for i in range((to_date - from_date).days + 1)
+            ]
+        else:
+            days = self.bse.calendar.trading_days(from_date, to_date)
+
+        return self.queue.add(job, kind, ({"date": dt.isoformat()} for dt in days))
+
+    def plan_index(
+        self,
+        job: str,
+        index: str,
+        from_date: date,
+        to_date: date,
+        chunk_size: int = 365,
+    ) -> int:
+        """
+        Add tasks to download historical data of an index in chunks of ``chunk_size`` days.
+
+        :param job: Job name
+        :type job: str
+        :param index: Index name. See :meth:`bse.BSE.fetchIndexNames`
+        :type index: str
+        :param from_date: From date
+        :type from_date: datetime.date
+        :param to_date: To date
+        :type to_date: datetime.date
+        :param chunk_size: Default 365. Days per task
+        :type chunk_size: int
+        :return: Number of tasks added
+        :rtype: int
+        """
+        chunks = self.bse.split_date_range(from_date, to_date, chunk_size)
+
+        return self.queue.add(
+            job,
+            "index",
+            (
+                {
+                    "index": index,
+                    "from_date": start.isoformat(),
+                    "to_date": end.isoformat(),
+                }
+                for start, end in chunks
+            ),
+        )
+
+    def work(
+        self,
+        job: Optional[str] = None,
+        worker: Optional[str] = None,
+        wait: bool = False,
+    ) -> Dict[str, int]:
+        """
+        Process tasks until none are available. Requests are made in ``bulk`` priority.
+
+        :param job: (Optional) Process only tasks of this job
+        :type job: str or None
+        :param worker: (Optional) Worker name. Defaults to host name and process id.
+        :type worker: str or None
+        :param wait: Default False. If True, wait for tasks in backoff or leased by other workers
+            until all tasks are done or failed.
+        :type wait: bool
+        :return: Dictionary with number of ``done`` and ``failed`` attempts by this worker,
+            and ``lost``, attempts whose lease expired and was taken by another worker
+        :rtype: dict[str, int]
+        """
+        worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+        counts = {"done": 0, "failed": 0, "lost": 0}
+
+        with priority("bulk"):
+            while True:
+                task = self.queue.acquire(worker, job)
+
+                if task is None:
+                    stats = self.queue.stats(job)
+
+                    if not wait or stats["pending"] + stats["leased"] == 0:
+                        break
+
+                    sleep(1)
+                    continue
+
+                handler = self.handlers.get(task.kind)
+
+                try:
+                    if handler is None:
+                        raise ValueError(f"{task.kind}: No handler for task")
+
+                    result = handler(self.bse, task.args)
+                except Exception as e:
+                    recorded = self.queue.fail(task, repr(e))
+                    counts["failed" if recorded else "lost"] += 1
+                else:
+                    recorded = self.queue.complete(task, result)
+                    counts["done" if recorded else "lost"] += 1
+
+        return counts
+
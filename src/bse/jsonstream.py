@@ -0,0 +1,166 @@
+"""Incremental parsing of rows from a JSON response as it is received"""
+
+from __future__ import annotations
+
+import codecs
+import json
+from typing import Any, Iterable, Iterator, Optional
+
+_decoder = json.JSONDecoder()
+
+WHITESPACE = " \t\n\r"
+
+
+class _Reader:
+    """Text buffer over a stream of byte chunks. Consumed text is discarded."""
+
+    compact_size = 1 << 16
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Read the next chunk into the buffer. Returns False at the end of the stream"""
+
+        if self.eof:
+            return False
+
+        if self.pos > self.compact_size:
+            self.buffer = self.buffer[self.pos :]
+            self.pos = 0
+
+        for chunk in self.chunks:
+            text = self.decoder.decode(chunk)
+
+            if text:
+                self.buffer += text
+                return True
+
+        self.buffer += self.decoder.decode(b"", final=True)
+        self.eof = True
+
+        return False
+
+    def peek(self) -> str:
+        """Next character that is not whitespace"""
+
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+
+            if not self.fill():
+                raise ValueError("Incomplete JSON response")
+
+    def expect(self, char: str):
+        found = self.peek()
+
+        if found != char:
+            raise ValueError(f"Expected '{char}' at position {self.pos}, found '{found}'")
+
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode the next JSON value. Reads more chunks until the value is complete."""
+
+        self.peek()
+
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+
+                raise ValueError("Invalid or incomplete JSON response")
+
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and self.fill():
+                continue
+
+            self.pos = end
+            return value
+
+
+def _items(reader: _Reader) -> Iterator[Any]:
+    reader.expect("[")
+
+    if reader.peek() == "]":
+        reader.pos += 1
+        return
+
+    while True:
+        yield reader.value()
+
+        if reader.peek() == "]":
+            reader.pos += 1
+            return
+
+        reader.expect(",")
+
+
+def iter_rows(chunks: Iterable[bytes], key: Optional[str] = "Table") -> Iterator[Any]:
+    """
+    .. versionadded:: 3.2.0
+
+    Parse a JSON document from a stream of byte chunks and yield the items of an
+    array as soon as each is received. Only one item is held in memory at a time.
+
+    If the document is an array, its items are yielded. If it is an object,
+    the items of the array at ``key`` are yielded. Other values of the object
+    are skipped and the rest of the document is not read.
+
+    :param chunks: Byte chunks of a UTF-8 JSON document ex. ``response.iter_content(65536)``
+    :type chunks: Iterable[bytes]
+    :param key: Default ``Table``. Key of the array in a JSON object
+    :type key: str or None
+    :raise ValueError: if the document is not valid JSON or the array is not found
+    :return: Iterator of array items
+
+    .. code-block:: python
+
+        from bse.jsonstream import iter_rows
+
+        with open("listSecurities.json", "rb") as f:
+            for row in iter_rows(f):
+                print(row["SCRIP_CD"])
+    """
+    reader = _Reader(chunks)
+
+    # Byte order mark
+    if reader.peek() == "\ufeff":
+        reader.pos += 1
+
+    if reader.peek() == "[":
+        yield from _items(reader)
+        return
+
+    reader.expect("{")
+
+    if reader.peek() != "}":
+        while True:
+            name = reader.value()
+
+            if not isinstance(name, str):
+                raise ValueError(f"Invalid object key at position {reader.pos}")
+
+            reader.expect(":")
+
+            if name == key and reader.peek() == "[":
+                yield from _items(reader)
+                return
+
+            reader.value()
+
+            if reader.peek() == "}":
+                break
+
+            reader.expect(",")
+
+    raise ValueError(f"{key}: Array not found in JSON response")
@@ -0,0 +1,162 @@
+"""Rate limiters that can be shared by all BSE instances across processes"""
+
+from __future__ import annotations
+
+import os
+import struct
+from contextlib import contextmanager
+from pathlib import Path
+from tempfile import gettempdir
+from threading import Lock
+from time import sleep, time
+from typing import Dict, List, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class Limiter:
+    """
+    Base class for rate limiters.
+
+    Subclass and implement :meth:`.check` to plug in a custom backend
+    like Redis or a network service. Pass an instance to :func:`bse.set_limiter`.
+    """
+
+    def check(self, key: str = "default"):
+        """
+        Block until a request for ``key`` is allowed.
+
+        :param key: Throttle key. ``default`` or ``lookup``
+        :type key: str
+        """
+        raise NotImplementedError
+
+
+class FileLimiter(Limiter):
+    """
+    A token bucket rate limiter whose state is stored in a file and guarded by a file lock.
+
+    All processes on a host using the same ``path`` share a single rate budget.
+
+    :param config: Rate limits by throttle key. Same format as ``throttle_config`` in the ``bse.BSE`` module.
+        Each key may specify ``rps`` (requests per second) and/or ``rpm`` (requests per minute).
+    :type config: dict[str, dict[str, int]]
+    :param path: (Optional) File to store the limiter state.
+        Defaults to ``bse-limiter`` in the system temp folder.
+    :type path: str or pathlib.Path or None
+
+    .. code-block:: python
+
+        from bse import BSE, set_limiter
+        from bse.BSE import throttle_config
+        from bse.limiter import FileLimiter
+
+        set_limiter(FileLimiter(throttle_config))
+
+    All processes must use the same ``config``.
+    """
+
+    # tokens, last refill timestamp
+    record = struct.Struct("<dd")
+
+    periods = {"rps": 1, "rpm": 60}
+
+    def __init__(self, config: Dict[str, Dict[str, int]], path: str | Path | None = None):
+        self.path = Path(path) if path else Path(gettempdir()) / "bse-limiter"
+
+        # key -> list of (record offset, tokens per second, capacity)
+        self.buckets: Dict[str, List[Tuple[int, float, float]]] = {}
+
+        offset = 0
+
+        for key in sorted(config):
+            self.buckets[key] = []
+
+            for limit, period in self.periods.items():
+                if limit in config[key]:
+                    capacity = float(config[key][limit])
+
+                    self.buckets[key].append((offset, capacity / period, capacity))
+                    offset += self.record.size
+
+        self.size = offset
+        self.fd = os.open(
+            self.path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o666
+        )
+
+        # File locks do not exclude threads of the same process
+        self.lock = Lock()
+
+    def __del__(self):
+        fd = getattr(self, "fd", None)
+
+        if fd is not None:
+            os.close(fd)
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+        else:
+            os.lseek(self.fd, 0, os.SEEK_SET)
+            msvcrt.locking(self.fd, msvcrt.LK_LOCK, 1)
+
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self.fd, 0, os.SEEK_SET)
+                msvcrt.locking(self.fd, msvcrt.LK_UNLCK, 1)
+
+    def _acquire(self, key: str) -> float:
+        """Take a token from all buckets of ``key``.
+        Return 0 on success else seconds to wait for a token."""
+
+        with self.lock, self._file_lock():
+            os.lseek(self.fd, 0, os.SEEK_SET)
+            data = os.read(self.fd, self.size).ljust(self.size, b"\0")
+
+            now = time()
+            wait = 0.0
+            tokens = []
+
+            for offset, rate, capacity in self.buckets[key]:
+                available, ts = self.record.unpack_from(data, offset)
+
+                # A new file is all zeros, so a bucket starts full
+                available = min(capacity, available + max(0.0, now - ts) * rate)
+
+                if available < 1:
+                    wait = max(wait, (1 - available) / rate)
+
+                tokens.append((offset, available))
+
+            if wait:
+                return wait
+
+            for offset, available in tokens:
+                os.lseek(self.fd, offset, os.SEEK_SET)
+                os.write(self.fd, self.record.pack(available - 1, now))
+
+        return 0.0
+
+    def check(self, key: str = "default"):
+        """
+        Block until a request for ``key`` is allowed.
+
+        :param key: Throttle key. ``default`` or ``lookup``
+        :type key: str
+        """
+        while True:
+            wait = self._acquire(key)
+
+            if not wait:
+                return
+
+            sleep(wait)
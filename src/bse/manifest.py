@@ -0,0 +1,148 @@
+"""Record of completed downloads used to skip files already on disk"""
+
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Optional
+
+from .filestate import read_json, update_json
+
+
+def request_key(
+    url: str, params: Optional[dict] = None, compress: Optional[str] = None
+) -> str:
+    """A stable string key for a request url, params and compression format"""
+
+    key = url
+
+    if params:
+        key += "?" + "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+
+    if compress:
+        key += f"#{compress}"
+
+    return key
+
+
+def file_digest(path: Path) -> str:
+    """sha256 hex digest of a file"""
+
+    digest = hashlib.sha256()
+
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+class DownloadManifest:
+    """
+    JSON file in a download folder mapping each request to the file it produced,
+    along with its size and sha256 checksum.
+
+    A download is complete if its file exists with the recorded size.
+
+    Several processes may download to the same folder. Entries are merged
+    into the file under a file lock, so entries saved by other processes are kept.
+
+    :param folder: Download folder
+    :type folder: pathlib.Path
+    """
+
+    filename = ".bse_manifest.json"
+
+    def __init__(self, folder: Path):
+        self.folder = folder
+        self.path = folder / self.filename
+        self.lock = Lock()
+
+        self.entries: Dict[str, dict] = {}
+        self.version: tuple = ()
+
+        self.__reload()
+
+    def __reload(self):
+        """Read entries saved by other processes if the file has changed"""
+
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return
+
+        # The file is replaced on every write, so a new inode means new entries
+        version = (stat.st_ino, stat.st_mtime_ns)
+
+        if version != self.version:
+            self.version = version
+            self.entries = read_json(self.path, {})
+
+    def get(self, key: str) -> Optional[Path]:
+        """
+        Return the file downloaded for ``key`` if it is complete else None
+
+        :param key: Request key from :func:`request_key`
+        :type key: str
+        :rtype: Optional[pathlib.Path]
+        """
+        if key not in self.entries:
+            with self.lock:
+                self.__reload()
+
+        entry = self.entries.get(key)
+
+        if not entry:
+            return None
+
+        file = self.folder / entry["file"]
+
+        try:
+            if file.stat().st_size == entry["size"]:
+                return file
+        except FileNotFoundError:
+            pass
+
+        return None
+
+    def record(self, key: str, file: Path, sha256: Optional[str] = None):
+        """
+        Record ``file`` as the completed download for ``key``
+
+        :param key: Request key from :func:`request_key`
+        :type key: str
+        :param file: Downloaded file within the folder
+        :type file: pathlib.Path
+        :param sha256: (Optional) sha256 hex digest of the file. Computed if not provided.
+        :type sha256: str or None
+        """
+        entry = {
+            "file": file.name,
+            "size": file.stat().st_size,
+            "sha256": sha256 or file_digest(file),
+        }
+
+        def merge(entries: Dict[str, dict]) -> Dict[str, dict]:
+            entries[key] = entry
+            return entries
+
+        with self.lock:
+            self.entries = update_json(self.path, merge, {})
+
+            stat = self.path.stat()
+            self.version = (stat.st_ino, stat.st_mtime_ns)
+
+    def verify(self, key: str) -> bool:
+        """
+        Check the recorded checksum of the file downloaded for ``key``.
+        Reads the whole file.
+
+        :param key: Request key from :func:`request_key`
+        :type key: str
+        :return: True if the file is complete and its checksum matches.
+        :rtype: bool
+        """
+        file = self.get(key)
+
+        return file is not None and file_digest(file) == self.entries[key]["sha256"]
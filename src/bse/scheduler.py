@@ -0,0 +1,158 @@
+"""Priority scheduling of requests in front of the rate limiter"""
+
+from __future__ import annotations
+
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import count
+from threading import Condition, local
+from time import monotonic
+from typing import Callable, Iterable, Iterator, List, Tuple, TypeVar, Union
+
+#: Named priority classes. Lower values are served first.
+#: :class:`bse.streamer.QuoteScheduler` priorities follow the same order.
+PRIORITY = {
+    "interactive": 0,
+    "normal": 1,
+    "bulk": 2,
+}
+
+_state = local()
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def current_priority() -> int:
+    """Priority of requests made from the current thread"""
+
+    return getattr(_state, "priority", PRIORITY["normal"])
+
+
+@contextmanager
+def priority(name: Union[str, int]) -> Iterator[None]:
+    """
+    .. versionadded:: 3.2.0
+
+    Context manager to set the priority of requests made in the current thread.
+
+    :param name: One of ``interactive``, ``normal`` or ``bulk`` or an integer. Lower values are served first.
+    :type name: str or int
+    :raise ValueError: if ``name`` is not a valid priority class
+
+    Requests default to ``normal`` priority.
+
+    .. code-block:: python
+
+        from bse import BSE, priority
+
+        with priority("bulk"):
+            for page in range(1, 50):
+                bse.announcements(page_no=page)
+
+    A ``quote`` call from another thread in ``interactive`` priority is sent
+    ahead of queued ``bulk`` requests.
+    """
+    if isinstance(name, str):
+        if name not in PRIORITY:
+            raise ValueError(f"{name}: Not a valid priority. One of {tuple(PRIORITY)}")
+
+        value = PRIORITY[name]
+    else:
+        value = int(name)
+
+    prev = current_priority()
+    _state.priority = value
+
+    try:
+        yield
+    finally:
+        _state.priority = prev
+
+
+class PriorityScheduler:
+    """
+    Queue requests in front of a rate limiter and release them one at a time
+    in order of priority.
+
+    :param limiter: The rate limiter. Any object with a ``check(key)`` method.
+    :type limiter: bse.limiter.Limiter
+    :param aging: Default 5. Seconds of waiting that promote a request by one priority class.
+    :type aging: float
+
+    Waiting requests age, so a ``bulk`` request is never starved by a steady
+    stream of higher priority requests. It waits at most ``aging`` seconds per priority class.
+    """
+
+    def __init__(self, limiter, aging: float = 5):
+        self.limiter = limiter
+        self.aging = aging
+
+        self.cond = Condition()
+
+        # (priority + enqueue time / aging, seq)
+        self.queue: List[Tuple[float, int]] = []
+        self.seq = count()
+        self.busy = False
+
+    def check(self, key: str = "default"):
+        """
+        Block until the request is first in the queue and the rate limiter allows it.
+
+        :param key: Throttle key. ``default`` or ``lookup``
+        :type key: str
+        """
+
+        # Aging is linear and the same for all entries, so the order of
+        # priority - waited / aging never changes and a static key suffices.
+        entry = (current_priority() + monotonic() / self.aging, next(self.seq))
+
+        with self.cond:
+            heapq.heappush(self.queue, entry)
+
+            while self.busy or self.queue[0] != entry:
+                self.cond.wait()
+
+            heapq.heappop(self.queue)
+            self.busy = True
+
+        try:
+            self.limiter.check(key)
+        finally:
+            with self.cond:
+                self.busy = False
+                self.cond.notify_all()
+
+
+def concurrent_map(
+    fn: Callable[[T], R], items: Iterable[T], max_workers: int = 8
+) -> List[R]:
+    """
+    Call ``fn`` on each item using a thread pool and return the results in order.
+
+    Requests made by ``fn`` keep the priority of the calling thread.
+    The first exception raised by ``fn`` is raised.
+
+    :param fn: Function to call with each item
+    :type fn: Callable
+    :param items: Arguments to ``fn``
+    :type items: Iterable
+    :param max_workers: Default 8. Maximum number of threads.
+    :type max_workers: int
+    :return: List of return values of ``fn``
+    :rtype: list
+    """
+    items = list(items)
+
+    if not items:
+        return []
+
+    level = current_priority()
+
+    def call(item: T) -> R:
+        with priority(level):
+            return fn(item)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(call, items))
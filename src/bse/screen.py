@@ -0,0 +1,220 @@
+"""End of day gainers, losers and group screens computed from a bhavcopy report"""
+
+from __future__ import annotations
+
+import csv
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Literal, Optional
+
+from .compression import open_report
+
+# Lower and upper bounds of absolute percent change for ``pct_change`` buckets
+buckets = {
+    "all": (0, float("inf")),
+    "10": (10, float("inf")),
+    "5": (5, 10),
+    "2": (2, 5),
+    "0": (0, 2),
+}
+
+
+class BhavcopyScreen:
+    """
+    Screen stocks in a bhavcopy report. The report is read once into columns and
+    percent changes are computed for all stocks together.
+
+    :param file: File path of the bhavcopy from :meth:`bse.BSE.bhavcopyReport`. May be compressed.
+    :type file: str or pathlib.Path
+
+    Stocks without a previous close are excluded.
+
+    .. code-block:: python
+
+        from bse.screen import BhavcopyScreen
+
+        screen = BhavcopyScreen(bse.bhavcopyReport(date.today()))
+
+        screen.gainers(group="A", pct_change="5")
+
+        screen.breadth()
+    """
+
+    def __init__(self, file: str | Path):
+        self.scripcode: List[str] = []
+        self.symbol: List[str] = []
+        self.name: List[str] = []
+        self.group: List[str] = []
+
+        self.open = array("d")
+        self.high = array("d")
+        self.low = array("d")
+        self.close = array("d")
+        self.prev_close = array("d")
+        self.volume = array("d")
+        self.value = array("d")
+        self.trades = array("d")
+
+        with open_report(file) as f:
+            for row in csv.DictReader(f):
+                try:
+                    prev_close = float(row["PrvsClsgPric"])
+                    values = (
+                        float(row["OpnPric"]),
+                        float(row["HghPric"]),
+                        float(row["LwPric"]),
+                        float(row["ClsPric"]),
+                        float(row["TtlTradgVol"] or 0),
+                        float(row["TtlTrfVal"] or 0),
+                        float(row["TtlNbOfTxsExctd"] or 0),
+                    )
+                except (KeyError, TypeError, ValueError):
+                    continue
+
+                if prev_close <= 0:
+                    continue
+
+                self.scripcode.append(row["FinInstrmId"].strip())
+                self.symbol.append(row.get("TckrSymb", "").strip())
+                self.name.append(row.get("FinInstrmNm", "").strip())
+                self.group.append(row.get("SctySrs", "").strip())
+
+                self.prev_close.append(prev_close)
+
+                for column, value in zip(
+                    (
+                        self.open,
+                        self.high,
+                        self.low,
+                        self.close,
+                        self.volume,
+                        self.value,
+                        self.trades,
+                    ),
+                    values,
+                ):
+                    column.append(value)
+
+        self.change = array("d", map(float.__sub__, self.close, self.prev_close))
+
+        self.pct_change = array(
+            "d", (c / p * 100 for c, p in zip(self.change, self.prev_close))
+        )
+
+    def __len__(self) -> int:
+        return len(self.scripcode)
+
+    def __row(self, i: int) -> dict:
+        code = self.scripcode[i]
+
+        return {
+            "scrip_cd": int(code) if code.isdigit() else code,
+            "scripname": self.symbol[i],
+            "LONG_NAME": self.name[i],
+            "scrip_grp": self.group[i],
+            "openrate": self.open[i],
+            "highrate": self.high[i],
+            "lowrate": self.low[i],
+            "ltradert": self.close[i],
+            "prevdayclose": self.prev_close[i],
+            "change_val": round(self.change[i], 2),
+            "change_percent": round(self.pct_change[i], 2),
+            # Traded value in lakhs as returned by the API
+            "trd_val": round(self.value[i] / 1e5, 2),
+            "trd_vol": int(self.volume[i]),
+            "nooftrd": int(self.trades[i]),
+        }
+
+    def __select(
+        self,
+        sign: int,
+        group: Optional[str],
+        pct_change: str,
+        scripcodes: Optional[Iterable[str]],
+    ) -> List[dict]:
+        if pct_change not in buckets:
+            raise ValueError(f"{pct_change}: Not a valid pct_change. One of {tuple(buckets)}")
+
+        low, high = buckets[pct_change]
+        group = group.upper() if group else None
+        codes = set(map(str, scripcodes)) if scripcodes is not None else None
+
+        selected = [
+            i
+            for i, pct in enumerate(self.pct_change)
+            if low < pct * sign <= high
+            and (group is None or self.group[i] == group)
+            and (codes is None or self.scripcode[i] in codes)
+        ]
+
+        selected.sort(key=lambda i: self.pct_change[i] * sign, reverse=True)
+
+        return [self.__row(i) for i in selected]
+
+    def gainers(
+        self,
+        group: Optional[str] = None,
+        pct_change: Literal["all", "10", "5", "2", "0"] = "all",
+        scripcodes: Optional[Iterable[str]] = None,
+    ) -> List[dict]:
+        """
+        Stocks that closed higher than the previous close, sorted by percent change.
+
+        :param group: (Optional) BSE stock group ex. ``A``. All groups if not specified.
+        :type group: str or None
+        :param pct_change: Default ``all``. Filter stocks by percent change. One of ``10``, ``5``, ``2``, ``0``.
+        :type pct_change: str
+        :param scripcodes: (Optional) Only include these scrips. Use to screen the constituents of an index.
+        :type scripcodes: Iterable[str] or None
+        :raise ValueError: if ``pct_change`` is not valid
+        :return: List of gainers in the format of :meth:`bse.BSE.gainers`
+        :rtype: list[dict]
+
+        ``pct_change`` buckets are the same as :meth:`bse.BSE.gainers`
+
+        - ``10``: greater than 10%
+        - ``5``: 5% to 10%
+        - ``2``: 2% to 5%
+        - ``0``: upto 2%
+        """
+        return self.__select(1, group, pct_change, scripcodes)
+
+    def losers(
+        self,
+        group: Optional[str] = None,
+        pct_change: Literal["all", "10", "5", "2", "0"] = "all",
+        scripcodes: Optional[Iterable[str]] = None,
+    ) -> List[dict]:
+        """
+        Stocks that closed lower than the previous close, sorted by percent fall.
+
+        ``pct_change`` is the absolute percent fall. See :meth:`.gainers` for parameters.
+
+        :raise ValueError: if ``pct_change`` is not valid
+        :return: List of losers in the format of :meth:`bse.BSE.losers`
+        :rtype: list[dict]
+        """
+        return self.__select(-1, group, pct_change, scripcodes)
+
+    def breadth(self) -> Dict[str, Dict[str, int]]:
+        """
+        Number of advances, declines and unchanged stocks by group.
+
+        :return: Dictionary of group to a dictionary with ``advances``, ``declines`` and ``unchanged`` keys.
+        :rtype: dict[str, dict[str, int]]
+        """
+        result: Dict[str, Dict[str, int]] = {}
+
+        for group, change in zip(self.group, self.change):
+            counts = result.setdefault(
+                group, {"advances": 0, "declines": 0, "unchanged": 0}
+            )
+
+            if change > 0:
+                counts["advances"] += 1
+            elif change < 0:
+                counts["declines"] += 1
+            else:
+                counts["unchanged"] += 1
+
+        return result
@@ -0,0 +1,376 @@
+"""Local full text index over corporate announcements"""
+
+from __future__ import annotations
+
+import json
+import re
+from bisect import bisect_left, bisect_right, insort
+from datetime import date
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .compression import open_report
+from .filestate import write_json
+from .freshness import parse_date
+
+token_regex = re.compile(r"[a-z0-9]+")
+query_regex = re.compile(r'"([^"]*)"|(\S+)')
+
+#: Announcement fields indexed for text search
+text_fields = ("HEADLINE", "NEWSSUB", "CATEGORYNAME", "SUBCATNAME")
+
+# Position gap between fields, so phrases do not match across fields
+field_gap = 1000
+
+# term -> doc id -> positions
+Postings = Dict[str, Dict[int, List[int]]]
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric terms in ``text``"""
+
+    return token_regex.findall(text.lower())
+
+
+def _encode(entries: Dict[int, List[int]]) -> str:
+    """Postings of a term as ``doc:pos,pos;doc:pos``. Decoded faster than JSON lists."""
+
+    return ";".join(f"{i}:{','.join(map(str, pos))}" for i, pos in entries.items())
+
+
+def _decode(text: str) -> Iterator[Tuple[int, List[int]]]:
+    for entry in text.split(";"):
+        i, _, pos = entry.partition(":")
+        yield int(i), [int(p) for p in pos.split(",")]
+
+
+class AnnouncementIndex:
+    """
+    Incremental inverted index over announcements from :meth:`bse.BSE.announcements`.
+
+    Headlines, subjects, categories and subcategories are indexed with term
+    positions for phrase queries. Scripcode, date and category are stored for filters.
+
+    Each call to :meth:`.add` writes the new announcements to a segment file.
+    Announcements already indexed are skipped by ``NEWSID``, so new days are
+    added without rebuilding. Use :meth:`.merge` to compact segments.
+
+    Postings of a term are decoded when the term is first searched. Scripcode,
+    date and category filters are looked up in their own indexes, so filtered
+    searches do not scan the matched announcements.
+
+    :param folder: Dir/folder of the index
+    :type folder: str or pathlib.Path
+
+    .. code-block:: python
+
+        from bse.search import AnnouncementIndex
+
+        index = AnnouncementIndex("./announcements_index")
+
+        index.add_file("announcements.jsonl.gz")
+
+        index.search('buyback "record date"', scripcode=group_a_scripcodes)
+    """
+
+    def __init__(self, folder: str | Path):
+        self.folder = Path(folder)
+
+        if self.folder.is_file():
+            raise ValueError(f"{self.folder}: must be a folder")
+
+        self.folder.mkdir(parents=True, exist_ok=True)
+
+        self.lock = Lock()
+
+        self.docs: List[dict] = []
+        self.postings: Postings = {}
+        self.ids: Set[str] = set()
+        self.segments: List[str] = []
+
+        # term -> encoded postings not decoded yet, with the segment's doc id mapping
+        self.encoded: Dict[str, List[Tuple[str, Dict[int, int]]]] = {}
+
+        # Filter value -> doc ids
+        self.by_scripcode: Dict[str, Set[int]] = {}
+        self.by_date: Dict[str, Set[int]] = {}
+        self.by_category: Dict[str, Set[int]] = {}
+
+        # Sorted keys of by_date
+        self.dates: List[str] = []
+
+        for file in sorted(self.folder.glob("segment_*.json")):
+            self.__load(file.name, json.loads(file.read_text()))
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def __load(self, name: str, segment: dict):
+        # segment doc id -> index doc id. Skips docs in an earlier segment
+        # left behind by an interrupted merge.
+        doc_ids = {}
+
+        for i, doc in enumerate(segment["docs"]):
+            if doc["id"] in self.ids:
+                continue
+
+            doc_id = doc_ids[i] = len(self.docs)
+            self.docs.append(doc)
+            self.ids.add(doc["id"])
+
+            self.by_scripcode.setdefault(doc["scripcode"], set()).add(doc_id)
+            self.by_category.setdefault(doc["category"], set()).add(doc_id)
+
+            if doc["date"] not in self.by_date:
+                self.by_date[doc["date"]] = set()
+                insort(self.dates, doc["date"])
+
+            self.by_date[doc["date"]].add(doc_id)
+
+        for term, text in segment["postings"].items():
+            self.encoded.setdefault(term, []).append((text, doc_ids))
+
+        self.segments.append(name)
+
+    def __term(self, term: str) -> Dict[int, List[int]]:
+        """Postings of ``term``. Decoded on first use."""
+
+        if term in self.encoded:
+            with self.lock:
+                for text, doc_ids in self.encoded.pop(term, ()):
+                    entries = self.postings.setdefault(term, {})
+
+                    for i, positions in _decode(text):
+                        if i in doc_ids:
+                            entries[doc_ids[i]] = positions
+
+        return self.postings.get(term, {})
+
+    @staticmethod
+    def __document(row: dict) -> dict:
+        dt = parse_date(row.get("NEWS_DT") or row.get("DT_TM"))
+
+        return {
+            "id": str(row.get("NEWSID")),
+            "scripcode": str(row.get("SCRIP_CD") or ""),
+            "date": dt.isoformat() if dt else "",
+            "category": str(row.get("CATEGORYNAME") or "").lower(),
+            "row": row,
+        }
+
+    @staticmethod
+    def __postings(docs: List[dict]) -> Postings:
+        postings: Postings = {}
+
+        for i, doc in enumerate(docs):
+            positions: Dict[str, List[int]] = {}
+
+            for n, field in enumerate(text_fields):
+                value = doc["row"].get(field)
+
+                if not value:
+                    continue
+
+                for pos, term in enumerate(tokenize(str(value)), n * field_gap):
+                    positions.setdefault(term, []).append(pos)
+
+            for term, pos in positions.items():
+                postings.setdefault(term, {})[i] = pos
+
+        return postings
+
+    def __write_segment(self, name: str, docs: List[dict], postings: Postings) -> dict:
+        segment = {
+            "docs": docs,
+            "postings": {term: _encode(entries) for term, entries in postings.items()},
+        }
+
+        write_json(self.folder / name, segment)
+
+        return segment
+
+    def add(self, announcements: Iterable[dict]) -> int:
+        """
+        Index announcements not indexed before and save them as a new segment.
+
+        :param announcements: Announcements as returned in ``Table`` of :meth:`bse.BSE.announcements`
+        :type announcements: Iterable[dict]
+        :return: Number of announcements added
+        :rtype: int
+        """
+        with self.lock:
+            docs = []
+            seen = set()
+
+            for row in announcements:
+                doc = self.__document(row)
+
+                if doc["id"] in self.ids or doc["id"] in seen:
+                    continue
+
+                seen.add(doc["id"])
+                docs.append(doc)
+
+            if not docs:
+                return 0
+
+            n = int(self.segments[-1][8:-5]) + 1 if self.segments else 1
+            name = f"segment_{n:06d}.json"
+
+            segment = self.__write_segment(name, docs, self.__postings(docs))
+            self.__load(name, segment)
+
+            return len(docs)
+
+    def add_file(self, path: str | Path) -> int:
+        """
+        Index announcements from a JSONL file written by :class:`bse.sink.AnnouncementSink`
+        or a JSON file of the response of :meth:`bse.BSE.announcements`.
+        Compressed files are supported.
+
+        :param path: File path
+        :type path: str or pathlib.Path
+        :return: Number of announcements added
+        :rtype: int
+        """
+        path = Path(path)
+
+        with open_report(path) as f:
+            if ".jsonl" in path.suffixes:
+                return self.add(json.loads(line) for line in f if line.strip())
+
+            data = json.load(f)
+
+        return self.add(data["Table"] if isinstance(data, dict) else data)
+
+    def merge(self):
+        """Compact all segments into one. Search results are not changed."""
+
+        with self.lock:
+            if len(self.segments) < 2:
+                return
+
+            old = self.segments
+            name = f"segment_{int(old[-1][8:-5]) + 1:06d}.json"
+
+            self.__write_segment(name, self.docs, self.__postings(self.docs))
+
+            for file in old:
+                (self.folder / file).unlink()
+
+            self.segments = [name]
+
+    def __phrase(self, terms: List[str]) -> Set[int]:
+        """Doc ids with ``terms`` at consecutive positions"""
+
+        if not terms:
+            return set(range(len(self.docs)))
+
+        lists = [self.__term(term) for term in terms]
+
+        # Start from the rarest term
+        rarest = min(lists, key=len)
+        result = set(rarest)
+
+        for postings in lists:
+            if postings is not rarest:
+                result = {doc_id for doc_id in result if doc_id in postings}
+
+        if len(terms) == 1:
+            return result
+
+        matches = set()
+
+        for doc_id in result:
+            starts = set(lists[0][doc_id])
+
+            for offset, postings in enumerate(lists[1:], 1):
+                starts &= {pos - offset for pos in postings[doc_id]}
+
+                if not starts:
+                    break
+
+            if starts:
+                matches.add(doc_id)
+
+        return matches
+
+    def search(
+        self,
+        query: str = "",
+        scripcode: str | Iterable[str] | None = None,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+        category: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[dict]:
+        """
+        Search indexed announcements.
+
+        All terms and phrases in ``query`` must match. Enclose phrases in double quotes.
+        Matching is case insensitive.
+
+        :param query: (Optional) Search terms and phrases ex. ``buyback "record date"``. Matches all if empty.
+        :type query: str
+        :param scripcode: (Optional) Scripcode or list of scripcodes to filter by
+        :type scripcode: str or Iterable[str] or None
+        :param from_date: (Optional) Announcements on or after this date
+        :type from_date: datetime.date or None
+        :param to_date: (Optional) Announcements on or before this date
+        :type to_date: datetime.date or None
+        :param category: (Optional) Category name ex. ``Company Update``
+        :type category: str or None
+        :param limit: (Optional) Maximum number of results
+        :type limit: int or None
+        :return: Matching announcements, latest first
+        :rtype: list[dict]
+        """
+        matched: Optional[Set[int]] = None
+
+        for phrase, term in query_regex.findall(query):
+            terms = tokenize(phrase or term)
+
+            if not terms:
+                continue
+
+            ids = self.__phrase(terms)
+            matched = ids if matched is None else matched & ids
+
+            if not matched:
+                return []
+
+        if isinstance(scripcode, (str, int)):
+            scripcode = [scripcode]
+
+        if scripcode is not None:
+            ids = set()
+
+            for code in scripcode:
+                ids |= self.by_scripcode.get(str(code), set())
+
+            matched = ids if matched is None else matched & ids
+
+        if category:
+            ids = self.by_category.get(category.lower(), set())
+            matched = ids if matched is None else matched & ids
+
+        # Dates in range. Announcements without a date only match without from_date
+        dates = self.dates
+        lo = bisect_left(dates, from_date.isoformat()) if from_date else 0
+        hi = bisect_right(dates, to_date.isoformat()) if to_date else len(dates)
+
+        rows = []
+
+        for day in reversed(dates[lo:hi]):
+            ids = self.by_date[day]
+
+            if matched is not None:
+                ids = ids & matched
+
+            rows.extend(self.docs[doc_id]["row"] for doc_id in sorted(ids))
+
+            if limit is not None and len(rows) >= limit:
+                break
+
+        return rows[:limit]
@@ -0,0 +1,278 @@
+"""Incremental sync of the list of securities into a local SQLite snapshot"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from datetime import datetime
+from itertools import product
+from pathlib import Path
+from threading import Lock
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set, Tuple
+
+from .scheduler import concurrent_map, priority
+
+if TYPE_CHECKING:
+    from .BSE import BSE
+
+
+class SecuritySync:
+    """
+    Keep a snapshot of :meth:`bse.BSE.listSecurities` in a SQLite database and
+    report what changed on each sync.
+
+    Securities are keyed by ``SCRIP_CD``. Only new, changed and removed rows
+    are written, and each change is logged in the ``changes`` table, so
+    downstream caches can be invalidated per scrip.
+
+    :param bse: An instance of BSE
+    :type bse: bse.BSE
+    :param path: (Optional) SQLite database file. Defaults to ``securities.db`` in ``BSE.dir``
+    :type path: str or pathlib.Path or None
+
+    Fields in ``volatile`` like ``Mktcap`` change daily. They are not compared
+    and are saved only when another field of the row changes.
+
+    .. code-block:: python
+
+        with BSE("./") as bse:
+            result = SecuritySync(bse).sync()
+
+            for row in result["new"]:
+                print("Listed", row["scrip_id"])
+
+            for scripcode in result["delisted"]:
+                print("Delisted", scripcode)
+    """
+
+    volatile = ("Mktcap",)
+
+    segments = ("Equity",)
+    statuses = ("Active", "Suspended", "Delisted")
+
+    def __init__(self, bse: "BSE", path: str | Path | None = None):
+        self.bse = bse
+        self.path = Path(path) if path else bse.dir / "securities.db"
+        self.lock = Lock()
+
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+
+        with self.db:
+            self.db.execute(
+                """CREATE TABLE IF NOT EXISTS securities (
+                    scripcode TEXT PRIMARY KEY,
+                    status TEXT,
+                    segment TEXT,
+                    data TEXT NOT NULL,
+                    updated TEXT NOT NULL
+                )"""
+            )
+
+            self.db.execute(
+                """CREATE TABLE IF NOT EXISTS changes (
+                    time TEXT NOT NULL,
+                    scripcode TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    fields TEXT
+                )"""
+            )
+
+    def close(self):
+        """Close the database"""
+
+        self.db.close()
+
+    def get(self, scripcode: str) -> Optional[dict]:
+        """
+        Stored row of ``scripcode``
+
+        :param scripcode: BSE scrip code
+        :type scripcode: str
+        :return: Row as returned by :meth:`bse.BSE.listSecurities` or None
+        :rtype: dict or None
+        """
+        with self.lock:
+            row = self.db.execute(
+                "SELECT data FROM securities WHERE scripcode = ?", (str(scripcode),)
+            ).fetchone()
+
+        return json.loads(row[0]) if row else None
+
+    def all(self, status: Optional[str] = None) -> List[dict]:
+        """
+        All stored rows
+
+        :param status: (Optional) Filter by status ex. ``Active``
+        :type status: str or None
+        :rtype: list[dict]
+        """
+        query = "SELECT data FROM securities"
+        args: Tuple = ()
+
+        if status:
+            query += " WHERE status = ?"
+            args = (status,)
+
+        with self.lock:
+            rows = self.db.execute(query, args).fetchall()
+
+        return [json.loads(row[0]) for row in rows]
+
+    def fetch(
+        self,
+        segments: Iterable[str] = segments,
+        statuses: Iterable[str] = statuses,
+        groups: Iterable[str] = ("",),
+    ) -> Dict[str, dict]:
+        """
+        Fetch securities for all combinations of segment, status and group concurrently
+        in ``bulk`` priority.
+
+        :param segments: Default ``("Equity",)``. See ``bse.constants.SEGMENT``
+        :type segments: Iterable[str]
+        :param statuses: Default all statuses. See ``bse.constants.STATUS``
+        :type statuses: Iterable[str]
+        :param groups: Default all groups in a single request per segment and status.
+        :type groups: Iterable[str]
+        :raise TimeoutError: if request timed out with no response
+        :raise ConnectionError: in case of HTTP error or server returns error response.
+        :return: Dictionary of scripcode to row
+        :rtype: dict[str, dict]
+        """
+        return self.__fetch(segments, statuses, groups)[0]
+
+    def __fetch(
+        self, segments: Iterable[str], statuses: Iterable[str], groups: Iterable[str]
+    ) -> Tuple[Dict[str, dict], Set[Tuple[str, str, str]]]:
+        """Rows by scripcode and the lowercase (segment, status, group) combinations
+        that returned rows. An empty group stands for all groups."""
+
+        def fetch(args: Tuple[str, str, str]) -> List[dict]:
+            segment, status, group = args
+
+            return self.bse.listSecurities(group=group, segment=segment, status=status)
+
+        combinations = list(product(segments, statuses, groups))
+
+        with priority("bulk"):
+            results = concurrent_map(fetch, combinations)
+
+        rows = {}
+        listed = set()
+
+        for (segment, status, group), result in zip(combinations, results):
+            if not result:
+                continue
+
+            listed.add((segment.lower(), status.lower(), (group or "").lower()))
+
+            for row in result:
+                rows[str(row["SCRIP_CD"]).strip()] = row
+
+        return rows, listed
+
+    def __diff(self, old: dict, new: dict) -> Dict[str, list]:
+        return {
+            key: [old.get(key), new.get(key)]
+            for key in set(old) | set(new)
+            if key not in self.volatile and old.get(key) != new.get(key)
+        }
+
+    def sync(
+        self,
+        segments: Iterable[str] = segments,
+        statuses: Iterable[str] = statuses,
+        groups: Iterable[str] = ("",),
+    ) -> Dict[str, list]:
+        """
+        Fetch securities, compare them with the snapshot and save the changes.
+
+        See :meth:`.fetch` for parameters. Stored securities of the synced segments
+        and statuses that are no longer listed are removed. Segments and statuses
+        are compared ignoring case.
+
+        When synced by group, only stored securities of those groups are removed.
+        If a segment, status and group returned no rows, its stored securities are kept.
+        An empty response is more likely an API error than every security being removed.
+
+        :raise TimeoutError: if request timed out with no response
+        :raise ConnectionError: in case of HTTP error or server returns error response.
+        :return: Dictionary with keys
+
+            - ``new``: Rows of securities not in the snapshot
+            - ``suspended``: Scripcodes whose status changed to Suspended
+            - ``delisted``: Scripcodes whose status changed to Delisted
+            - ``changed``: List of dictionaries with ``scripcode`` and ``fields``, a dictionary of field name to [old, new] values. Includes status changes.
+            - ``removed``: Scripcodes no longer returned by BSE
+
+        :rtype: dict[str, list]
+        """
+        current, listed = self.__fetch(segments, statuses, groups)
+
+        result: Dict[str, list] = {
+            "new": [],
+            "suspended": [],
+            "delisted": [],
+            "changed": [],
+            "removed": [],
+        }
+
+        now = datetime.now().isoformat(timespec="seconds")
+        writes = []
+        changes = []
+
+        with self.lock:
+            stored = {
+                code: (json.loads(data), status, segment)
+                for code, data, status, segment in self.db.execute(
+                    "SELECT scripcode, data, status, segment FROM securities"
+                )
+            }
+
+            for code, row in current.items():
+                status = row.get("Status")
+
+                if code not in stored:
+                    result["new"].append(row)
+                    changes.append((now, code, "new", None))
+                    writes.append((code, status, row.get("Segment"), json.dumps(row), now))
+                    continue
+
+                fields = self.__diff(stored[code][0], row)
+
+                if not fields:
+                    continue
+
+                if "Status" in fields:
+                    if str(status).lower() == "suspended":
+                        result["suspended"].append(code)
+                    elif str(status).lower() == "delisted":
+                        result["delisted"].append(code)
+
+                result["changed"].append({"scripcode": code, "fields": fields})
+                changes.append((now, code, "changed", json.dumps(fields)))
+                writes.append((code, status, row.get("Segment"), json.dumps(row), now))
+
+            for code, (data, status, segment) in stored.items():
+                key = (str(segment).lower(), str(status).lower())
+                group = str(data.get("GROUP") or "").strip().lower()
+
+                if code not in current and (
+                    (*key, "") in listed or (*key, group) in listed
+                ):
+                    result["removed"].append(code)
+                    changes.append((now, code, "removed", None))
+
+            with self.db:
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO securities VALUES (?, ?, ?, ?, ?)", writes
+                )
+
+                self.db.executemany(
+                    "DELETE FROM securities WHERE scripcode = ?",
+                    [(code,) for code in result["removed"]],
+                )
+
+                self.db.executemany("INSERT INTO changes VALUES (?, ?, ?, ?)", changes)
+
+        return result
@@ -0,0 +1,120 @@
+"""Save and restore session cookies and headers between processes"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from time import time
+
+from requests import Session
+
+from .filestate import read_json, update_json
+
+
+class SessionState:
+    """
+    Persist the cookies and headers of a :class:`requests.Session` to a JSON file.
+
+    Cookies past their expiry are not restored. Cookies without an expiry
+    (session cookies) are restored only if the file was saved within ``ttl`` seconds.
+
+    Processes sharing the file merge their state on save. Cookies and headers of
+    the saving session replace those with the same name. Others are kept.
+
+    :param path: JSON file to save the session state
+    :type path: str or pathlib.Path
+    :param ttl: Default 6 hours. Seconds for which session cookies are restored.
+    :type ttl: float
+    """
+
+    def __init__(self, path: str | Path, ttl: float = 6 * 3600):
+        self.path = Path(path)
+        self.ttl = ttl
+
+    def load(self, session: Session) -> int:
+        """
+        Restore saved cookies and headers into ``session``.
+        Headers already set on ``session`` are not replaced.
+
+        :param session: The session to restore
+        :type session: requests.Session
+        :return: Number of cookies restored
+        :rtype: int
+        """
+        # Missing or corrupt file. Start with a cold session
+        state = read_json(self.path)
+
+        if not isinstance(state, dict):
+            return 0
+
+        now = time()
+        fresh = now - state.get("saved", 0) < self.ttl
+
+        for key, value in state.get("headers", {}).items():
+            if key not in session.headers:
+                session.headers[key] = value
+
+        count = 0
+
+        for cookie in state.get("cookies", []):
+            expires = cookie["expires"]
+
+            if (expires is None and not fresh) or (expires is not None and expires <= now):
+                continue
+
+            session.cookies.set(
+                cookie["name"],
+                cookie["value"],
+                domain=cookie["domain"],
+                path=cookie["path"],
+                expires=expires,
+                secure=cookie["secure"],
+            )
+            count += 1
+
+        return count
+
+    def save(self, session: Session):
+        """
+        Save cookies and headers of ``session``. The file is readable only by the owner.
+
+        :param session: The session to save
+        :type session: requests.Session
+        """
+        now = time()
+
+        cookies = {
+            (cookie.name, cookie.domain, cookie.path): {
+                "name": cookie.name,
+                "value": cookie.value,
+                "domain": cookie.domain,
+                "path": cookie.path,
+                "expires": cookie.expires,
+                "secure": cookie.secure,
+            }
+            for cookie in session.cookies
+            if not cookie.is_expired()
+        }
+
+        def merge(state: dict) -> dict:
+            if not isinstance(state, dict):
+                state = {}
+
+            fresh = now - state.get("saved", 0) < self.ttl
+
+            # Keep live cookies saved by other processes
+            merged = {
+                (c["name"], c["domain"], c["path"]): c
+                for c in state.get("cookies", [])
+                if (c["expires"] is None and fresh)
+                or (c["expires"] is not None and c["expires"] > now)
+            }
+
+            merged.update(cookies)
+
+            return {
+                "saved": now,
+                "headers": {**state.get("headers", {}), **session.headers},
+                "cookies": list(merged.values()),
+            }
+
+        update_json(self.path, merge, {}, mode=0o600)
@@ -0,0 +1,291 @@
+"""Stream paginated announcements to an append only JSONL file with checkpoints"""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, List, Optional, Set
+
+from .compression import Compression, open_report, open_writer, suffix
+from .filestate import read_json, write_json
+
+if TYPE_CHECKING:
+    from .BSE import BSE
+
+
+class AnnouncementSink:
+    """
+    Write :meth:`bse.BSE.announcements` to a JSONL file, one announcement
+    per line, page by page.
+
+    After each page is written, the number of announcements and file size are
+    saved to a checkpoint file alongside (``<path>.ckpt``). If a run is interrupted,
+    the next run truncates any partially written page and resumes after the last
+    saved announcement. Only one page is held in memory at a time, and the
+    checkpoint size does not grow with the number of announcements.
+
+    A file holds the announcements of one query, the dates and other arguments
+    to :meth:`.run`. Use a file per query, like a file per date.
+
+    BSE lists announcements newest first. Each run first reads from page 1 until
+    it reaches the newest announcement already saved, so runs during the day pick
+    up announcements filed since. Once complete, runs for past dates make no requests.
+
+    :param bse: An instance of BSE
+    :type bse: bse.BSE
+    :param path: File path of the JSONL file. The compression suffix is added if ``compress`` is specified.
+    :type path: str or pathlib.Path
+    :param compress: (Optional) One of ``gzip`` or ``zstd``. Each page is compressed as it is written.
+    :type compress: str or None
+    :raise ValueError: if ``compress`` is not a valid compression format
+
+    .. code-block:: python
+
+        from bse.sink import AnnouncementSink
+
+        with BSE("./") as bse:
+            sink = AnnouncementSink(bse, "announcements.jsonl", compress="gzip")
+
+            count = sink.run(from_date=datetime(2023, 10, 20), to_date=datetime(2023, 10, 20))
+
+            for announcement in sink.read():
+                print(announcement["HEADLINE"])
+
+    """
+
+    def __init__(
+        self, bse: "BSE", path: str | Path, compress: Compression = None
+    ):
+        self.bse = bse
+        self.compress = compress
+
+        path = Path(path)
+        self.path = path.with_name(path.name + suffix(compress))
+        self.checkpoint_file = self.path.with_name(self.path.name + ".ckpt")
+
+    def checkpoint(self) -> Optional[dict]:
+        """
+        Last saved checkpoint
+
+        :return: Dictionary with ``query``, ``offset``, ``rows``, ``total``, ``page_size``,
+            ``head`` (ids of the newest page saved) and ``tail`` (ids of the last page saved) keys or None
+        :rtype: dict or None
+        """
+        return read_json(self.checkpoint_file)
+
+    @staticmethod
+    def __id(row: dict) -> str:
+        news_id = row.get("NEWSID")
+
+        return str(news_id) if news_id else json.dumps(row, sort_keys=True)
+
+    def __write(self, rows: List[dict]):
+        if rows:
+            with open_writer(self.path, self.compress, append=True) as f:
+                for row in rows:
+                    f.write(json.dumps(row).encode() + b"\n")
+
+    def __size(self) -> int:
+        return self.path.stat().st_size if self.path.exists() else 0
+
+    def run(
+        self,
+        from_date: datetime | None = None,
+        to_date: datetime | None = None,
+        max_pages: Optional[int] = None,
+        **kwargs,
+    ) -> int:
+        """
+        Fetch announcements page by page and append them to the file.
+        Resumes from the last checkpoint.
+
+        :param from_date: (Optional) From date. Defaults to today
+        :type from_date: datetime.datetime or None
+        :param to_date: (Optional) To date. Defaults to today
+        :type to_date: datetime.datetime or None
+        :param max_pages: (Optional) Stop after fetching ``max_pages`` pages in this run.
+        :type max_pages: int or None
+        :param kwargs: Other keyword arguments to :meth:`bse.BSE.announcements`
+        :raise ValueError: if ``from_date`` is greater than ``to_date``, or the file
+            holds announcements of a different query or was not written by the sink
+        :raise TimeoutError: if request timed out with no response
+        :raise ConnectionError: in case of HTTP error or server returns error response.
+        :return: Number of announcements written in this run
+        :rtype: int
+        """
+        now = datetime.now()
+        from_date = from_date or now
+        to_date = to_date or now
+
+        if from_date > to_date:
+            raise ValueError("'from_date' cannot be greater than 'to_date'")
+
+        query = {
+            "from_date": from_date.strftime("%Y%m%d"),
+            "to_date": to_date.strftime("%Y%m%d"),
+            **kwargs,
+        }
+
+        state = self.checkpoint()
+
+        if state is None:
+            if self.path.exists() and self.path.stat().st_size:
+                raise ValueError(f"{self.path.name}: File exists and has no checkpoint")
+
+            state = {
+                "query": query,
+                "offset": 0,
+                "rows": 0,
+                "total": None,
+                "page_size": None,
+                "head": [],
+                "tail": [],
+            }
+
+            # Saved before the first write. A file with a checkpoint belongs to the sink
+            write_json(self.checkpoint_file, state)
+        elif state["query"] != query:
+            raise ValueError(
+                f"{self.path.name}: Has announcements of a different query "
+                f"{state['query']}. Use a file per query."
+            )
+
+        # Discard a partially written page
+        if self.path.exists():
+            with self.path.open("r+b") as f:
+                f.truncate(state["offset"])
+
+        complete = state["total"] is not None and state["rows"] >= state["total"]
+
+        # Announcements of past days do not change
+        if complete and to_date.date() < now.date():
+            return 0
+
+        written = pages = 0
+
+        def fetch(page_no: int) -> List[dict]:
+            nonlocal pages
+
+            pages += 1
+
+            data = self.bse.announcements(
+                page_no=page_no, from_date=from_date, to_date=to_date, **kwargs
+            )
+
+            rows = data.get("Table") or []
+
+            if data.get("Table1"):
+                state["total"] = int(data["Table1"][0]["ROWCNT"])
+
+            if rows:
+                state["page_size"] = max(state["page_size"] or 0, len(rows))
+
+            return rows
+
+        if state["head"]:
+            # Announcements filed since the last run are listed before the newest saved
+            head = set(state["head"])
+            previous: Set[str] = set()
+            first_page: Optional[List[str]] = None
+            page_no = new = 0
+            reached = False
+
+            while max_pages is None or pages < max_pages:
+                page_no += 1
+                rows = fetch(page_no)
+                ids = [self.__id(row) for row in rows]
+
+                if first_page is None:
+                    first_page = ids
+
+                known = next(
+                    (i for i, news_id in enumerate(ids) if news_id in head), len(ids)
+                )
+
+                # Skip rows pushed down from the previous page by newer announcements
+                batch = [
+                    row
+                    for row, news_id in zip(rows[:known], ids)
+                    if news_id not in previous
+                ]
+
+                self.__write(batch)
+                new += len(batch)
+                previous = set(ids)
+
+                if known < len(ids) or not rows:
+                    reached = True
+                    break
+
+            if not reached:
+                # Stopped by max_pages. Discard and read these pages again next run
+                if self.path.exists():
+                    with self.path.open("r+b") as f:
+                        f.truncate(state["offset"])
+
+                return 0
+
+            if first_page:
+                state["head"] = first_page
+
+            state["rows"] += new
+            state["offset"] = self.__size()
+            write_json(self.checkpoint_file, state)
+
+            written += new
+
+        # Older announcements not saved yet
+        while max_pages is None or pages < max_pages:
+            if state["total"] is not None and state["rows"] >= state["total"]:
+                break
+
+            page_size = state["page_size"]
+            page_no, skip = divmod(state["rows"], page_size) if page_size else (0, 0)
+
+            rows = fetch(page_no + 1)
+
+            if not rows:
+                break
+
+            ids = [self.__id(row) for row in rows]
+            saved = set(state["head"]) | set(state["tail"])
+
+            batch = [
+                (row, news_id)
+                for row, news_id in zip(rows[skip:], ids[skip:])
+                if news_id not in saved
+            ]
+
+            if not batch:
+                break
+
+            self.__write([row for row, _ in batch])
+
+            if not state["head"]:
+                state["head"] = ids
+
+            state["tail"] = [news_id for _, news_id in batch]
+            state["rows"] += len(batch)
+            state["offset"] = self.__size()
+            write_json(self.checkpoint_file, state)
+
+            written += len(batch)
+
+        return written
+
+    def read(self) -> Iterator[dict]:
+        """
+        Iterate over announcements written to the file.
+        After an interrupted run, call :meth:`.run` first to discard any partially written page.
+
+        :return: Generator of announcements
+        :rtype: Iterator[dict]
+        """
+        if not self.path.exists():
+            return
+
+        with open_report(self.path) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
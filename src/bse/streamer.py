@@ -0,0 +1,175 @@
+"""Poll quotes for many scrips and emit only the values that changed"""
+
+from __future__ import annotations
+
+import heapq
+from datetime import datetime
+from time import monotonic, sleep
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .BSE import BSE
+
+
+class QuoteScheduler:
+    """
+    Round robin scheduler deciding which scrip to poll next.
+
+    Each scrip becomes due ``interval`` seconds after its last poll. Lower
+    ``priority`` values are served first, as with :func:`bse.priority`. Among due
+    scrips, each unit of ``priority`` counts as having waited ``aging`` seconds
+    less, and the scrip that has waited longest is returned first. Scrips of
+    equal priority are returned in the order they became due.
+
+    When more scrips are due than the throttle allows, scrips with a higher
+    ``priority`` value are polled less often but never starved: once a scrip has
+    waited ``aging`` seconds per unit of priority difference, it is served ahead
+    of newly due scrips with a lower value. Scrips of equal priority share the
+    budget equally.
+
+    :param max_interval: Maximum seconds to wait before retrying a scrip that failed.
+    :type max_interval: float
+    :param aging: Default 5. Seconds of waiting equivalent to one level of priority.
+    :type aging: float
+    """
+
+    def __init__(self, max_interval: float = 60, aging: float = 5):
+        self.max_interval = max_interval
+        self.aging = aging
+
+        # (due, seq, scripcode)
+        self.waiting: List[Tuple[float, int, str]] = []
+
+        # (due + priority * aging, seq, scripcode)
+        self.ready: List[Tuple[float, int, str]] = []
+
+        self.interval: Dict[str, float] = {}
+        self.priority: Dict[str, int] = {}
+        self.failures: Dict[str, int] = {}
+        self.seq = 0
+
+    def __len__(self):
+        return len(self.interval)
+
+    def add(self, scripcode: str, interval: float = 1, priority: int = 0):
+        """
+        Add a scrip to the schedule. It is due immediately.
+
+        :param scripcode: BSE scrip code
+        :type scripcode: str
+        :param interval: Minimum seconds between polls
+        :type interval: float
+        :param priority: Default 0. Lower values are polled first when several are due.
+            See ``aging``.
+        :type priority: int
+        """
+        if scripcode in self.interval:
+            raise ValueError(f"{scripcode}: already scheduled")
+
+        self.interval[scripcode] = interval
+        self.priority[scripcode] = priority
+        self.failures[scripcode] = 0
+        self._push(scripcode, monotonic())
+
+    def _push(self, scripcode: str, due: float):
+        self.seq += 1
+        heapq.heappush(self.waiting, (due, self.seq, scripcode))
+
+    def next(self) -> str:
+        """
+        Return the next scrip to poll, sleeping until one is due.
+
+        :raise IndexError: if the schedule is empty
+        :return: BSE scrip code
+        :rtype: str
+        """
+        if not self.waiting and not self.ready:
+            raise IndexError("No scrips scheduled")
+
+        while True:
+            now = monotonic()
+
+            while self.waiting and self.waiting[0][0] <= now:
+                due, seq, code = heapq.heappop(self.waiting)
+                rank = due + self.priority[code] * self.aging
+                heapq.heappush(self.ready, (rank, seq, code))
+
+            if self.ready:
+                return heapq.heappop(self.ready)[-1]
+
+            sleep(self.waiting[0][0] - now)
+
+    def done(self, scripcode: str, failed: bool = False):
+        """
+        Reschedule ``scripcode`` after a poll. Failed polls are retried with
+        exponential backoff upto ``max_interval``.
+
+        :param scripcode: BSE scrip code
+        :type scripcode: str
+        :param failed: True if the poll failed.
+        :type failed: bool
+        """
+        interval = self.interval[scripcode]
+
+        if failed:
+            self.failures[scripcode] += 1
+            interval = min(
+                interval * 2 ** self.failures[scripcode],
+                max(self.max_interval, interval),
+            )
+        else:
+            self.failures[scripcode] = 0
+
+        self._push(scripcode, monotonic() + interval)
+
+
+def stream_quotes(
+    bse: "BSE",
+    scripcodes: Iterable[str],
+    interval: float | Dict[str, float] = 1,
+    priority: Optional[Dict[str, int]] = None,
+) -> Iterator[dict]:
+    """
+    Poll quotes for ``scripcodes`` and yield an event when a value changes.
+
+    See :meth:`bse.BSE.stream_quotes`
+    """
+    scheduler = QuoteScheduler()
+    priority = priority or {}
+
+    for code in scripcodes:
+        code = str(code)
+        scheduler.add(
+            code,
+            interval=interval.get(code, 1) if isinstance(interval, dict) else interval,
+            priority=priority.get(code, 0),
+        )
+
+    last: Dict[str, Dict[str, float]] = {}
+
+    while True:
+        code = scheduler.next()
+
+        try:
+            quote = bse.quote(code)
+        except (TimeoutError, ConnectionError):
+            scheduler.done(code, failed=True)
+            continue
+
+        scheduler.done(code)
+
+        prev = last.get(code, {})
+
+        changed = {k: v for k, v in quote.items() if prev.get(k) != v}
+
+        if not changed:
+            continue
+
+        last[code] = quote
+
+        yield {
+            "scripcode": code,
+            "time": datetime.now(),
+            "changed": changed,
+            "quote": quote,
+        }
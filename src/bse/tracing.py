@@ -0,0 +1,174 @@
+"""Tracing spans for the phases of a request"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from itertools import count
+from threading import Lock, local
+from time import time
+from typing import Dict, Iterator, List, Optional
+
+_ids = count(1)
+
+
+class Span:
+    """
+    A timed phase of a request.
+
+    Span names used by BSE:
+
+    - ``request``: A call to the BSE API. Parent of the phases below
+    - ``throttle``: Time waiting for the rate limiter
+    - ``ttfb``: Time from sending the request to receiving response headers. Includes connection set-up.
+    - ``transfer``: Time receiving the response body
+    - ``download``: Time streaming a file download to disk
+    - ``decode``: Time decoding the JSON or text response
+
+    Attributes include ``endpoint``, ``params``, ``status`` and ``error`` where applicable.
+
+    :param name: Name of the span
+    :type name: str
+    :param attributes: Span attributes
+    :type attributes: dict
+    :param parent: (Optional) Parent span
+    :type parent: Span or None
+    """
+
+    __slots__ = ("name", "attributes", "id", "parent_id", "trace_id", "start", "end")
+
+    def __init__(self, name: str, attributes: dict, parent: Optional["Span"] = None):
+        self.name = name
+        self.attributes = attributes
+        self.id = next(_ids)
+        self.parent_id = parent.id if parent else None
+        self.trace_id = parent.trace_id if parent else self.id
+
+        #: Unix timestamps in seconds
+        self.start = time()
+        self.end: Optional[float] = None
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds"""
+
+        return (self.end or time()) - self.start
+
+    def __repr__(self):
+        return f"Span({self.name!r}, {self.duration * 1000:.1f}ms, {self.attributes})"
+
+
+class Exporter:
+    """
+    Receives completed spans. Subclass and override :meth:`.export`
+    to forward spans to a tracing system like OpenTelemetry.
+
+    ``export`` is called from the thread that made the request
+    and must be thread safe.
+    """
+
+    def export(self, span: Span):
+        """
+        Called with each completed span.
+
+        :param span: A completed span
+        :type span: Span
+        """
+        raise NotImplementedError
+
+
+class MemoryExporter(Exporter):
+    """Keep completed spans in memory in a list ``spans``"""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self.lock = Lock()
+
+    def export(self, span: Span):
+        with self.lock:
+            self.spans.append(span)
+
+
+class Tracer:
+    """
+    Create spans and pass them to an exporter once complete.
+    Spans are not created if no exporter is set.
+
+    :param exporter: (Optional) Exporter of completed spans
+    :type exporter: Exporter or None
+
+    .. code-block:: python
+
+        from bse.tracing import MemoryExporter
+
+        exporter = MemoryExporter()
+        bse.tracer.exporter = exporter
+
+        bse.quote("500180")
+
+        for span in exporter.spans:
+            print(span)
+    """
+
+    def __init__(self, exporter: Optional[Exporter] = None):
+        self.exporter = exporter
+        self._state = local()
+
+    def current(self) -> Optional[Span]:
+        """Innermost active span in the current thread"""
+
+        return getattr(self._state, "span", None)
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Optional[Span]]:
+        """
+        Context manager that times its block as a span.
+        The span is a child of the active span in the current thread.
+
+        :param name: Name of the span
+        :type name: str
+        :param attributes: Span attributes
+        :return: The span or None if no exporter is set
+        :rtype: Span or None
+        """
+        if self.exporter is None:
+            yield None
+            return
+
+        parent = self.current()
+        span = Span(name, attributes, parent)
+        self._state.span = span
+
+        try:
+            yield span
+        except BaseException as e:
+            span.attributes["error"] = repr(e)
+            raise
+        finally:
+            self._state.span = parent
+            span.end = time()
+            self.exporter.export(span)
+
+    def record(self, name: str, start: float, end: float, **attributes):
+        """
+        Export a span of a phase already timed, as a child of the active span.
+
+        :param name: Name of the span
+        :type name: str
+        :param start: Unix timestamp of the start
+        :type start: float
+        :param end: Unix timestamp of the end
+        :type end: float
+        :param attributes: Span attributes
+        """
+        if self.exporter is None:
+            return
+
+        span = Span(name, attributes, self.current())
+        span.start, span.end = start, end
+        self.exporter.export(span)
+
+
+def params_attribute(params: Optional[Dict]) -> Dict[str, str]:
+    """Request params as a dictionary of strings for use as a span attribute"""
+
+    return {k: str(v) for k, v in params.items()} if params else {}
@@ -0,0 +1,214 @@
+"""Trading calendar that learns BSE holidays from report availability"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Set
+
+from .filestate import read_json, update_json
+
+
+def as_date(dt: date) -> date:
+    """Return the date part of a datetime or date"""
+
+    return dt.date() if isinstance(dt, datetime) else dt
+
+
+class TradingCalendar:
+    """
+    Local calendar of trading days and holidays.
+
+    Weekends are never trading days. Other days are assumed to be trading days
+    unless learned to be a holiday. Holidays are learned only from sources that
+    prove the market was closed: empty index data for a past date, or two
+    different daily reports missing for a past date. They are saved to ``path``.
+
+    A single report may be missing on a trading day. Its absence is recorded
+    per report with :meth:`.add_unavailable` and does not make the date a holiday.
+
+    :param path: JSON file to persist the calendar
+    :type path: str or pathlib.Path
+
+    BSE occasionally holds special sessions on weekends like Muhurat trading.
+    Use :meth:`.add_trading_day` to record them.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.lock = Lock()
+
+        self.holidays: Set[date] = set()
+        self.trading: Set[date] = set()
+
+        # report name -> dates the report is known to be unavailable
+        self.unavailable: Dict[str, Set[date]] = {}
+
+        self.__merge(read_json(self.path, {}))
+
+    def __merge(self, data: dict):
+        """Add dates saved by another process. Trading days override holidays."""
+
+        self.trading.update(map(date.fromisoformat, data.get("trading_days", [])))
+        self.holidays.update(map(date.fromisoformat, data.get("holidays", [])))
+        self.holidays -= self.trading
+
+        for report, dates in data.get("unavailable", {}).items():
+            self.unavailable.setdefault(report, set()).update(
+                map(date.fromisoformat, dates)
+            )
+
+    def __save(self):
+        """Merge with the file under a file lock, so dates saved by other processes are kept"""
+
+        def merge(data: dict) -> dict:
+            self.__merge(data)
+
+            return {
+                "holidays": sorted(d.isoformat() for d in self.holidays),
+                "trading_days": sorted(d.isoformat() for d in self.trading),
+                "unavailable": {
+                    report: sorted(d.isoformat() for d in dates)
+                    for report, dates in self.unavailable.items()
+                },
+            }
+
+        update_json(self.path, merge, {})
+
+    def is_trading_day(self, dt: date) -> bool:
+        """
+        Check if ``dt`` is a trading day. No network request is made.
+
+        :param dt: Date to check
+        :type dt: datetime.date
+        :return: False if ``dt`` is a weekend or a known holiday else True
+        :rtype: bool
+        """
+        dt = as_date(dt)
+
+        if dt in self.trading:
+            return True
+
+        return dt.weekday() < 5 and dt not in self.holidays
+
+    def is_known(self, dt: date) -> bool:
+        """
+        Check if ``dt`` was confirmed as a holiday or trading day
+
+        :param dt: Date to check
+        :type dt: datetime.date
+        :rtype: bool
+        """
+        dt = as_date(dt)
+
+        return dt in self.trading or dt in self.holidays
+
+    def trading_days(self, from_date: date, to_date: date) -> List[date]:
+        """
+        List of trading days between ``from_date`` and ``to_date`` inclusive.
+
+        :param from_date: From date.
+        :type from_date: datetime.date
+        :param to_date: To date.
+        :type to_date: datetime.date
+        :raise ValueError: if ``from_date`` is greater than ``to_date``
+        :return: Sorted list of dates
+        :rtype: list[datetime.date]
+        """
+        start, end = as_date(from_date), as_date(to_date)
+
+        if start > end:
+            raise ValueError("'from_date' cannot be greater than 'to_date'")
+
+        days = []
+
+        while start <= end:
+            if self.is_trading_day(start):
+                days.append(start)
+
+            start += timedelta(1)
+
+        return days
+
+    def add_holiday(self, dt: date):
+        """
+        Record ``dt`` as a holiday. Dates today or in future are ignored,
+        as reports may not be published yet. Confirmed trading days are not changed.
+
+        :param dt: Date of holiday
+        :type dt: datetime.date
+        """
+        dt = as_date(dt)
+
+        if dt >= date.today() or dt.weekday() > 4:
+            return
+
+        with self.lock:
+            if dt in self.holidays or dt in self.trading:
+                return
+
+            self.holidays.add(dt)
+            self.trading.discard(dt)
+            self.__save()
+
+    def is_unavailable(self, report: str, dt: date) -> bool:
+        """
+        Check if ``report`` is known to be unavailable for ``dt``
+
+        :param report: Report name ex. ``delivery``
+        :type report: str
+        :param dt: Date of report
+        :type dt: datetime.date
+        :rtype: bool
+        """
+        return as_date(dt) in self.unavailable.get(report, ())
+
+    def add_unavailable(self, report: str, dt: date):
+        """
+        Record that ``report`` is unavailable for ``dt``. Dates today or in future are ignored.
+
+        If another report is also unavailable for ``dt``, the date is recorded as a holiday,
+        unless it is a confirmed trading day.
+
+        :param report: Report name ex. ``delivery``
+        :type report: str
+        :param dt: Date of report
+        :type dt: datetime.date
+        """
+        dt = as_date(dt)
+
+        if dt >= date.today():
+            return
+
+        with self.lock:
+            dates = self.unavailable.setdefault(report, set())
+
+            if dt in dates:
+                return
+
+            dates.add(dt)
+
+            missing = sum(dt in dates for dates in self.unavailable.values())
+
+            if missing > 1 and dt not in self.trading:
+                self.holidays.add(dt)
+
+            self.__save()
+
+    def add_trading_day(self, dt: date):
+        """
+        Record ``dt`` as a trading day.
+
+        :param dt: Date of trading session
+        :type dt: datetime.date
+        """
+        dt = as_date(dt)
+
+        with self.lock:
+            if dt in self.trading:
+                return
+
+            self.trading.add(dt)
+            self.holidays.discard(dt)
+            self.__save()
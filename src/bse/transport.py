@@ -0,0 +1,348 @@
+"""HTTP transports used by BSE to send requests"""
+
+from __future__ import annotations
+
+import json
+from contextlib import contextmanager
+from datetime import timedelta
+from threading import Lock
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from requests import Session
+from requests import exceptions as requests_errors
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# Connection specific headers. Not allowed in HTTP/2 requests
+hop_by_hop_headers = frozenset(
+    (
+        "connection",
+        "keep-alive",
+        "proxy-connection",
+        "transfer-encoding",
+        "upgrade",
+        "te",
+    )
+)
+
+
+class Transport:
+    """
+    Interface for sending GET requests. BSE sends all requests through a transport.
+
+    ``headers`` is a mutable mapping of headers sent with every request.
+
+    :meth:`.get` returns a response object with the same interface as
+    :class:`requests.Response`. BSE uses the attributes ``ok``, ``status_code``,
+    ``reason``, ``headers``, ``url`` and ``elapsed`` (optional), and the methods
+    ``json()``, ``text``, ``iter_content(chunk_size)`` and ``close()``.
+    Responses must be usable as a context manager.
+
+    A transport is shared between threads and must be thread safe.
+    """
+
+    headers: Any
+
+    def get(
+        self,
+        url: str,
+        params: Optional[dict] = None,
+        headers: Optional[dict] = None,
+        timeout: float = 10,
+        stream: bool = False,
+    ):
+        """
+        Send a GET request
+
+        :param url: Request url
+        :type url: str
+        :param params: (Optional) Query params
+        :type params: dict or None
+        :param headers: (Optional) Headers in addition to ``Transport.headers``
+        :type headers: dict or None
+        :param timeout: Default 10. Timeout in seconds
+        :type timeout: float
+        :param stream: Default False. If True, return once headers are received
+            and read the body with ``iter_content``.
+        :type stream: bool
+        :raise TimeoutError: if request timed out with no response
+        :raise ConnectionError: if the connection failed or was closed before the response was received
+        :return: A response object
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Close open connections"""
+
+
+class RequestsTransport(Transport):
+    """
+    Transport using :class:`requests.Session`. This is the default transport.
+    Connections are kept alive and reused with HTTP/1.1.
+
+    Timeouts raise TimeoutError and other network errors raise ConnectionError.
+
+    :param session: (Optional) Session to use. A new session is created if not specified.
+    :type session: requests.Session or None
+    """
+
+    def __init__(self, session: Optional[Session] = None):
+        self.session = session or Session()
+        self.headers = self.session.headers
+
+    def get(self, url, params=None, headers=None, timeout=10, stream=False):
+        try:
+            return self.session.get(
+                url, params=params, headers=headers, timeout=timeout, stream=stream
+            )
+        except requests_errors.Timeout:
+            # Includes ConnectTimeout, which is also a requests ConnectionError
+            raise TimeoutError("Request timed out")
+        except (
+            requests_errors.ConnectionError,
+            requests_errors.ChunkedEncodingError,
+        ) as e:
+            raise ConnectionError(f"{type(e).__name__}: {e}") from e
+
+    def close(self):
+        self.session.close()
+
+
+@contextmanager
+def _map_errors() -> Iterator[None]:
+    """Raise httpx errors as the builtin errors raised by BSE"""
+
+    try:
+        yield
+    except httpx.TimeoutException:
+        raise TimeoutError("Request timed out")
+    except httpx.TransportError as e:
+        raise ConnectionError(f"{type(e).__name__}: {e}") from e
+
+
+def _strip_hop_by_hop(headers: "httpx.Headers"):
+    """Remove connection specific headers and the headers named in ``Connection``"""
+
+    names = set(hop_by_hop_headers)
+
+    for value in headers.get_list("connection"):
+        names.update(name.strip().lower() for name in value.split(","))
+
+    for name in names:
+        # TE: trailers is the only connection specific header allowed in HTTP/2
+        if name == "te" and headers.get("te", "").strip().lower() == "trailers":
+            continue
+
+        if name in headers:
+            del headers[name]
+
+
+class HTTPXResponse:
+    """Adapt :class:`httpx.Response` to the interface of :class:`requests.Response`"""
+
+    def __init__(self, response: "httpx.Response"):
+        self.response = response
+
+        self.status_code = response.status_code
+        self.reason = response.reason_phrase
+        self.ok = response.status_code < 400
+        self.headers = response.headers
+        self.url = str(response.url)
+
+    @property
+    def elapsed(self) -> Optional[timedelta]:
+        # Available only once the response is closed
+        try:
+            return self.response.elapsed
+        except RuntimeError:
+            return None
+
+    @property
+    def content(self) -> bytes:
+        with _map_errors():
+            return self.response.read()
+
+    @property
+    def text(self) -> str:
+        self.content
+        return self.response.text
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size: int = 1) -> Iterator[bytes]:
+        with _map_errors():
+            yield from self.response.iter_bytes(chunk_size)
+
+    def close(self):
+        self.response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+class HTTPXTransport(Transport):
+    """
+    Transport using :class:`httpx.Client` with HTTP/2 enabled.
+
+    With HTTP/2, concurrent requests from multiple threads are multiplexed
+    over a single connection to each host.
+
+    Connection specific headers like ``Connection: keep-alive``, which HTTP/2
+    does not allow, are removed from requests. Timeouts raise TimeoutError and
+    other network errors raise ConnectionError.
+
+    Requires ``httpx`` with HTTP/2 support. Run ``pip install bse[http2]``
+
+    :param http2: Default True. Enable HTTP/2. Falls back to HTTP/1.1 if not supported by the server.
+    :type http2: bool
+    :param kwargs: Other keyword arguments to :class:`httpx.Client`
+    :raise ModuleNotFoundError: if ``httpx`` is not installed
+
+    .. code-block:: python
+
+        from bse import BSE
+        from bse.transport import HTTPXTransport
+
+        with BSE("./", transport=HTTPXTransport()) as bse:
+            bse.quote("500180")
+    """
+
+    def __init__(self, http2: bool = True, **kwargs):
+        if httpx is None:
+            raise ModuleNotFoundError(
+                "HTTPXTransport requires httpx. Run `pip install bse[http2]`"
+            )
+
+        self.client = httpx.Client(http2=http2, follow_redirects=True, **kwargs)
+        self.headers = self.client.headers
+
+    def get(self, url, params=None, headers=None, timeout=10, stream=False):
+        if params:
+            # requests omits params with None values
+            params = {k: v for k, v in params.items() if v is not None}
+
+        request = self.client.build_request(
+            "GET", url, params=params, headers=headers, timeout=timeout
+        )
+
+        _strip_hop_by_hop(request.headers)
+
+        with _map_errors():
+            response = self.client.send(request, stream=stream)
+
+        return HTTPXResponse(response)
+
+    def close(self):
+        self.client.close()
+
+
+class FakeResponse:
+    """In memory response returned by :class:`FakeTransport`"""
+
+    def __init__(
+        self,
+        url: str,
+        status_code: int = 200,
+        content: bytes = b"",
+        headers: Optional[dict] = None,
+    ):
+        self.url = url
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.reason = "OK" if self.ok else "Error"
+        self.content = content
+        self.headers = headers or {}
+        self.elapsed = timedelta(0)
+
+    @property
+    def text(self) -> str:
+        return self.content.decode()
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size: int = 1) -> Iterator[bytes]:
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i : i + chunk_size]
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+# A response body, a (status code, body) tuple or a function of (url, params)
+# returning either. dict and list bodies are encoded as JSON.
+Route = Union[Any, Tuple[int, Any], Callable[[str, Optional[dict]], Any]]
+
+
+class FakeTransport(Transport):
+    """
+    In memory transport for tests. Responses are looked up by url.
+
+    :param routes: (Optional) Dictionary of url to a response body, a tuple of
+        status code and body, or a function of ``url`` and ``params`` returning either.
+        dict and list bodies are encoded as JSON. ``str`` bodies are UTF-8 encoded.
+    :type routes: dict or None
+
+    Urls without a route return a 404 response. All requests are recorded in ``requests``.
+
+    .. code-block:: python
+
+        transport = FakeTransport({
+            f"{BSE.api_url}/advanceDecline/w": [{"Sens_ind": "SENSEX", "UP": "20"}],
+        })
+
+        bse = BSE("./", transport=transport)
+
+        bse.advanceDecline()
+    """
+
+    def __init__(self, routes: Optional[Dict[str, Route]] = None):
+        self.routes: Dict[str, Route] = dict(routes or {})
+        self.headers: Dict[str, str] = {}
+        self.requests: List[Tuple[str, Optional[dict], Optional[dict]]] = []
+        self.lock = Lock()
+
+    def route(self, url: str, response: Route):
+        """
+        Add or replace the route for ``url``
+
+        :param url: Request url as passed to :meth:`.get`
+        :type url: str
+        :param response: Response body, a tuple of status code and body or a function
+        """
+        self.routes[url] = response
+
+    def get(self, url, params=None, headers=None, timeout=10, stream=False):
+        with self.lock:
+            self.requests.append((url, params, headers))
+
+        route = self.routes.get(url)
+
+        if route is None:
+            return FakeResponse(url, 404)
+
+        if callable(route):
+            route = route(url, params)
+
+        status, body = route if isinstance(route, tuple) else (200, route)
+
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body)
+
+        if isinstance(body, str):
+            body = body.encode()
+
+        return FakeResponse(url, status, body)
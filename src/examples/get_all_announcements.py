@@ -1,42 +1,37 @@
+from datetime import datetime
+
 from bse import BSE
-import json
+from bse.sink import AnnouncementSink
 '''
 How to use BSE.announcements get all announcements.
 
 By default, only a single page of announcements is returned.
 
-We increment the 'page_no' argument to paginate and get all announcements.
+AnnouncementSink increments the 'page_no' argument to paginate and writes
+each page to a JSONL file as it arrives. Memory use does not grow with the
+number of announcements.
 
 BSE can returns 2000+ announcements on a given day and result in 50+ requests.
-'''
-
-ann: list[dict] = []
-total_count = 1000  # arbitary number to suppress pylint warnings
-page_count = 1
 
-with BSE('./') as bse:
-    while True:
-        # Returns Nth page of announcements for the day upto current time.
-        res = bse.announcements(page_no=page_count)
+If the script is interrupted, run it again. It resumes from the last page saved.
 
-        if page_count == 1:
-            # ROWCNT is the total number of announcements for the day
-            # We only need this once on first request
-            total_count: int = res['Table1'][0]['ROWCNT']
+Each date is saved to its own file. Run it again during the day to add
+announcements made since the last run.
+'''
 
-        page_count += 1
+today = datetime.now()
 
-        ann.extend(res['Table'])
+with BSE('./') as bse:
+    sink = AnnouncementSink(bse, f'announcements-{today:%Y-%m-%d}.jsonl', compress='gzip')
 
-        if len(ann) >= total_count:
-            break
+    sink.run(from_date=today, to_date=today)
 
-        # Next two line are optional and prints percent completion status
-        pct_completion = round(len(ann) / total_count * 100, 2)
+    # Next two lines are optional and print the status
+    checkpoint = sink.checkpoint()
 
-        # Print on same line. \r is backspace to clear the previous print
-        print(f'{pct_completion}%', flush=True, end='\r' * 8)
+    if checkpoint:
+        print(f"{checkpoint['rows']} of {checkpoint['total']} announcements saved")
 
-# Done save to file or anything else you need to do
-with open('announcements.json', 'w') as f:
-    json.dump(ann, f, indent=2)
+# Done. Read the file or anything else you need to do
+for announcement in sink.read():
+    print(announcement['HEADLINE'])
@@ -0,0 +1,109 @@
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+
+import context  # noqa: F401
+from bse.adjustment import ActionAdjuster, parse_purpose
+
+
+class StubBSE:
+    def __init__(self, folder, records):
+        self.dir = Path(folder)
+        self.records = records
+
+    def actions(self, **kwargs):
+        return self.records
+
+
+def action(scripcode, purpose, exdate):
+    return {"scrip_code": scripcode, "Purpose": purpose, "exdate": exdate}
+
+
+class Test_Parse_Purpose(unittest.TestCase):
+    def test_bonus(self):
+        self.assertEqual(parse_purpose("Bonus issue 1:1"), ("bonus", 0.5))
+        self.assertEqual(parse_purpose("Bonus issue 3:2"), ("bonus", 0.4))
+
+    def test_split(self):
+        self.assertEqual(
+            parse_purpose("Stock  Split From Rs.5/- to Rs.2/-"), ("split", 0.4)
+        )
+
+    def test_consolidation(self):
+        self.assertEqual(
+            parse_purpose("Consolidation of Shares From Rs.1/- to Rs.10/-"),
+            ("split", 10.0),
+        )
+
+    def test_dividend(self):
+        self.assertEqual(
+            parse_purpose("Interim Dividend - Rs. - 18.0000"), ("dividend", 18.0)
+        )
+
+    def test_unrelated_purpose(self):
+        self.assertIsNone(parse_purpose("Right Issue of Equity Shares"))
+
+
+class Test_Action_Adjuster(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.records = [
+            action(500001, "Stock  Split From Rs.10/- to Rs.5/-", "20230105"),
+            action(500001, "Interim Dividend - Rs. - 5.0000", "20230103"),
+        ]
+        self.bse = StubBSE(self.tmp.name, self.records)
+        self.adjuster = ActionAdjuster(self.bse)
+
+        self.history = {
+            "500001": {
+                "date": [date(2023, 1, d) for d in range(2, 7)],
+                "close": [100.0, 95.0, 96.0, 48.0, 50.0],
+                "volume": [10, 10, 10, 20, 20],
+            },
+            "500002": {
+                "date": [date(2023, 1, 2)],
+                "close": [10.0],
+                "volume": [1],
+            },
+        }
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_update_returns_changed_scrips(self):
+        self.assertEqual(self.adjuster.update(), {"500001"})
+        self.assertEqual(self.adjuster.update(), set())
+
+    def test_actions_are_cached_to_disk(self):
+        self.adjuster.update()
+
+        reloaded = ActionAdjuster(self.bse)
+
+        self.assertEqual(len(reloaded.get("500001")), 2)
+        self.assertIsNotNone(reloaded.last_updated)
+
+    def test_adjust(self):
+        self.adjuster.update()
+
+        result = self.adjuster.adjust(self.history)
+        adjusted = result["500001"]
+
+        # Split halves prices before 5th Jan, dividend of 5 on 100 before 3rd Jan
+        self.assertEqual(adjusted["close"], [47.5, 47.5, 48.0, 48.0, 50.0])
+        self.assertEqual(adjusted["volume"], [20, 20, 20, 20, 20])
+
+        # No actions for this scrip and input is left untouched
+        self.assertIs(result["500002"], self.history["500002"])
+        self.assertEqual(self.history["500001"]["close"][0], 100.0)
+
+    def test_adjust_selected_scrips(self):
+        self.adjuster.update()
+
+        result = self.adjuster.adjust(self.history, scripcodes=[])
+
+        self.assertIs(result["500001"], self.history["500001"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import tempfile
+import unittest
+from datetime import date, datetime
+from pathlib import Path
+from unittest.mock import patch
+
+import context  # noqa: F401
+from bse.breadth import BreadthIndicators, BreadthRecorder
+from bse.trading_calendar import TradingCalendar
+
+
+DAY_1 = datetime(2023, 10, 19, 11).timestamp()
+DAY_2 = datetime(2023, 10, 20, 11).timestamp()
+DAY_2_BEFORE_OPEN = datetime(2023, 10, 20, 8).timestamp()
+SATURDAY = datetime(2023, 10, 21, 11).timestamp()
+
+
+class StubBSE:
+    def __init__(self, folder):
+        self.dir = Path(folder)
+        self.calendar = TradingCalendar(self.dir / "calendar.json")
+        self.snapshots = [
+            [{"Sens_ind": "S&P BSE SENSEX", "UP": "20", "DN": "10", "UC": "0"}],
+            [{"Sens_ind": "S&P BSE SENSEX", "UP": "5", "DN": "25", "UC": None}],
+            [{"Sens_ind": "S&P BSE SENSEX", "UP": "10", "DN": "25", "UC": "1"}],
+        ]
+        self.calls = 0
+
+    def advanceDecline(self):
+        self.calls += 1
+        return self.snapshots.pop(0)
+
+
+class Test_Breadth_Indicators(unittest.TestCase):
+    def test_update(self):
+        ind = BreadthIndicators()
+
+        values = ind.update(20, 10)
+        self.assertEqual(values["ad_line"], 10)
+        self.assertEqual(values["ad_ratio"], 2)
+        self.assertAlmostEqual(values["rana"], 333.333, places=2)
+        self.assertEqual(values["oscillator"], 0)
+
+        values = ind.update(10, 20)
+        self.assertEqual(values["ad_line"], 0)
+        self.assertEqual(values["ad_ratio"], 0.5)
+        self.assertLess(values["oscillator"], 0)
+
+    def test_resume_from_state(self):
+        ind = BreadthIndicators()
+        ind.update(20, 10)
+
+        resumed = BreadthIndicators(ind.to_dict())
+
+        self.assertEqual(resumed.update(10, 20), ind.update(10, 20))
+
+    def test_same_day_replaces(self):
+        ind = BreadthIndicators()
+        ind.update(20, 10, day="2023-10-19")
+        ind.update(30, 10, day="2023-10-20")
+
+        values = ind.update(10, 30, day="2023-10-20")
+
+        expected = BreadthIndicators()
+        expected.update(20, 10)
+
+        self.assertEqual(values, expected.update(10, 30))
+
+        # Provisional day survives a restart
+        resumed = BreadthIndicators(ind.to_dict())
+
+        self.assertEqual(resumed.update(10, 30, day="2023-10-20"), values)
+
+
+class Test_Breadth_Recorder(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.bse = StubBSE(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_records_are_stored_and_state_resumes(self):
+        recorder = BreadthRecorder(self.bse)
+
+        with patch("bse.breadth.time", lambda: DAY_1):
+            recorder.poll()
+
+        # A new recorder continues from the saved state
+        recorder = BreadthRecorder(self.bse)
+
+        with patch("bse.breadth.time", lambda: DAY_2):
+            result = recorder.poll()
+
+        self.assertEqual(result["S&P BSE SENSEX"]["ad_line"], -10)
+        self.assertEqual(result["S&P BSE SENSEX"]["count"], 2)
+
+        records = list(recorder.store.read("S&P BSE SENSEX"))
+
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[1][1:], ("S&P BSE SENSEX", 5, 25, 0))
+        self.assertEqual(list(recorder.store.read("S&P BSE 500")), [])
+
+    def test_same_session_polled_twice(self):
+        recorder = BreadthRecorder(self.bse)
+
+        with patch("bse.breadth.time", lambda: DAY_1):
+            recorder.poll()
+            result = recorder.poll()
+
+        # The second snapshot replaces the first
+        self.assertEqual(result["S&P BSE SENSEX"]["ad_line"], -20)
+        self.assertEqual(result["S&P BSE SENSEX"]["count"], 1)
+
+        with patch("bse.breadth.time", lambda: DAY_2):
+            result = recorder.poll()
+
+        self.assertEqual(result["S&P BSE SENSEX"]["ad_line"], -35)
+        self.assertEqual(result["S&P BSE SENSEX"]["count"], 2)
+        self.assertEqual(len(list(recorder.store.read())), 3)
+
+    def test_poll_before_open_is_previous_session(self):
+        recorder = BreadthRecorder(self.bse)
+
+        with patch("bse.breadth.time", lambda: DAY_1):
+            recorder.poll()
+
+        # Counts before the open on DAY_2 are of DAY_1's session
+        with patch("bse.breadth.time", lambda: DAY_2_BEFORE_OPEN):
+            result = recorder.poll()
+
+        self.assertEqual(result["S&P BSE SENSEX"]["count"], 1)
+        self.assertEqual(result["S&P BSE SENSEX"]["ad_line"], -20)
+
+    def test_non_trading_day_is_skipped(self):
+        recorder = BreadthRecorder(self.bse)
+        self.bse.calendar.add_holiday(date(2023, 10, 19))
+
+        for ts in (SATURDAY, DAY_1):
+            with patch("bse.breadth.time", lambda: ts):
+                self.assertEqual(recorder.poll(), {})
+
+        self.assertEqual(self.bse.calls, 0)
+        self.assertEqual(list(recorder.store.read()), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,261 @@
+import tempfile
+import unittest
+from datetime import date
+from threading import Event, Thread
+from time import sleep
+
+import context  # noqa: F401
+from bse import BSE
+from bse.tracing import MemoryExporter
+
+
+class StubResponse:
+    ok = True
+    status_code = 200
+    reason = "OK"
+
+    def __init__(self, data):
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+class BlockingSession:
+    """Session whose requests block until ``release`` is set"""
+
+    def __init__(self, data):
+        self.data = data
+        self.calls = 0
+        self.release = Event()
+
+    def get(self, url, params=None, timeout=None, **kwargs):
+        self.calls += 1
+        self.release.wait(5)
+        return StubResponse(self.data)
+
+    def close(self):
+        pass
+
+
+class StubSession:
+    """Session returning the result of ``handler(url, params)``"""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.calls = []
+
+    def get(self, url, params=None, timeout=None, **kwargs):
+        self.calls.append((url, params))
+        return StubResponse(self.handler(url, params))
+
+    def close(self):
+        pass
+
+
+class Test_BSE_Requests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.bse = BSE(self.tmp.name)
+        self.session = self.bse.transport = BlockingSession([{"UP": "5"}])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_concurrent_identical_requests_are_coalesced(self):
+        results = []
+
+        threads = [
+            Thread(target=lambda: results.append(self.bse.advanceDecline()))
+            for _ in range(5)
+        ]
+
+        for t in threads:
+            t.start()
+
+        # Let all threads reach the in-flight request before releasing it
+        while self.bse.metrics["coalesced"] < 4:
+            sleep(0.01)
+
+        self.session.release.set()
+
+        for t in threads:
+            t.join()
+
+        self.assertEqual(self.session.calls, 1)
+        self.assertEqual(self.bse.metrics, {"requests": 1, "coalesced": 4})
+        self.assertEqual(results, [[{"UP": "5"}]] * 5)
+
+    def test_sequential_requests_are_not_coalesced(self):
+        self.session.release.set()
+
+        self.bse.advanceDecline()
+        self.bse.advanceDecline()
+
+        self.assertEqual(self.session.calls, 2)
+        self.assertEqual(self.bse.metrics["coalesced"], 0)
+
+
+class Test_BSE_Fan_Out(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.bse = BSE(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_top_gainers_and_losers(self):
+        tables = {
+            "A": [
+                {"scrip_cd": 1, "change_percent": 5.0},
+                {"scrip_cd": 2, "change_percent": -3.0},
+            ],
+            "B": [
+                {"scrip_cd": 1, "change_percent": 5.0},
+                {"scrip_cd": 3, "change_percent": 9.0},
+                {"scrip_cd": 4, "change_percent": -7.0},
+            ],
+        }
+
+        session = self.bse.transport = StubSession(
+            lambda url, params: {"Table": tables[params["IndxGrpval"]]}
+        )
+
+        gainers = self.bse.topGainers(n=2, names=["A", "B"])
+        self.assertEqual([row["scrip_cd"] for row in gainers], [3, 1])
+        self.assertEqual(len(session.calls), 2)
+
+        losers = self.bse.topLosers(n=5, names=["A", "B"])
+        self.assertEqual([row["scrip_cd"] for row in losers], [4, 2, 1, 3])
+
+    def test_near_52_week_high_low_sweep(self):
+        tables = {
+            "IDX1": {"Table": [{"SCRIP_CD": 1}, {"SCRIP_CD": 2}], "Table1": []},
+            "IDX2": {"Table": [{"SCRIP_CD": 1}], "Table1": [{"SCRIP_CD": 3}]},
+        }
+
+        self.bse.transport = StubSession(
+            lambda url, params: tables[params["indexcode"]]
+        )
+
+        result = self.bse.near52WeekHighLowSweep(["IDX1", "IDX2"])
+
+        self.assertEqual(
+            result["highs"],
+            [
+                {"SCRIP_CD": 1, "indices": ["IDX1", "IDX2"]},
+                {"SCRIP_CD": 2, "indices": ["IDX1"]},
+            ],
+        )
+        self.assertEqual(result["lows"], [{"SCRIP_CD": 3, "indices": ["IDX2"]}])
+
+    def test_actions_range(self):
+        def action(code, exdate):
+            return {
+                "scrip_code": code,
+                "Purpose": "Bonus issue 1:1",
+                "exdate": exdate,
+                "RD_Date": "",
+            }
+
+        def handler(url, params):
+            if params["Fdate"] == "20230101":
+                return [action(2, "20230130"), action(1, "20230131")]
+
+            # Record on the chunk boundary is returned again
+            return [action(1, "20230131"), action(3, "20230201")]
+
+        session = self.bse.transport = StubSession(handler)
+
+        rows = self.bse.actionsRange(date(2023, 1, 1), date(2023, 2, 28))
+
+        self.assertEqual(len(session.calls), 2)
+        self.assertEqual([row["scrip_code"] for row in rows], [2, 1, 3])
+
+    def test_result_calendar_range(self):
+        def handler(url, params):
+            return [
+                {"scrip_Code": "2", "meeting_date": "23 Feb 2023"},
+                {"scrip_Code": "1", "meeting_date": "23 Jan 2023"},
+            ]
+
+        self.bse.transport = StubSession(handler)
+
+        rows = self.bse.resultCalendarRange(date(2023, 1, 1), date(2023, 2, 28))
+
+        self.assertEqual([row["scrip_Code"] for row in rows], ["1", "2"])
+
+        with self.assertRaises(ValueError):
+            self.bse.resultCalendarRange(date(2023, 2, 1), date(2023, 1, 1))
+
+    def test_top_gainers_invalid_by(self):
+        with self.assertRaises(ValueError):
+            self.bse.topGainers(by="all")
+
+
+class Test_BSE_Tracing(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.bse = BSE(self.tmp.name)
+        self.bse.transport = StubSession(lambda url, params: [{"UP": "5"}])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_no_spans_without_exporter(self):
+        self.assertIsNone(self.bse.tracer.exporter)
+        self.bse.advanceDecline()
+
+    def test_request_phases(self):
+        exporter = self.bse.tracer.exporter = MemoryExporter()
+
+        self.bse.advanceDecline()
+
+        spans = {span.name: span for span in exporter.spans}
+
+        self.assertEqual(set(spans), {"request", "throttle", "ttfb", "decode"})
+
+        request = spans["request"]
+
+        self.assertTrue(request.attributes["endpoint"].endswith("/advanceDecline/w"))
+        self.assertEqual(request.attributes["params"], {"val": "Index"})
+        self.assertIsNone(request.parent_id)
+
+        for name in ("throttle", "ttfb", "decode"):
+            self.assertEqual(spans[name].parent_id, request.id)
+            self.assertEqual(spans[name].trace_id, request.trace_id)
+            self.assertLessEqual(spans[name].duration, request.duration)
+
+    def test_decode_is_child_of_request(self):
+        exporter = self.bse.tracer.exporter = MemoryExporter()
+
+        self.bse.advanceDecline()
+
+        decode, request = exporter.spans[-2:]
+
+        self.assertEqual(decode.name, "decode")
+        self.assertEqual(request.name, "request")
+        self.assertEqual(decode.parent_id, request.id)
+        self.assertLessEqual(request.start, decode.start)
+        self.assertGreaterEqual(request.end, decode.end)
+        self.assertFalse(request.attributes["coalesced"])
+
+    def test_error_is_recorded(self):
+        exporter = self.bse.tracer.exporter = MemoryExporter()
+
+        def fail(url, params):
+            raise TimeoutError("Request timed out")
+
+        self.bse.transport = StubSession(fail)
+
+        with self.assertRaises(TimeoutError):
+            self.bse.advanceDecline()
+
+        request = exporter.spans[-1]
+
+        self.assertEqual(request.name, "request")
+        self.assertIn("TimeoutError", request.attributes["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+import io
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+from zipfile import ZipFile
+
+import context  # noqa: F401
+from bse import BSE
+from bse.compression import open_report
+from bse.manifest import DownloadManifest
+
+CONTENT = b"TradDt,FinInstrmId\n2023-10-20,500180\n2023-10-20,500209\n"
+
+
+class StreamResponse:
+    def __init__(self, status_code, body, headers=None, fail_after=None):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.reason = ""
+        self.body = body
+        self.headers = headers or {"Content-Length": str(len(body))}
+        self.fail_after = fail_after
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        return False
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.body), 10):
+            if self.fail_after is not None and i >= self.fail_after:
+                raise ConnectionError("Connection reset")
+
+            yield self.body[i : i + 10]
+
+
+class RangeSession:
+    """Serves ``content`` with support for Range requests"""
+
+    def __init__(self, fail_after=None, content=CONTENT):
+        self.fail_after = fail_after
+        self.content = content
+        self.requests = []
+
+    def get(self, url, params=None, headers=None, **kwargs):
+        self.requests.append(headers)
+
+        if headers and "Range" in headers:
+            start = int(headers["Range"][6:-1])
+            return StreamResponse(206, self.content[start:])
+
+        fail_after, self.fail_after = self.fail_after, None
+
+        return StreamResponse(200, self.content, fail_after=fail_after)
+
+    def close(self):
+        pass
+
+
+class Test_Download(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.bse = BSE(self.tmp.name)
+        self.dt = date(2023, 10, 20)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_interrupted_download_is_resumed(self):
+        session = self.bse.transport = RangeSession(fail_after=20)
+
+        with self.assertRaises(ConnectionError):
+            self.bse.bhavcopyReport(self.dt)
+
+        parts = list(Path(self.tmp.name).glob("*.part"))
+
+        self.assertEqual(len(parts), 1)
+        self.assertEqual(parts[0].read_bytes(), CONTENT[:20])
+
+        file = self.bse.bhavcopyReport(self.dt)
+
+        self.assertEqual(file.read_bytes(), CONTENT)
+        self.assertEqual(session.requests[-1]["Range"], "bytes=20-")
+        self.assertEqual(list(Path(self.tmp.name).glob("*.part")), [])
+
+    def test_completed_download_is_skipped(self):
+        session = self.bse.transport = RangeSession()
+
+        file = self.bse.bhavcopyReport(self.dt)
+
+        # A new instance reads the manifest from the folder
+        bse = BSE(self.tmp.name)
+        bse.transport = session
+
+        self.assertEqual(bse.bhavcopyReport(self.dt), file)
+        self.assertEqual(len(session.requests), 1)
+
+    def test_modified_file_is_downloaded_again(self):
+        session = self.bse.transport = RangeSession()
+
+        file = self.bse.bhavcopyReport(self.dt)
+        file.write_bytes(CONTENT[:5])
+
+        self.assertEqual(self.bse.bhavcopyReport(self.dt).read_bytes(), CONTENT)
+        self.assertEqual(len(session.requests), 2)
+
+
+class Test_Download_Manifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_concurrent_writers_keep_all_entries(self):
+        # Separate instances on one folder, as in separate processes
+        def record(i):
+            file = self.folder / f"{i}.csv"
+            file.write_text(str(i))
+            DownloadManifest(self.folder).record(f"key{i}", file)
+
+        with ThreadPoolExecutor(8) as executor:
+            list(executor.map(record, range(40)))
+
+        manifest = DownloadManifest(self.folder)
+
+        self.assertEqual(len(manifest.entries), 40)
+        self.assertEqual(list(self.folder.glob("*.tmp")), [])
+
+    def test_entries_of_other_writers_are_read(self):
+        a, b = DownloadManifest(self.folder), DownloadManifest(self.folder)
+
+        file = self.folder / "a.csv"
+        file.write_text("a")
+        a.record("a", file)
+
+        self.assertEqual(b.get("a"), file)
+
+
+class Test_Compressed_Download(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.bse = BSE(self.tmp.name)
+        self.dt = date(2023, 10, 20)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_gzip_bhavcopy(self):
+        session = self.bse.transport = RangeSession()
+
+        file = self.bse.bhavcopyReport(self.dt, compress="gzip")
+
+        self.assertTrue(file.name.endswith(".CSV.gz"))
+        self.assertNotEqual(file.read_bytes(), CONTENT)
+
+        with open_report(file, mode="rb") as f:
+            self.assertEqual(f.read(), CONTENT)
+
+        # Compressed and uncompressed downloads are tracked separately
+        self.assertEqual(self.bse.bhavcopyReport(self.dt, compress="gzip"), file)
+        self.assertFalse(self.bse.bhavcopyReport(self.dt).name.endswith(".gz"))
+        self.assertEqual(len(session.requests), 2)
+
+    def test_delivery_report_is_converted_while_compressing(self):
+        buffer = io.BytesIO()
+
+        with ZipFile(buffer, "w") as zf:
+            zf.writestr("SCBSEALL2010.TXT", "DATE|SCRIP CODE\n20102023|500180\n")
+
+        self.bse.transport = RangeSession(content=buffer.getvalue())
+
+        file = self.bse.deliveryReport(self.dt, compress="gzip")
+
+        self.assertEqual(file.name, "SCBSEALL2010.csv.gz")
+        self.assertEqual(list(Path(self.tmp.name).glob("*.zip")), [])
+
+        with open_report(file) as f:
+            self.assertEqual(f.read(), "DATE,SCRIP CODE\n20102023,500180\n")
+
+    def test_invalid_compression(self):
+        with self.assertRaises(ValueError):
+            self.bse.bhavcopyReport(self.dt, compress="bz2")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+import json
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+
+import context  # noqa: F401
+from bse.freshness import IndexFreshness, parse_date
+
+
+SAMPLES = Path(__file__).parents[1] / "src" / "samples"
+
+INDEX_NAMES = json.loads((SAMPLES / "fetchIndexNames.json").read_text())
+REPORT_METADATA = json.loads((SAMPLES / "fetchIndexReportMetadata.json").read_text())
+
+NAMES = [row["Index_Name"] for row in INDEX_NAMES["Table"]]
+
+
+class StubBSE:
+    def __init__(self, folder):
+        self.dir = Path(folder)
+        self.updated = "20/10/2023"
+        self.names = INDEX_NAMES
+        self.name_calls = 0
+        self.downloads = []
+        self.empty = set()
+        self.fail = set()
+
+    def fetchIndexNames(self):
+        self.name_calls += 1
+        return self.names
+
+    def fetchIndexReportMetadata(self):
+        rows = [dict(row) for row in REPORT_METADATA["Table"]]
+
+        for row in rows:
+            row["LastUpdated"] = self.updated
+
+        # Dates of other reports are not used
+        rows.append({"FileName": "SectorIndices", "LastUpdated": "25/10/2023"})
+
+        return {"Table": rows}
+
+    def fetchHistoricalIndexData(self, index, from_date, to_date, **kwargs):
+        self.downloads.append((index, from_date, to_date))
+
+        if index in self.fail:
+            raise ConnectionError("503: Service Unavailable")
+
+        if index in self.empty:
+            return None
+
+        return self.dir / f"{index}.csv"
+
+
+class Test_Parse_Date(unittest.TestCase):
+    def test_formats(self):
+        expected = date(2023, 10, 20)
+
+        for value in (
+            "20/10/2023",
+            "20 Oct 2023",
+            "2023-10-20T18:30:00",
+            "2023-10-20T23:44:22.95",
+            "2023-10-20T23:44:22.9533",
+            "2023-10-20 23:44:22.5",
+            "20/10/2023 6:30:00 PM",
+            "20231020",
+        ):
+            self.assertEqual(parse_date(value), expected, value)
+
+    def test_not_a_date(self):
+        self.assertIsNone(parse_date("AllIndices"))
+        self.assertIsNone(parse_date(None))
+
+
+class Test_Index_Freshness(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.bse = StubBSE(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_index_names_are_cached(self):
+        tracker = IndexFreshness(self.bse)
+
+        self.assertEqual(tracker.index_names(), NAMES)
+        self.assertEqual(IndexFreshness(self.bse).index_names(), NAMES)
+        self.assertEqual(self.bse.name_calls, 1)
+
+        IndexFreshness(self.bse, names_ttl=0).index_names()
+        self.assertEqual(self.bse.name_calls, 2)
+
+    def test_published_reads_all_indices_report(self):
+        self.assertEqual(IndexFreshness(self.bse).published(), date(2023, 10, 20))
+
+    def test_unexpected_response(self):
+        self.bse.names = {"Table": [{"Name": "SENSEX"}]}
+
+        with self.assertRaisesRegex(ValueError, "Index_Name"):
+            IndexFreshness(self.bse).index_names()
+
+        self.bse.names = {"Table1": []}
+
+        with self.assertRaisesRegex(ValueError, "Table"):
+            IndexFreshness(self.bse).index_names()
+
+    def test_downloads_only_new_data(self):
+        tracker = IndexFreshness(self.bse)
+
+        files = tracker.refresh(from_date=date(2023, 1, 1))
+
+        self.assertEqual(list(files), NAMES)
+        self.assertIn(
+            ("BSE SENSEX", date(2023, 1, 1), date(2023, 10, 20)), self.bse.downloads
+        )
+
+        # Nothing published since
+        self.bse.downloads.clear()
+        self.assertEqual(IndexFreshness(self.bse).refresh(), {})
+        self.assertEqual(self.bse.downloads, [])
+
+        # Next session published
+        self.bse.updated = "23/10/2023"
+        IndexFreshness(self.bse).refresh(["BSE SENSEX"])
+
+        self.assertEqual(
+            self.bse.downloads, [("BSE SENSEX", date(2023, 10, 21), date(2023, 10, 23))]
+        )
+
+    def test_empty_or_failed_download_is_retried(self):
+        indices = ["BSE SENSEX", "BSE 100", "BSE 500"]
+        self.bse.empty.add("BSE 100")
+        self.bse.fail.add("BSE 500")
+
+        with self.assertRaises(ConnectionError):
+            IndexFreshness(self.bse).refresh(indices, from_date=date(2023, 1, 1))
+
+        tracker = IndexFreshness(self.bse)
+
+        self.assertEqual(tracker.last_downloaded("BSE SENSEX"), date(2023, 10, 20))
+        self.assertIsNone(tracker.last_downloaded("BSE 100"))
+        self.assertIsNone(tracker.last_downloaded("BSE 500"))
+
+        self.bse.empty.clear()
+        self.bse.fail.clear()
+        self.bse.downloads.clear()
+
+        self.assertEqual(list(tracker.refresh(indices)), ["BSE 100", "BSE 500"])
+
+
+if __name__ == "__main__":
+    unittest.main()
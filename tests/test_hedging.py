@@ -0,0 +1,103 @@
+import tempfile
+import unittest
+from threading import Event, Lock, Timer
+
+import context  # noqa: F401
+from bse import BSE
+from bse.hedging import Hedging
+from bse.transport import FakeTransport
+
+ADVANCE_DECLINE = f"{BSE.api_url}/advanceDecline/w"
+
+
+class Test_Hedging(unittest.TestCase):
+    def setUp(self):
+        self.hedging = Hedging(min_samples=10, initial_delay=0.5, min_delay=0.01)
+
+    def tearDown(self):
+        self.hedging.close()
+
+    def test_initial_delay(self):
+        self.assertEqual(self.hedging.delay("url"), 0.5)
+
+    def test_percentile_delay(self):
+        for i in range(1, 101):
+            self.hedging.observe("url", i / 1000)
+
+        self.assertAlmostEqual(self.hedging.delay("url"), 0.096)
+
+        # Tracked per endpoint
+        self.assertEqual(self.hedging.delay("other"), 0.5)
+
+    def test_min_delay(self):
+        for _ in range(20):
+            self.hedging.observe("url", 0.001)
+
+        self.assertEqual(self.hedging.delay("url"), 0.01)
+
+    def test_invalid_percentile(self):
+        with self.assertRaises(ValueError):
+            Hedging(percentile=0)
+
+
+class Test_BSE_Hedging(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.release = Event()
+        self.lock = Lock()
+        self.calls = 0
+
+        def route(url, params):
+            with self.lock:
+                self.calls += 1
+                call = self.calls
+
+            # The first request stalls until released
+            if call == 1:
+                self.release.wait(5)
+
+            return [{"Sens_ind": "SENSEX", "UP": str(call)}]
+
+        self.transport = FakeTransport({ADVANCE_DECLINE: route})
+        self.bse = BSE(self.tmp.name, transport=self.transport)
+
+        self.bse.hedging = Hedging(initial_delay=0.05, budget=0.5)
+
+    def tearDown(self):
+        self.release.set()
+        self.bse.exit()
+        self.tmp.cleanup()
+
+    def test_hedged_response_wins(self):
+        self.assertEqual(self.bse.advanceDecline()[0]["UP"], "2")
+
+        self.assertEqual(self.bse.hedging.hedged, 1)
+        self.assertEqual(self.bse.hedging.won, 1)
+
+        # The duplicate is charged to the throttle
+        self.assertEqual(self.bse.metrics["requests"], 2)
+
+    def test_no_hedge_when_fast(self):
+        self.release.set()
+
+        self.assertEqual(self.bse.advanceDecline()[0]["UP"], "1")
+        self.assertEqual(self.bse.hedging.hedged, 0)
+        self.assertEqual(self.bse.metrics["requests"], 1)
+
+    def test_budget(self):
+        self.bse.hedging.budget = 0
+        Timer(0.2, self.release.set).start()
+
+        # Slow response is used as no duplicate is allowed
+        self.assertEqual(self.bse.advanceDecline()[0]["UP"], "1")
+        self.assertEqual(self.calls, 1)
+
+    def test_error_response(self):
+        self.transport.route(ADVANCE_DECLINE, (500, ""))
+
+        with self.assertRaises(ConnectionError):
+            self.bse.advanceDecline()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import tempfile
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+
+import context  # noqa: F401
+from bse.highlow import HighLow
+
+HEADER = "TradDt,FinInstrmId,SctySrs,OpnPric,HghPric,LwPric,ClsPric,PrvsClsgPric\n"
+
+
+def bhavcopy(folder, dt, rows):
+    file = Path(folder) / f"bhav_{dt:%Y%m%d}.csv"
+
+    file.write_text(
+        HEADER
+        + "".join(
+            f"{dt:%Y-%m-%d},{code},A,{low},{high},{low},{close},{close}\n"
+            for code, high, low, close in rows
+        )
+    )
+
+    return file
+
+
+class Test_High_Low(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.hl = HighLow(folder=Path(self.tmp.name) / "highlow")
+        self.last = date(2023, 10, 20)
+
+        # 500180 high 200 a year ago, lows fall through the last month
+        self.ingest(self.last - timedelta(300), [("500180", 200, 150, 180)])
+        self.ingest(self.last - timedelta(20), [("500180", 120, 90, 100)])
+        self.ingest(self.last - timedelta(2), [("500180", 110, 95, 105)])
+
+        # New listing
+        self.ingest(self.last, [("500180", 108, 100, 107), ("543000", 50, 40, 45)])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def ingest(self, dt, rows):
+        self.assertEqual(self.hl.ingest(bhavcopy(self.tmp.name, dt, rows)), dt)
+
+    def test_quote_shape(self):
+        self.assertEqual(
+            self.hl.quote("500180"),
+            {
+                "fifty2WeekHigh": 200.0,
+                "dateHigh": f"{self.last - timedelta(300):%d/%m/%Y}",
+                "fifty2WeekLow": 90.0,
+                "dateLow": f"{self.last - timedelta(20):%d/%m/%Y}",
+                "monthlyHigh": 120.0,
+                "monthlyLow": 90.0,
+                "weeklyHigh": 110.0,
+                "weeklyLow": 95.0,
+                "close": 107.0,
+            },
+        )
+
+    def test_new_listing(self):
+        quote = self.hl.quote("543000")
+
+        self.assertEqual(quote["fifty2WeekHigh"], 50.0)
+        self.assertEqual(quote["weeklyLow"], 40.0)
+
+    def test_as_of(self):
+        quote = self.hl.quote("500180", as_of=self.last - timedelta(10))
+
+        self.assertEqual(quote["weeklyHigh"], None)
+        self.assertEqual(quote["close"], 100.0)
+        self.assertIsNone(self.hl.quote("543000", as_of=self.last - timedelta(10)))
+
+    def test_reload_from_disk(self):
+        hl = HighLow(folder=Path(self.tmp.name) / "highlow")
+
+        self.assertEqual(len(hl.dates()), 4)
+        self.assertEqual(hl.all(), self.hl.all())
+
+
+if __name__ == "__main__":
+    unittest.main()
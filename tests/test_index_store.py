@@ -0,0 +1,103 @@
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+from threading import Lock
+
+import context  # noqa: F401
+from bse.index_store import IndexBackfill, IndexStore
+from bse.trading_calendar import TradingCalendar
+
+HOLIDAY = date(2023, 10, 24)
+
+
+class StubBSE:
+    def __init__(self, folder):
+        self.dir = Path(folder)
+        self.calendar = TradingCalendar(self.dir / "trading_calendar.json")
+        self.fetched = []
+        self.lock = Lock()
+
+    def fetchAllIndicesDataByDate(self, dt):
+        with self.lock:
+            self.fetched.append(dt)
+
+        if dt == HOLIDAY:
+            self.calendar.add_holiday(dt)
+            return {"S&P BSE SENSEX": []}
+
+        close = float(dt.day)
+
+        return {
+            "S&P BSE SENSEX": [{"I_open": close - 1, "I_close": close}],
+            "S&P BSE 100": [{"I_close": close * 2}],
+        }
+
+
+class Test_Index_Store(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = IndexStore(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_rows_are_sorted_by_date_and_replaced(self):
+        self.store.add(date(2023, 10, 20), {"A": [{"close": 2}]})
+        self.store.add(date(2023, 10, 19), {"A": [{"close": 1, "open": 0}]})
+        self.store.add(date(2023, 10, 20), {"A": [{"close": 3}]})
+
+        self.assertEqual(
+            self.store.get("A"),
+            {"date": ["2023-10-19", "2023-10-20"], "close": [1, 3], "open": [0, None]},
+        )
+
+        self.assertEqual(self.store.row("A", date(2023, 10, 20))["close"], 3)
+        self.assertIsNone(self.store.row("A", date(2023, 10, 18)))
+        self.assertIsNone(self.store.row("B", date(2023, 10, 20)))
+
+    def test_save_and_load(self):
+        self.store.add(date(2023, 10, 20), {"S&P BSE SENSEX": [{"close": 2}]})
+        self.store.save()
+
+        store = IndexStore(self.tmp.name)
+
+        self.assertEqual(store.indices(), ["S&P BSE SENSEX"])
+        self.assertEqual(store.dates, {date(2023, 10, 20)})
+        self.assertEqual(store.get("S&P BSE SENSEX")["close"], [2])
+
+
+class Test_Index_Backfill(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.bse = StubBSE(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_backfill_and_top_up(self):
+        backfill = IndexBackfill(self.bse)
+
+        added = backfill.run(date(2023, 10, 16), date(2023, 10, 25), batch_size=3)
+
+        # Weekend skipped, holiday learned and not stored
+        self.assertEqual(len(self.bse.fetched), 8)
+        self.assertEqual(len(added), 7)
+        self.assertNotIn(HOLIDAY, added)
+
+        sensex = backfill.store.get("S&P BSE SENSEX")
+
+        self.assertEqual(sensex["date"], [dt.isoformat() for dt in added])
+        self.assertEqual(sensex["I_close"], [float(dt.day) for dt in added])
+
+        # Only the new days are fetched
+        self.bse.fetched.clear()
+        backfill = IndexBackfill(self.bse)
+        added = backfill.run(date(2023, 10, 16), date(2023, 10, 27))
+
+        self.assertEqual(self.bse.fetched, [date(2023, 10, 26), date(2023, 10, 27)])
+        self.assertEqual(len(backfill.store.get("S&P BSE 100")["date"]), 9)
+
+
+if __name__ == "__main__":
+    unittest.main()
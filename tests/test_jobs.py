@@ -0,0 +1,244 @@
+import tempfile
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+
+import context  # noqa: F401
+from bse.jobs import Backfill, JobQueue
+
+
+class StubCalendar:
+    def trading_days(self, from_date, to_date):
+        days = []
+
+        while from_date <= to_date:
+            if from_date.weekday() < 5:
+                days.append(from_date)
+
+            from_date += timedelta(1)
+
+        return days
+
+
+class StubBSE:
+    def __init__(self, folder):
+        self.dir = Path(folder)
+        self.calendar = StubCalendar()
+        self.calls = []
+        self.fail = set()
+
+    def bhavcopyReport(self, dt, folder=None, compress=None):
+        self.calls.append(dt)
+
+        if dt in self.fail:
+            raise ConnectionError("503: Service Unavailable")
+
+        if dt == date(2024, 1, 26):
+            raise RuntimeError("Report not available")
+
+        return self.dir / f"{dt}.csv.gz"
+
+    @staticmethod
+    def split_date_range(from_date, to_date, max_chunk_size=30):
+        chunks = []
+
+        while from_date <= to_date:
+            end = min(from_date + timedelta(max_chunk_size - 1), to_date)
+            chunks.append((from_date, end))
+            from_date = end + timedelta(1)
+
+        return chunks
+
+
+class Test_JobQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "jobs.db"
+        self.queue = JobQueue(self.path, backoff=0)
+
+    def tearDown(self):
+        self.queue.close()
+        self.tmp.cleanup()
+
+    def test_add_is_idempotent(self):
+        args = [{"date": "2024-01-01"}, {"date": "2024-01-02"}]
+
+        self.assertEqual(self.queue.add("job", "bhavcopy", args), 2)
+        self.assertEqual(self.queue.add("job", "bhavcopy", args), 0)
+        self.assertEqual(self.queue.stats("job")["pending"], 2)
+
+    def test_lease_and_complete(self):
+        self.queue.add("job", "bhavcopy", [{"date": "2024-01-01"}])
+
+        task = self.queue.acquire("w1")
+
+        self.assertEqual(task.args, {"date": "2024-01-01"})
+        self.assertEqual(task.attempts, 1)
+
+        # Leased task is not handed to another worker
+        self.assertIsNone(self.queue.acquire("w2"))
+
+        self.queue.complete(task, "file.csv")
+
+        self.assertEqual(self.queue.stats()["done"], 1)
+
+    def test_expired_lease(self):
+        self.queue.lease = -1
+        self.queue.add("job", "bhavcopy", [{"date": "2024-01-01"}])
+
+        first = self.queue.acquire("w1")
+        second = self.queue.acquire("w2")
+
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(second.attempts, 2)
+
+    def test_lost_lease(self):
+        self.queue.lease = -1
+        self.queue.add("job", "bhavcopy", [{"date": "2024-01-01"}])
+
+        first = self.queue.acquire("w1")
+        second = self.queue.acquire("w2")
+
+        # The first worker's lease expired and was taken by the second
+        self.assertFalse(self.queue.complete(first, "stale.csv"))
+        self.assertFalse(self.queue.fail(first, "error"))
+        self.assertEqual(self.queue.stats()["leased"], 1)
+
+        self.assertTrue(self.queue.complete(second, "file.csv"))
+        self.assertEqual(self.queue.stats()["done"], 1)
+
+        # A completed task cannot be failed
+        self.assertFalse(self.queue.fail(second, "error"))
+        self.assertEqual(self.queue.stats()["done"], 1)
+
+    def test_lost_lease_same_worker_name(self):
+        self.queue.lease = -1
+        self.queue.add("job", "bhavcopy", [{"date": "2024-01-01"}])
+
+        # Threads of one process share the default worker name
+        first = self.queue.acquire("host:1")
+        second = self.queue.acquire("host:1")
+
+        self.assertFalse(self.queue.complete(first, "stale.csv"))
+        self.assertTrue(self.queue.complete(second, "file.csv"))
+
+    def test_expired_lease_counts_as_attempt(self):
+        self.queue.lease = -1
+        self.queue.max_attempts = 2
+        self.queue.add("job", "bhavcopy", [{"date": "2024-01-01"}])
+
+        # Workers crash without completing the task
+        self.queue.acquire("w1")
+        self.queue.acquire("w2")
+
+        self.assertIsNone(self.queue.acquire("w3"))
+        self.assertEqual(self.queue.stats()["failed"], 1)
+
+    def test_retry_and_fail(self):
+        self.queue.max_attempts = 2
+        self.queue.add("job", "bhavcopy", [{"date": "2024-01-01"}])
+
+        self.queue.fail(self.queue.acquire("w1"), "error")
+        self.assertEqual(self.queue.stats()["pending"], 1)
+
+        self.queue.fail(self.queue.acquire("w1"), "error")
+        self.assertEqual(self.queue.stats()["failed"], 1)
+        self.assertIsNone(self.queue.acquire("w1"))
+
+        self.assertEqual(self.queue.retry_failed("job"), 1)
+        self.assertIsNotNone(self.queue.acquire("w1"))
+
+    def test_backoff(self):
+        self.queue.backoff = 60
+        self.queue.add("job", "bhavcopy", [{"date": "2024-01-01"}])
+
+        self.queue.fail(self.queue.acquire("w1"), "error")
+
+        self.assertIsNone(self.queue.acquire("w1"))
+
+    def test_persistence(self):
+        self.queue.add("job", "bhavcopy", [{"date": "2024-01-01"}])
+        self.queue.close()
+
+        self.queue = JobQueue(self.path)
+
+        self.assertEqual(self.queue.acquire("w1").kind, "bhavcopy")
+
+
+class Test_Backfill(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.bse = StubBSE(self.tmp.name)
+        self.backfill = Backfill(self.bse, JobQueue(self.bse.dir / "jobs.db", backoff=0))
+
+    def tearDown(self):
+        self.backfill.queue.close()
+        self.tmp.cleanup()
+
+    def test_plan_reports(self):
+        added = self.backfill.plan_reports(
+            "jan", "bhavcopy", date(2024, 1, 1), date(2024, 1, 31)
+        )
+
+        self.assertEqual(added, 23)
+
+        with self.assertRaises(ValueError):
+            self.backfill.plan_reports("jan", "bhav", date(2024, 1, 1), date(2024, 1, 2))
+
+    def test_plan_announcements_every_day(self):
+        added = self.backfill.plan_reports(
+            "jan", "announcements", date(2024, 1, 1), date(2024, 1, 31)
+        )
+
+        self.assertEqual(added, 31)
+
+    def test_plan_index(self):
+        added = self.backfill.plan_index(
+            "sensex", "SENSEX", date(2022, 1, 1), date(2024, 1, 1)
+        )
+
+        self.assertEqual(added, 3)
+
+    def test_work_resumes(self):
+        self.backfill.plan_reports("jan", "bhavcopy", date(2024, 1, 22), date(2024, 1, 26))
+
+        # Simulate a worker that stopped after two tasks
+        for _ in range(2):
+            task = self.backfill.queue.acquire("crashed")
+            self.backfill.queue.complete(task, None)
+
+        self.bse.fail.add(date(2024, 1, 25))
+
+        counts = self.backfill.work("jan")
+
+        # Holiday is done, the failed date is retried until it fails
+        self.assertEqual(self.bse.calls.count(date(2024, 1, 22)), 0)
+        self.assertEqual(self.bse.calls.count(date(2024, 1, 25)), 5)
+        self.assertEqual(counts, {"done": 2, "failed": 5, "lost": 0})
+
+        stats = self.backfill.queue.stats("jan")
+
+        self.assertEqual(stats["done"], 4)
+        self.assertEqual(stats["failed"], 1)
+
+    def test_work_counts_lost_leases(self):
+        queue = self.backfill.queue
+        queue.lease = -1
+
+        self.backfill.plan_reports("jan", "bhavcopy", date(2024, 1, 22), date(2024, 1, 22))
+
+        def handler(bse, args):
+            # Another worker takes over the expired lease while the handler runs
+            queue.lease = 300
+            queue.acquire("other")
+
+        self.backfill.handlers["bhavcopy"] = handler
+
+        counts = self.backfill.work("jan", worker="slow")
+
+        self.assertEqual(counts["lost"], 1)
+        self.assertEqual(counts["done"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import context  # noqa: F401
+from bse import BSE
+from bse.jsonstream import iter_rows
+from bse.transport import FakeTransport
+
+SAMPLES = Path(__file__).parents[1] / "src" / "samples"
+
+
+def chunked(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i : i + size]
+
+
+class Test_Iter_Rows(unittest.TestCase):
+    def test_samples(self):
+        for name in ("listSecurities", "actions", "announcements"):
+            data = (SAMPLES / f"{name}.json").read_bytes()
+            expected = json.loads(data)
+
+            if isinstance(expected, dict):
+                expected = expected["Table"]
+
+            # Chunk boundaries fall inside strings, numbers and multi-byte characters
+            for size in (1, 7, 4096):
+                with self.subTest(name=name, size=size):
+                    self.assertEqual(list(iter_rows(chunked(data, size))), expected)
+
+    def test_number_split_across_chunks(self):
+        self.assertEqual(list(iter_rows([b"[12", b"34, 5", b"6]"])), [1234, 56])
+
+    def test_skips_other_keys(self):
+        data = b'{"Table1": [{"ROWCNT": 2}], "n": null, "Table": [1, 2], "x": '
+
+        # Rest of the document is not read
+        self.assertEqual(list(iter_rows(chunked(data, 3))), [1, 2])
+
+    def test_custom_key_and_empty(self):
+        self.assertEqual(list(iter_rows([b' {"rows" : [ ] } '], key="rows")), [])
+        self.assertEqual(list(iter_rows(["\ufeff[1]".encode()])), [1])
+
+    def test_rows_are_yielded_incrementally(self):
+        received = []
+
+        def chunks():
+            for chunk in (b'[{"a": 1},', b'{"a": 2}]'):
+                received.append(chunk)
+                yield chunk
+
+        rows = iter_rows(chunks())
+
+        self.assertEqual(next(rows), {"a": 1})
+        self.assertEqual(len(received), 1)
+
+    def test_invalid(self):
+        for data in (b'{"Table1": []}', b'[{"a": 1}', b"[1 2]", b""):
+            with self.subTest(data=data):
+                with self.assertRaises(ValueError):
+                    list(iter_rows([data]))
+
+
+class Test_BSE_Stream(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+        self.transport = FakeTransport(
+            {
+                f"{BSE.api_url}/ListofScripData/w": (
+                    SAMPLES / "listSecurities.json"
+                ).read_bytes(),
+                f"{BSE.api_url}/AnnSubCategoryGetData/w": (
+                    SAMPLES / "announcements.json"
+                ).read_bytes(),
+            }
+        )
+
+        self.bse = BSE(self.tmp.name, transport=self.transport)
+
+    def tearDown(self):
+        self.bse.exit()
+        self.tmp.cleanup()
+
+    def test_list_securities(self):
+        rows = self.bse.listSecurities(stream=True)
+
+        self.assertEqual(list(rows), self.bse.listSecurities())
+
+    def test_announcements(self):
+        rows = list(self.bse.announcements(stream=True))
+
+        self.assertEqual(rows, self.bse.announcements()["Table"])
+
+    def test_error_is_raised_on_call(self):
+        with self.assertRaises(ConnectionError):
+            self.bse.actions(stream=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import tempfile
+import unittest
+from pathlib import Path
+from time import monotonic
+
+import context  # noqa: F401
+from bse.limiter import FileLimiter
+
+
+class Test_File_Limiter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "limiter"
+        self.config = {"default": {"rps": 20}, "lookup": {"rps": 40}}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_burst_within_limit_does_not_wait(self):
+        limiter = FileLimiter(self.config, self.path)
+
+        for _ in range(20):
+            self.assertEqual(limiter._acquire("default"), 0)
+
+        self.assertGreater(limiter._acquire("default"), 0)
+
+    def test_keys_have_separate_budgets(self):
+        limiter = FileLimiter(self.config, self.path)
+
+        for _ in range(20):
+            limiter._acquire("default")
+
+        self.assertEqual(limiter._acquire("lookup"), 0)
+
+    def test_budget_is_shared_through_the_file(self):
+        # Two instances stand in for two processes on the same host
+        first = FileLimiter(self.config, self.path)
+        second = FileLimiter(self.config, self.path)
+
+        for _ in range(10):
+            first.check()
+            second.check()
+
+        self.assertGreater(first._acquire("default"), 0)
+        self.assertGreater(second._acquire("default"), 0)
+
+    def test_check_waits_for_a_token(self):
+        limiter = FileLimiter(self.config, self.path)
+
+        start = monotonic()
+
+        for _ in range(22):
+            limiter.check()
+
+        self.assertGreaterEqual(monotonic() - start, 0.08)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+from threading import Event, Thread
+from time import sleep
+
+import context  # noqa: F401
+from bse.scheduler import PriorityScheduler, current_priority, priority
+
+
+class GatedLimiter:
+    """Limiter that blocks the first request until ``gate`` is set"""
+
+    def __init__(self):
+        self.gate = Event()
+        self.order = []
+
+    def check(self, key="default"):
+        if not self.order:
+            self.order.append("first")
+            self.gate.wait(5)
+        else:
+            self.order.append(current_priority())
+
+
+class Test_Priority_Scheduler(unittest.TestCase):
+    def run_in_thread(self, scheduler, name):
+        def target():
+            with priority(name):
+                scheduler.check()
+
+        thread = Thread(target=target)
+        thread.start()
+        return thread
+
+    def wait_for_queue(self, scheduler, size):
+        while len(scheduler.queue) < size:
+            sleep(0.001)
+
+    def test_higher_priority_is_served_first(self):
+        limiter = GatedLimiter()
+        scheduler = PriorityScheduler(limiter)
+
+        threads = [self.run_in_thread(scheduler, "normal")]
+
+        while not limiter.order:
+            sleep(0.001)
+
+        threads.append(self.run_in_thread(scheduler, "bulk"))
+        self.wait_for_queue(scheduler, 1)
+        threads.append(self.run_in_thread(scheduler, "interactive"))
+        self.wait_for_queue(scheduler, 2)
+
+        limiter.gate.set()
+
+        for t in threads:
+            t.join()
+
+        self.assertEqual(limiter.order, ["first", 0, 2])
+
+    def test_waiting_requests_age(self):
+        limiter = GatedLimiter()
+        scheduler = PriorityScheduler(limiter, aging=0.001)
+
+        threads = [self.run_in_thread(scheduler, "normal")]
+
+        while not limiter.order:
+            sleep(0.001)
+
+        threads.append(self.run_in_thread(scheduler, "bulk"))
+        self.wait_for_queue(scheduler, 1)
+
+        # Bulk request has waited long enough to overtake a new interactive request
+        sleep(0.05)
+
+        threads.append(self.run_in_thread(scheduler, "interactive"))
+        self.wait_for_queue(scheduler, 2)
+
+        limiter.gate.set()
+
+        for t in threads:
+            t.join()
+
+        self.assertEqual(limiter.order, ["first", 2, 0])
+
+    def test_priority_context(self):
+        self.assertEqual(current_priority(), 1)
+
+        with priority("bulk"):
+            self.assertEqual(current_priority(), 2)
+
+        self.assertEqual(current_priority(), 1)
+
+        with self.assertRaises(ValueError):
+            with priority("urgent"):
+                pass
+
+
+if __name__ == "__main__":
+    unittest.main()
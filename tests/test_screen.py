@@ -0,0 +1,84 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import context  # noqa: F401
+from bse.screen import BhavcopyScreen
+
+HEADER = (
+    "TradDt,FinInstrmId,TckrSymb,SctySrs,FinInstrmNm,OpnPric,HghPric,LwPric,"
+    "ClsPric,PrvsClsgPric,TtlTradgVol,TtlTrfVal,TtlNbOfTxsExctd\n"
+)
+
+ROWS = [
+    # code, group, close, prev close
+    ("500001", "A", 112, 100),
+    ("500002", "A", 107, 100),
+    ("500003", "B", 103, 100),
+    ("500004", "A", 101, 100),
+    ("500005", "A", 100, 100),
+    ("500006", "B", 94, 100),
+    ("500007", "A", 99, 100),
+]
+
+
+class Test_Bhavcopy_Screen(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        file = Path(self.tmp.name) / "bhavcopy.csv"
+
+        file.write_text(
+            HEADER
+            + "".join(
+                f"2023-10-20,{code},SYM{code},{grp},Name {code},{prev},{close},{prev},{close},{prev},1000,100000,10\n"
+                for code, grp, close, prev in ROWS
+            )
+            + "2023-10-20,500008,NEW,A,New listing,10,10,10,10,,0,0,0\n"
+        )
+
+        self.screen = BhavcopyScreen(file)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def codes(self, rows):
+        return [row["scrip_cd"] for row in rows]
+
+    def test_gainers_sorted(self):
+        self.assertEqual(len(self.screen), 7)
+        self.assertEqual(self.codes(self.screen.gainers()), [500001, 500002, 500003, 500004])
+
+    def test_buckets(self):
+        self.assertEqual(self.codes(self.screen.gainers(pct_change="10")), [500001])
+        self.assertEqual(self.codes(self.screen.gainers(pct_change="5")), [500002])
+        self.assertEqual(self.codes(self.screen.gainers(pct_change="2")), [500003])
+        self.assertEqual(self.codes(self.screen.gainers(pct_change="0")), [500004])
+        self.assertEqual(self.codes(self.screen.losers(pct_change="5")), [500006])
+
+        with self.assertRaises(ValueError):
+            self.screen.gainers(pct_change="3")
+
+    def test_filters(self):
+        self.assertEqual(self.codes(self.screen.gainers(group="b")), [500003])
+        self.assertEqual(self.codes(self.screen.losers(scripcodes=["500007"])), [500007])
+
+    def test_row_shape(self):
+        row = self.screen.gainers(pct_change="10")[0]
+
+        self.assertEqual(row["change_percent"], 12.0)
+        self.assertEqual(row["change_val"], 12.0)
+        self.assertEqual(row["scrip_grp"], "A")
+        self.assertEqual(row["trd_val"], 1.0)
+
+    def test_breadth(self):
+        self.assertEqual(
+            self.screen.breadth(),
+            {
+                "A": {"advances": 3, "declines": 1, "unchanged": 1},
+                "B": {"advances": 1, "declines": 1, "unchanged": 0},
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import json
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+
+import context  # noqa: F401
+from bse.search import AnnouncementIndex
+
+
+def announcement(newsid, scripcode, dt, headline, category="Company Update"):
+    return {
+        "NEWSID": newsid,
+        "SCRIP_CD": scripcode,
+        "NEWS_DT": f"{dt}T18:30:00.45",
+        "HEADLINE": headline,
+        "NEWSSUB": "",
+        "CATEGORYNAME": category,
+    }
+
+
+DAY_1 = [
+    announcement("a1", 500180, "2023-10-19", "Board approves buyback of equity shares"),
+    announcement("a2", 500325, "2023-10-19", "Fixes record date for buyback", "Corp. Action"),
+    announcement("a3", 500180, "2023-10-19", "Record of trading window closure"),
+]
+
+DAY_2 = [
+    announcement("b1", 500325, "2023-10-20", "Outcome of board meeting: buyback"),
+    announcement("a1", 500180, "2023-10-19", "Board approves buyback of equity shares"),
+]
+
+
+class Test_Announcement_Index(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index = AnnouncementIndex(self.tmp.name)
+        self.index.add(DAY_1)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def ids(self, results):
+        return [row["NEWSID"] for row in results]
+
+    def test_term_query(self):
+        self.assertEqual(sorted(self.ids(self.index.search("BUYBACK"))), ["a1", "a2"])
+        self.assertEqual(self.index.search("dividend"), [])
+
+    def test_phrase_query(self):
+        self.assertEqual(self.ids(self.index.search('"record date"')), ["a2"])
+        self.assertEqual(self.ids(self.index.search('"date record"')), [])
+
+    def test_filters(self):
+        self.assertEqual(self.ids(self.index.search("buyback", scripcode="500180")), ["a1"])
+        self.assertEqual(self.ids(self.index.search(category="corp. action")), ["a2"])
+        self.assertEqual(
+            self.index.search(from_date=date(2023, 10, 20), to_date=date(2023, 10, 20)), []
+        )
+
+    def test_incremental_add_and_reload(self):
+        self.assertEqual(self.index.add(DAY_2), 1)
+
+        # Latest first
+        self.assertEqual(self.ids(self.index.search("buyback")), ["b1", "a1", "a2"])
+
+        index = AnnouncementIndex(self.tmp.name)
+        self.assertEqual(len(index), 4)
+
+        index.merge()
+
+        self.assertEqual(len(list(Path(self.tmp.name).glob("segment_*"))), 1)
+        self.assertEqual(
+            self.ids(AnnouncementIndex(self.tmp.name).search("buyback board")), ["b1", "a1"]
+        )
+
+    def test_add_after_search(self):
+        # Postings of "buyback" are decoded by the first search
+        self.assertEqual(len(self.index.search("buyback")), 2)
+
+        undated = dict(announcement("c1", 500325, "", "Buyback update"), NEWS_DT="")
+        self.index.add(DAY_2 + [undated])
+
+        self.assertEqual(self.ids(self.index.search("buyback", limit=2)), ["b1", "a1"])
+        self.assertEqual(self.ids(self.index.search("buyback", scripcode=500325))[-1], "c1")
+        self.assertNotIn(
+            "c1", self.ids(self.index.search("buyback", from_date=date(2023, 10, 1)))
+        )
+
+    def test_add_jsonl_file(self):
+        file = Path(self.tmp.name) / "day.jsonl"
+        file.write_text("".join(json.dumps(row) + "\n" for row in DAY_2))
+
+        self.assertEqual(self.index.add_file(file), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import tempfile
+import unittest
+from pathlib import Path
+from threading import Lock
+
+import context  # noqa: F401
+from bse.securities import SecuritySync
+
+
+def security(code, status="Active", group="A", mktcap="100.00"):
+    return {
+        "SCRIP_CD": code,
+        "Scrip_Name": f"Company {code}",
+        "Status": status,
+        "GROUP": group,
+        "Segment": "Equity",
+        "Mktcap": mktcap,
+    }
+
+
+class StubBSE:
+    def __init__(self, folder, securities):
+        self.dir = Path(folder)
+        self.securities = securities
+        self.calls = []
+        self.lock = Lock()
+
+    def listSecurities(self, group="A", segment="Equity", status="Active", **kwargs):
+        with self.lock:
+            self.calls.append((segment, status, group))
+
+        return [
+            s
+            for s in self.securities
+            if s["Status"].lower() == status.lower()
+            and s["Segment"].lower() == segment.lower()
+            and (not group or s["GROUP"] == group.upper())
+        ]
+
+
+class Test_Security_Sync(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+        self.bse = StubBSE(
+            self.tmp.name,
+            [security("500001"), security("500002"), security("500003")],
+        )
+
+        self.sync = SecuritySync(self.bse)
+        self.first = self.sync.sync()
+
+    def tearDown(self):
+        self.sync.close()
+        self.tmp.cleanup()
+
+    def test_first_sync_is_all_new(self):
+        self.assertEqual(len(self.first["new"]), 3)
+        self.assertEqual(len(self.bse.calls), 3)
+        self.assertEqual(self.sync.get("500001")["Scrip_Name"], "Company 500001")
+
+    def test_unchanged_universe(self):
+        # Market cap changes are ignored
+        self.bse.securities[0]["Mktcap"] = "200.00"
+
+        result = self.sync.sync()
+
+        self.assertEqual(result, {k: [] for k in result})
+
+    def test_delta(self):
+        self.bse.securities = [
+            security("500001", group="B"),
+            security("500002", status="Suspended"),
+            security("500004"),
+        ]
+
+        result = self.sync.sync()
+
+        self.assertEqual([row["SCRIP_CD"] for row in result["new"]], ["500004"])
+        self.assertEqual(result["suspended"], ["500002"])
+        self.assertEqual(result["removed"], ["500003"])
+
+        changed = {c["scripcode"]: c["fields"] for c in result["changed"]}
+
+        self.assertEqual(changed["500001"], {"GROUP": ["A", "B"]})
+        self.assertEqual(changed["500002"], {"Status": ["Active", "Suspended"]})
+
+        self.assertIsNone(self.sync.get("500003"))
+        self.assertEqual([s["SCRIP_CD"] for s in self.sync.all(status="Suspended")], ["500002"])
+
+        kinds = self.sync.db.execute("SELECT kind, COUNT(*) FROM changes GROUP BY kind")
+
+        self.assertEqual(dict(kinds.fetchall()), {"new": 4, "changed": 2, "removed": 1})
+
+    def test_empty_response_keeps_stored_rows(self):
+        self.bse.securities = [security("500002", status="Suspended")]
+
+        result = self.sync.sync()
+
+        # No Active rows returned. Only the suspended scrip is updated
+        self.assertEqual(result["removed"], [])
+        self.assertEqual(result["suspended"], ["500002"])
+        self.assertIsNotNone(self.sync.get("500001"))
+
+    def test_group_sync_keeps_other_groups(self):
+        self.bse.securities.append(security("500004", group="B"))
+        self.sync.sync()
+
+        self.bse.securities = [
+            s for s in self.bse.securities if s["SCRIP_CD"] != "500001"
+        ]
+
+        result = self.sync.sync(groups=("A",))
+
+        self.assertEqual(result["removed"], ["500001"])
+        self.assertIsNotNone(self.sync.get("500004"))
+
+    def test_lowercase_status_and_segment(self):
+        self.bse.securities = [security("500001"), security("500002")]
+
+        result = self.sync.sync(segments=["equity"], statuses=["active"])
+
+        self.assertEqual(result["removed"], ["500003"])
+        self.assertEqual(result["new"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import json
+import stat
+import tempfile
+import unittest
+from pathlib import Path
+from time import time
+
+import context  # noqa: F401
+from bse import BSE
+from bse.session_state import SessionState
+from requests import Session
+
+
+class Test_Session_State(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "session.json"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def session(self):
+        session = Session()
+        session.headers["X-Token"] = "abc"
+        session.cookies.set("live", "1", domain=".bseindia.com", expires=int(time()) + 3600)
+        session.cookies.set("expired", "1", domain=".bseindia.com", expires=int(time()) - 1)
+        session.cookies.set("session", "1", domain=".bseindia.com")
+        return session
+
+    def test_save_and_load(self):
+        SessionState(self.path).save(self.session())
+
+        self.assertEqual(stat.S_IMODE(self.path.stat().st_mode), 0o600)
+
+        session = Session()
+
+        self.assertEqual(SessionState(self.path).load(session), 2)
+        self.assertEqual(session.cookies.get("live"), "1")
+        self.assertIsNone(session.cookies.get("expired"))
+        self.assertEqual(session.headers["X-Token"], "abc")
+
+    def test_session_cookies_expire_with_ttl(self):
+        SessionState(self.path).save(self.session())
+
+        state = json.loads(self.path.read_text())
+        state["saved"] -= 7 * 3600
+        self.path.write_text(json.dumps(state))
+
+        session = Session()
+
+        self.assertEqual(SessionState(self.path).load(session), 1)
+        self.assertIsNone(session.cookies.get("session"))
+
+    def test_saves_from_processes_are_merged(self):
+        SessionState(self.path).save(self.session())
+
+        other = Session()
+        other.cookies.set("other", "2", domain=".bseindia.com", expires=int(time()) + 3600)
+        other.cookies.set("live", "3", domain=".bseindia.com", expires=int(time()) + 3600)
+        SessionState(self.path).save(other)
+
+        session = Session()
+
+        self.assertEqual(SessionState(self.path).load(session), 3)
+        self.assertEqual(session.cookies.get("other"), "2")
+        self.assertEqual(session.cookies.get("live"), "3")
+        self.assertEqual(session.cookies.get("session"), "1")
+        self.assertEqual(list(self.path.parent.glob("*.tmp")), [])
+
+    def test_corrupt_file_is_ignored(self):
+        self.path.write_text("{")
+
+        self.assertEqual(SessionState(self.path).load(Session()), 0)
+
+    def test_bse_restores_session(self):
+        with BSE(self.tmp.name) as bse:
+            bse.session.cookies.set("live", "1", domain=".bseindia.com")
+            bse.session.headers["User-Agent"] = "saved"
+
+        bse = BSE(self.tmp.name)
+
+        self.assertEqual(bse.session.cookies.get("live"), "1")
+
+        # Default headers are not replaced by saved ones
+        self.assertNotEqual(bse.session.headers["User-Agent"], "saved")
+        bse.exit()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import context  # noqa: F401
+from bse.sink import AnnouncementSink
+
+PAGE_SIZE = 3
+TOTAL = 8
+
+
+class StubBSE:
+    """Lists announcements newest first, like BSE"""
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.ids = [str(i) for i in reversed(range(TOTAL))]
+        self.pages = []
+
+    def file(self, count):
+        """New announcements are listed first"""
+
+        start = len(self.ids)
+        self.ids[:0] = [str(i) for i in reversed(range(start, start + count))]
+
+    def announcements(self, page_no=1, **kwargs):
+        if page_no == self.fail_on:
+            self.fail_on = None
+            raise ConnectionError("Simulated failure")
+
+        self.pages.append(page_no)
+
+        start = (page_no - 1) * PAGE_SIZE
+        rows = [
+            {"NEWSID": i, "HEADLINE": f"Headline {i}"}
+            for i in self.ids[start : start + PAGE_SIZE]
+        ]
+
+        return {"Table": rows, "Table1": [{"ROWCNT": len(self.ids)}]}
+
+
+class Test_Announcement_Sink(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "announcements.jsonl"
+        self.dt = datetime(2023, 10, 20)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def ids(self, sink):
+        return sorted(int(row["NEWSID"]) for row in sink.read())
+
+    def test_all_pages_are_written(self):
+        bse = StubBSE()
+        sink = AnnouncementSink(bse, self.path)
+
+        self.assertEqual(sink.run(self.dt, self.dt), TOTAL)
+        self.assertEqual(self.ids(sink), list(range(TOTAL)))
+        self.assertEqual(bse.pages, [1, 2, 3])
+
+        # Complete. No more requests
+        self.assertEqual(sink.run(self.dt, self.dt), 0)
+        self.assertEqual(bse.pages, [1, 2, 3])
+
+    def test_resume_after_failure(self):
+        bse = StubBSE(fail_on=2)
+        sink = AnnouncementSink(bse, self.path, compress="gzip")
+
+        with self.assertRaises(ConnectionError):
+            sink.run(self.dt, self.dt)
+
+        # Simulate a partially written page
+        with sink.path.open("ab") as f:
+            f.write(b"\x1f\x8bpartial")
+
+        sink = AnnouncementSink(bse, self.path, compress="gzip")
+
+        # Page 1 is read again to check for new announcements
+        self.assertEqual(sink.run(self.dt, self.dt), TOTAL - PAGE_SIZE)
+        self.assertEqual(bse.pages, [1, 1, 2, 3])
+        self.assertEqual(self.ids(sink), list(range(TOTAL)))
+
+    def test_live_day_picks_up_new_announcements(self):
+        bse = StubBSE()
+        sink = AnnouncementSink(bse, self.path)
+        today = datetime.now()
+
+        self.assertEqual(sink.run(today, today), TOTAL)
+
+        # Announcements filed since are listed first and span two pages
+        bse.file(4)
+        bse.pages.clear()
+
+        self.assertEqual(sink.run(today, today), 4)
+        self.assertEqual(bse.pages, [1, 2])
+        self.assertEqual(self.ids(sink), list(range(TOTAL + 4)))
+
+        # Nothing new
+        bse.pages.clear()
+
+        self.assertEqual(sink.run(today, today), 0)
+        self.assertEqual(bse.pages, [1])
+        self.assertEqual(len(self.ids(sink)), TOTAL + 4)
+
+    def test_new_announcements_during_backfill(self):
+        bse = StubBSE()
+        sink = AnnouncementSink(bse, self.path)
+        today = datetime.now()
+
+        sink.run(today, today, max_pages=1)
+
+        # Older pages shift down as new announcements are filed
+        bse.file(2)
+
+        self.assertEqual(sink.run(today, today), TOTAL + 2 - PAGE_SIZE)
+        self.assertEqual(self.ids(sink), list(range(TOTAL + 2)))
+
+    def test_checkpoint_size_is_bounded(self):
+        sink = AnnouncementSink(StubBSE(), self.path)
+        sink.run(self.dt, self.dt)
+
+        checkpoint = sink.checkpoint()
+
+        self.assertLessEqual(len(checkpoint["head"]), PAGE_SIZE)
+        self.assertLessEqual(len(checkpoint["tail"]), PAGE_SIZE)
+
+    def test_other_query_is_rejected(self):
+        bse = StubBSE()
+        sink = AnnouncementSink(bse, self.path)
+
+        sink.run(self.dt, self.dt)
+
+        with self.assertRaises(ValueError):
+            sink.run(self.dt - timedelta(1), self.dt)
+
+        # The file is not changed
+        self.assertEqual(bse.pages, [1, 2, 3])
+        self.assertEqual(self.ids(sink), list(range(TOTAL)))
+
+    def test_file_without_checkpoint_is_kept(self):
+        self.path.write_text('{"NEWSID": "x"}\n')
+
+        with self.assertRaises(ValueError):
+            AnnouncementSink(StubBSE(), self.path).run(self.dt, self.dt)
+
+        self.assertEqual(self.path.read_text(), '{"NEWSID": "x"}\n')
+
+
+if __name__ == "__main__":
+    unittest.main()
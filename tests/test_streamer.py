@@ -0,0 +1,113 @@
+import unittest
+from itertools import islice
+from unittest.mock import patch
+
+import context  # noqa: F401
+from bse.streamer import QuoteScheduler, stream_quotes
+
+
+class StubBSE:
+    def __init__(self, quotes):
+        # scripcode -> list of quotes returned in sequence
+        self.quotes = quotes
+        self.calls = []
+
+    def quote(self, scripcode):
+        self.calls.append(scripcode)
+        seq = self.quotes[scripcode]
+        return seq.pop(0) if len(seq) > 1 else seq[0]
+
+
+class Test_Quote_Scheduler(unittest.TestCase):
+    def test_round_robin(self):
+        scheduler = QuoteScheduler()
+
+        for code in ("1", "2", "3"):
+            scheduler.add(code, interval=0)
+
+        order = []
+
+        for _ in range(6):
+            code = scheduler.next()
+            order.append(code)
+            scheduler.done(code)
+
+        self.assertEqual(order, ["1", "2", "3", "1", "2", "3"])
+
+    def test_priority_served_first(self):
+        scheduler = QuoteScheduler()
+        scheduler.add("1", interval=0, priority=5)
+        scheduler.add("2", interval=0)
+
+        # Lower values first, as with bse.priority
+        self.assertEqual(scheduler.next(), "2")
+
+    def test_low_priority_is_not_starved(self):
+        clock = [0.0]
+
+        def sleep(seconds):
+            clock[0] += seconds
+
+        scheduler = QuoteScheduler(aging=5)
+        polls = {}
+
+        with patch("bse.streamer.monotonic", lambda: clock[0]), patch(
+            "bse.streamer.sleep", sleep
+        ):
+            for i in range(10):
+                scheduler.add(f"high{i}", interval=0)
+
+            scheduler.add("low", interval=0, priority=1)
+
+            # 30 seconds of polls at 8 requests per second
+            for _ in range(240):
+                code = scheduler.next()
+                polls[code] = polls.get(code, 0) + 1
+                clock[0] += 1 / 8
+                scheduler.done(code)
+
+        self.assertGreater(polls["low"], 0)
+        self.assertLess(polls["low"], polls["high0"])
+
+    def test_duplicate_scrip_raises(self):
+        scheduler = QuoteScheduler()
+        scheduler.add("1")
+
+        with self.assertRaises(ValueError):
+            scheduler.add("1")
+
+    def test_empty_schedule_raises(self):
+        with self.assertRaises(IndexError):
+            QuoteScheduler().next()
+
+
+class Test_Stream_Quotes(unittest.TestCase):
+    def test_only_changes_are_emitted(self):
+        q1 = {"Open": 10.0, "LTP": 11.0}
+        q2 = {"Open": 10.0, "LTP": 12.0}
+
+        bse = StubBSE({"500180": [q1, q1, q2]})
+
+        events = list(islice(stream_quotes(bse, ["500180"], interval=0), 2))
+
+        self.assertEqual(events[0]["changed"], q1)
+        self.assertEqual(events[1]["changed"], {"LTP": 12.0})
+        self.assertEqual(len(bse.calls), 3)
+
+    def test_failed_poll_is_skipped(self):
+        class FailingBSE(StubBSE):
+            def quote(self, scripcode):
+                if scripcode == "1":
+                    raise TimeoutError("Request timed out")
+
+                return super().quote(scripcode)
+
+        bse = FailingBSE({"2": [{"LTP": 1.0}]})
+
+        event = next(stream_quotes(bse, ["1", "2"], interval=0))
+
+        self.assertEqual(event["scripcode"], "2")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+
+import context  # noqa: F401
+from bse import BSE
+from bse.trading_calendar import TradingCalendar
+
+
+class NotFoundSession:
+    status_code = 404
+
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        return False
+
+    def close(self):
+        pass
+
+
+class Test_Trading_Calendar(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "calendar.json"
+        self.calendar = TradingCalendar(self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_weekends_are_not_trading_days(self):
+        self.assertTrue(self.calendar.is_trading_day(date(2023, 10, 20)))
+        self.assertFalse(self.calendar.is_trading_day(date(2023, 10, 21)))
+        self.assertFalse(self.calendar.is_trading_day(date(2023, 10, 22)))
+
+    def test_holidays_are_persisted(self):
+        self.calendar.add_holiday(date(2023, 10, 24))
+
+        calendar = TradingCalendar(self.path)
+
+        self.assertFalse(calendar.is_trading_day(date(2023, 10, 24)))
+        self.assertEqual(
+            calendar.trading_days(date(2023, 10, 20), date(2023, 10, 25)),
+            [date(2023, 10, 20), date(2023, 10, 23), date(2023, 10, 25)],
+        )
+
+    def test_writers_on_one_file_are_merged(self):
+        other = TradingCalendar(self.path)
+
+        self.calendar.add_holiday(date(2023, 10, 24))
+        other.add_holiday(date(2023, 11, 14))
+        other.add_unavailable("delivery", date(2023, 10, 20))
+
+        calendar = TradingCalendar(self.path)
+
+        self.assertEqual(calendar.holidays, {date(2023, 10, 24), date(2023, 11, 14)})
+        self.assertTrue(calendar.is_unavailable("delivery", date(2023, 10, 20)))
+        self.assertEqual(list(self.path.parent.glob("*.tmp")), [])
+
+    def test_future_holidays_are_ignored(self):
+        future = date(date.today().year + 1, 1, 1)
+
+        self.calendar.add_holiday(future)
+
+        self.assertFalse(self.calendar.is_known(future))
+
+    def test_confirmed_trading_day_is_kept(self):
+        # Muhurat trading on a Sunday
+        self.calendar.add_trading_day(date(2023, 11, 12))
+        self.calendar.add_holiday(date(2023, 11, 12))
+
+        self.assertTrue(self.calendar.is_trading_day(date(2023, 11, 12)))
+
+
+class Test_BSE_Calendar(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.bse = BSE(self.tmp.name)
+        self.session = self.bse.transport = NotFoundSession()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_two_missing_reports_are_learned_as_holiday(self):
+        holiday = date(2023, 10, 24)
+
+        for _ in range(2):
+            with self.assertRaises(RuntimeError):
+                self.bse.bhavcopyReport(holiday)
+
+        self.assertEqual(self.session.calls, 1)
+
+        # A missing bhavcopy alone does not make the date a holiday
+        self.assertTrue(BSE(self.tmp.name).calendar.is_trading_day(holiday))
+
+        with self.assertRaises(RuntimeError):
+            self.bse.deliveryReport(holiday)
+
+        self.assertEqual(self.session.calls, 2)
+        self.assertFalse(BSE(self.tmp.name).calendar.is_trading_day(holiday))
+        self.assertEqual(self.bse.fetchAllIndicesDataByDate(holiday), {})
+        self.assertEqual(self.session.calls, 2)
+
+    def test_known_holiday_makes_no_request(self):
+        holiday = date(2023, 10, 24)
+        self.bse.calendar.add_holiday(holiday)
+
+        for fn in (self.bse.bhavcopyReport, self.bse.deliveryReport):
+            with self.assertRaises(RuntimeError):
+                fn(holiday)
+
+        self.assertEqual(self.session.calls, 0)
+
+    def test_missing_report_is_cached_per_report(self):
+        dt = date(2023, 10, 24)
+
+        for _ in range(2):
+            with self.assertRaises(RuntimeError):
+                self.bse.deliveryReport(dt)
+
+        self.assertEqual(self.session.calls, 1)
+
+        # A missing delivery report does not make the date a holiday
+        calendar = BSE(self.tmp.name).calendar
+
+        self.assertTrue(calendar.is_trading_day(dt))
+        self.assertTrue(calendar.is_unavailable("delivery", dt))
+
+        with self.assertRaises(RuntimeError):
+            self.bse.bhavcopyReport(dt)
+
+        self.assertEqual(self.session.calls, 2)
+
+    def test_weekend_makes_no_request(self):
+        self.assertEqual(self.bse.fetchAllIndicesDataByDate(date(2023, 10, 21)), {})
+        self.assertEqual(self.session.calls, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
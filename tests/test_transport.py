@@ -0,0 +1,202 @@
+import json
+import tempfile
+import unittest
+from datetime import date
+from itertools import islice
+
+import requests
+from requests.adapters import BaseAdapter
+
+import context  # noqa: F401
+from bse import BSE
+from bse.streamer import stream_quotes
+from bse.transport import FakeTransport, HTTPXTransport, httpx
+
+try:
+    from h2.config import H2Configuration
+    from h2.connection import H2Connection
+except ImportError:
+    H2Connection = None
+
+ADVANCE_DECLINE = f"{BSE.api_url}/advanceDecline/w"
+
+
+class Test_Fake_Transport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+        self.transport = FakeTransport(
+            {ADVANCE_DECLINE: [{"Sens_ind": "SENSEX", "UP": "20"}]}
+        )
+
+        self.bse = BSE(self.tmp.name, transport=self.transport)
+
+    def tearDown(self):
+        self.bse.exit()
+        self.tmp.cleanup()
+
+    def test_default_headers_are_set(self):
+        self.assertIsNone(self.bse.session)
+        self.assertIn("User-Agent", self.transport.headers)
+
+    def test_json_response(self):
+        self.assertEqual(self.bse.advanceDecline()[0]["UP"], "20")
+        self.assertEqual(self.transport.requests[0][1], {"val": "Index"})
+
+    def test_error_response(self):
+        self.transport.route(ADVANCE_DECLINE, (500, ""))
+
+        with self.assertRaises(ConnectionError):
+            self.bse.advanceDecline()
+
+    def test_download(self):
+        dt = date(2023, 10, 20)
+        url = f"{BSE.base_url}/download/BhavCopy/Equity/BhavCopy_BSE_CM_0_0_0_{dt:%Y%m%d}_F_0000.CSV"
+
+        self.transport.route(url, "TradDt,FinInstrmId\n2023-10-20,500180\n")
+
+        file = self.bse.bhavcopyReport(dt)
+
+        self.assertEqual(file.read_text(), "TradDt,FinInstrmId\n2023-10-20,500180\n")
+
+    def test_missing_route_is_not_found(self):
+        with self.assertRaises(RuntimeError):
+            self.bse.bhavcopyReport(date(2023, 10, 20))
+
+
+class FlakyAdapter(BaseAdapter):
+    """Raise the queued requests errors, then return a quote"""
+
+    def __init__(self, errors):
+        super().__init__()
+        self.errors = list(errors)
+        self.calls = 0
+
+    def send(self, request, **kwargs):
+        self.calls += 1
+
+        if self.errors:
+            raise self.errors.pop(0)
+
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.url = request.url
+        response.request = request
+        header = {"PrevClose": "10", "Open": "10", "High": "11", "Low": "9", "LTP": "10.5"}
+        response._content = json.dumps({"Header": header}).encode()
+
+        return response
+
+    def close(self):
+        pass
+
+
+class Test_Requests_Transport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.bse = BSE(self.tmp.name)
+
+    def tearDown(self):
+        self.bse.exit()
+        self.tmp.cleanup()
+
+    def mount(self, *errors):
+        adapter = FlakyAdapter(errors)
+        self.bse.session.mount("https://", adapter)
+        return adapter
+
+    def test_errors_are_builtin(self):
+        for error, expected in (
+            (requests.ConnectionError("Connection refused"), ConnectionError),
+            (requests.ConnectTimeout("Timed out"), TimeoutError),
+            (requests.ReadTimeout("Timed out"), TimeoutError),
+            (requests.exceptions.ChunkedEncodingError("Closed"), ConnectionError),
+        ):
+            with self.subTest(error=error):
+                self.mount(error)
+
+                with self.assertRaises(expected):
+                    self.bse.transport.get(ADVANCE_DECLINE)
+
+    def test_stream_quotes_survives_network_errors(self):
+        adapter = self.mount(
+            requests.ConnectionError("Connection reset"),
+            requests.ConnectTimeout("Timed out"),
+        )
+
+        events = list(islice(stream_quotes(self.bse, ["500180"], interval=0), 1))
+
+        self.assertEqual(events[0]["quote"]["LTP"], 10.5)
+        self.assertEqual(adapter.calls, 3)
+
+
+@unittest.skipIf(httpx is None, "httpx is not installed")
+class Test_HTTPX_Transport(unittest.TestCase):
+    def test_headers_are_shared(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            bse = BSE(tmp, transport=HTTPXTransport(http2=False))
+
+            self.assertIn("User-Agent", bse.transport.headers)
+            bse.exit()
+
+    def test_network_errors(self):
+        for error, expected in (
+            (httpx.ConnectError("Connection refused"), ConnectionError),
+            (httpx.RemoteProtocolError("Server disconnected"), ConnectionError),
+            (httpx.ReadTimeout("Timed out"), TimeoutError),
+        ):
+
+            def handler(request):
+                raise error
+
+            with self.subTest(error=error):
+                transport = HTTPXTransport(transport=httpx.MockTransport(handler))
+
+                with self.assertRaises(expected):
+                    transport.get(ADVANCE_DECLINE)
+
+                transport.close()
+
+
+@unittest.skipIf(httpx is None or H2Connection is None, "httpx[http2] is not installed")
+class Test_HTTPX_Transport_HTTP2(unittest.TestCase):
+    def test_request_headers_are_valid_http2(self):
+        received = []
+
+        def handler(request):
+            # h2 raises ProtocolError on connection specific headers
+            conn = H2Connection(
+                H2Configuration(client_side=True, normalize_outbound_headers=False)
+            )
+            conn.initiate_connection()
+            conn.send_headers(
+                1,
+                [
+                    (":method", request.method),
+                    (":scheme", request.url.scheme),
+                    (":authority", request.url.host),
+                    (":path", request.url.raw_path.decode()),
+                    *((k.lower(), v) for k, v in request.headers.items()),
+                ],
+                end_stream=True,
+            )
+
+            received.append(request.headers)
+
+            return httpx.Response(200, json=[{"UP": "20"}])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            transport = HTTPXTransport(transport=httpx.MockTransport(handler))
+            bse = BSE(tmp, transport=transport)
+
+            self.assertEqual(bse.transport.headers["Connection"], "keep-alive")
+            self.assertEqual(bse.advanceDecline(), [{"UP": "20"}])
+            bse.exit()
+
+        self.assertNotIn("Connection", received[0])
+        self.assertIn("User-Agent", received[0])
+
+
+if __name__ == "__main__":
+    unittest.main()